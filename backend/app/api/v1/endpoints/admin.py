@@ -1,5 +1,200 @@
-from fastapi import APIRouter
+"""
+管理 API Endpoints
+
+系统配置的查看与批量修改、自定义告警规则管理
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import CurrentUser, get_db, get_current_admin
+from app.schemas.alert import (
+    AlertReplayRequest, AlertReplayResult, AlertRuleCreate, AlertRuleRead, AlertRuleUpdate
+)
+from app.schemas.config import ConfigBatch, ConfigListItem
+from app.services.alert_engine import AlertEngine
+from app.services.config_service import ConfigService
+from app.services.rule_engine import AlertRuleService, DuplicateRuleName, RuleDefinitionError
+from app.services.operation_logger import OperationLogger, OperationTemplates, record_operation
 
 router = APIRouter()
 
-# TODO: 预留给用户管理、配置管理等接口。
+# TODO: 预留给用户管理等接口。
+
+
+@router.get("/config", response_model=List[ConfigListItem])
+def list_configs(
+        category: Optional[str] = None,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    查看系统配置
+
+    仅管理员可以查看
+    """
+    return ConfigService(db).list_configs(category)
+
+
+@router.put("/config", response_model=dict)
+def update_configs(
+        batch: ConfigBatch,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    批量修改系统配置值
+
+    所有配置在一个事务中更新，提交后本进程的配置快照立即失效；
+    任一配置不存在、不可编辑或值与类型不符时整批不修改
+
+    仅管理员可以修改
+    """
+    try:
+        changes = ConfigService(db).update_batch(batch, current_user.id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"配置不存在: {e.args[0]}")
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=f"配置不可编辑: {e.args[0]}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="配置值与类型不符")
+
+    for key, old_value, new_value in changes:
+        record_operation(
+            db,
+            user_id=current_user.id,
+            username=current_user.username,
+            action=OperationLogger.Actions.UPDATE_CONFIG,
+            detail=OperationTemplates.update_config(key, old_value, new_value),
+            resource_type=OperationLogger.Resources.CONFIG,
+            resource_id=key,
+        )
+
+    return {"updated": [key for key, _, _ in changes]}
+
+
+def _record_rule_operation(
+        db: Session,
+        current_user: CurrentUser,
+        action: str,
+        verb: str,
+        rule_id: int,
+        name: str
+) -> None:
+    record_operation(
+        db,
+        user_id=current_user.id,
+        username=current_user.username,
+        action=action,
+        detail=OperationTemplates.alert_rule(verb, rule_id, name),
+        resource_type=OperationLogger.Resources.ALERT_RULE,
+        resource_id=str(rule_id),
+    )
+
+
+@router.get("/alert-rules", response_model=List[AlertRuleRead])
+def list_alert_rules(
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    查看自定义告警规则
+
+    仅管理员可以查看
+    """
+    return AlertRuleService(db).list_rules()
+
+
+@router.post("/alert-rules", response_model=AlertRuleRead, status_code=201)
+def create_alert_rule(
+        rule_in: AlertRuleCreate,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    创建自定义告警规则
+
+    规则先编译校验，提交后本进程的规则集立即重新编译
+
+    仅管理员可以创建
+    """
+    service = AlertRuleService(db)
+    try:
+        rule = service.create_rule(rule_in, current_user.id)
+    except RuleDefinitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DuplicateRuleName:
+        raise HTTPException(status_code=409, detail="规则名称已存在")
+
+    _record_rule_operation(db, current_user, OperationLogger.Actions.CREATE_ALERT_RULE, "创建", rule.id, rule.name)
+    return rule
+
+
+@router.patch("/alert-rules/{rule_id}", response_model=AlertRuleRead)
+def update_alert_rule(
+        rule_id: int,
+        rule_in: AlertRuleUpdate,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    修改自定义告警规则(含启用/停用)
+
+    定义未变化的规则保留窗口状态，修改了条件/分组/阈值/窗口的规则从空窗口开始计数
+
+    仅管理员可以修改
+    """
+    service = AlertRuleService(db)
+    rule = service.get_rule(rule_id)
+    if rule is None:
+        raise HTTPException(status_code=404, detail="规则不存在")
+    try:
+        rule = service.update_rule(rule, rule_in)
+    except RuleDefinitionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except DuplicateRuleName:
+        raise HTTPException(status_code=409, detail="规则名称已存在")
+
+    _record_rule_operation(db, current_user, OperationLogger.Actions.UPDATE_ALERT_RULE, "修改", rule.id, rule.name)
+    return rule
+
+
+@router.delete("/alert-rules/{rule_id}", status_code=204)
+def delete_alert_rule(
+        rule_id: int,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    删除自定义告警规则(已产生的告警保留)
+
+    仅管理员可以删除
+    """
+    service = AlertRuleService(db)
+    rule = service.get_rule(rule_id)
+    if rule is None:
+        raise HTTPException(status_code=404, detail="规则不存在")
+    name = rule.name
+    service.delete_rule(rule)
+
+    _record_rule_operation(db, current_user, OperationLogger.Actions.DELETE_ALERT_RULE, "删除", rule_id, name)
+
+
+@router.post("/alert-replay", response_model=AlertReplayResult)
+def replay_alerts(
+        request: AlertReplayRequest,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    用历史日志回放告警规则
+
+    按时间顺序以模拟时钟执行暴力破解/ERROR日志/可疑访问规则，返回会产生的告警，
+    不写入 alerts 表，也不影响在线检测器的状态；阈值/窗口为空时使用当前配置
+
+    仅管理员可以回放
+    """
+    if request.end_time <= request.start_time:
+        raise HTTPException(status_code=400, detail="结束时间必须晚于起始时间")
+    return AlertEngine(db).replay(request)
@@ -1,5 +1,46 @@
-from fastapi import APIRouter
+"""
+告警 API Endpoints
+
+提供告警关联日志查询等接口
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+from app.core.deps import CurrentUser, get_db, get_current_user
+from app.models.alert import Alert
+from app.schemas.alert import AlertLogPage
+from app.schemas.log import LogListItem
+from app.services.alert_log_links import AlertLogService
+from app.utils.row_json import page_json, row_serializer
 
 router = APIRouter()
 
 # TODO: 第 2 周实现告警列表、详情、状态更新。
+
+
+@router.get("/{alert_id}/logs", response_model=AlertLogPage)
+def get_alert_logs(
+        alert_id: int,
+        after_id: int = Query(0, ge=0, description="上一页最后一条日志的ID，首页为 0"),
+        limit: int = Query(100, ge=1, le=1000, description="每页条数"),
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    分页查看告警的关联日志
+
+    按日志ID升序返回，用上一页的 next_after_id 作为 after_id 取下一页；
+    每页从 alert_logs 主键范围取日志ID，再按主键批量读取日志(只选取列表项的列，直接编码为 JSON)；
+    关联总数只在首页统计
+    """
+    if db.get(Alert, alert_id) is None:
+        raise HTTPException(status_code=404, detail="告警不存在")
+
+    service = AlertLogService(db)
+    logs, next_after_id = service.list_logs(alert_id, after_id, limit)
+    return Response(content=page_json({
+        "alert_id": alert_id,
+        "total": service.count(alert_id) if after_id == 0 else None,
+        "limit": limit,
+        "next_after_id": next_after_id,
+    }, "results", row_serializer(LogListItem).dumps(logs)), media_type="application/json")
@@ -1,5 +1,206 @@
-from fastapi import APIRouter
+"""
+日志 API Endpoints
+
+提供日志写入(单条/批量)、文件上传、列表查询等接口
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.deps import CurrentUser, get_db, get_current_user
+from app.models.log import Log, LogSourceEnum as LogSourceModelEnum
+from app.schemas.log import (
+    LogBatchResult,
+    LogCreate,
+    LogEventTypeEnum,
+    LogFilter,
+    LogIngestTypeEnum,
+    LogLevelEnum,
+    LogParseStatusEnum,
+    LogSearchResults,
+    LogSourceEnum,
+    LogUploadResult,
+)
+from app.services.alert_engine import trigger_alert_check
+from app.services.batch_ingest import BatchLogIngestService, build_api_row
+from app.services.ingest_buffer import IngestBufferFull, ingest_buffer
+from app.services.log_ingest import INGEST_ERROR_TOO_LARGE, get_max_upload_bytes, ingest_upload
+from app.services.log_query import PageTooDeep, search_logs
+from app.services.operation_logger import OperationLogger, OperationTemplates, record_operation
+from app.utils.pagination import InvalidCursor
 
 router = APIRouter()
 
-# TODO: 第 2 周实现日志相关 CRUD、导出、文件上传。
+
+def _upload_size(file: UploadFile) -> int:
+    """获取上传文件大小(字节)，不读取文件内容"""
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, 2)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+def _buffer_full(detail) -> HTTPException:
+    """写入缓冲已满: 503 + Retry-After，提示客户端稍后重试"""
+    return HTTPException(
+        status_code=503,
+        detail=detail,
+        headers={"Retry-After": str(settings.INGEST_RETRY_AFTER_SECONDS)},
+    )
+
+
+@router.post("/", response_model=dict)
+def create_log(
+        log_in: LogCreate,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    写入单条日志(API 接入)
+
+    开启异步写入缓冲时只入队并返回 202 {"accepted": 1}，否则同步写入、触发告警检测(ALERT_CHECK_ON_INGEST)并返回日志 id
+    """
+    if ingest_buffer.running:
+        try:
+            ingest_buffer.offer([build_api_row(log_in)])
+        except IngestBufferFull:
+            raise _buffer_full("写入队列已满，请稍后重试")
+        response.status_code = 202
+        return {"accepted": 1}
+
+    log = Log(**build_api_row(log_in))
+    db.add(log)
+    db.commit()
+    db.refresh(log)
+
+    if settings.ALERT_CHECK_ON_INGEST:
+        trigger_alert_check(db, log.id)
+    return {"id": log.id}
+
+
+@router.post("/batch", response_model=LogBatchResult)
+async def create_logs_batch(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    批量写入日志(API 接入)
+
+    请求体为 NDJSON(每行一个日志对象)或 JSON 数组，流式读取、按批校验并以多行 INSERT 入库；
+    单条记录校验失败不影响其他记录，失败明细按行号(数组下标)返回
+
+    开启异步写入缓冲时校验通过的记录只入队并返回 202(queued=true)；
+    队列已满返回 503，detail 中为已入队部分的统计
+    """
+    buffer = ingest_buffer if ingest_buffer.running else None
+    service = BatchLogIngestService(db, buffer=buffer)
+    try:
+        result = await service.ingest(request.stream())
+    except IngestBufferFull:
+        raise _buffer_full(service.result.as_dict())
+    if buffer is not None:
+        response.status_code = 202
+    return result.as_dict()
+
+
+@router.post("/upload", response_model=LogUploadResult)
+def upload_logs(
+        file: UploadFile = File(..., description="日志文件"),
+        source: LogSourceEnum = Form(..., description="日志来源"),
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    上传日志文件
+
+    文件按块流式读取、逐行解析并分批入库，返回成功/失败条数；
+    支持 gzip/bz2/xz 压缩文件(按文件头识别，边读边解压)，大小限制作用于压缩后的文件，
+    解压后的大小另受 INGEST_MAX_DECOMPRESSED_BYTES 限制；压缩文件读取中途损坏或超限时
+    已提交的批次保留，返回已入库部分的统计并标记 truncated
+
+    仅管理员或审计员可以上传
+    """
+    if current_user.role not in ["admin", "auditor"]:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    if _upload_size(file) > get_max_upload_bytes(db):
+        raise HTTPException(status_code=413, detail="上传文件超过大小限制")
+
+    result = ingest_upload(db, file, LogSourceModelEnum(source.value))
+    # 压缩文件一开始就无法读取时没有任何数据入库，按请求错误返回
+    if result.truncated and result.processed == 0:
+        if result.error == INGEST_ERROR_TOO_LARGE:
+            raise HTTPException(status_code=413, detail="解压后文件超过大小限制")
+        raise HTTPException(status_code=400, detail="压缩文件已损坏或不完整")
+
+    record_operation(
+        db,
+        user_id=current_user.id,
+        username=current_user.username,
+        action=OperationLogger.Actions.UPLOAD_LOG,
+        detail=OperationTemplates.upload_log(file.filename or "", result.inserted, result.error),
+        resource_type=OperationLogger.Resources.LOG,
+        result="FAILED" if result.truncated else "SUCCESS",
+    )
+
+    return result.as_dict()
+
+
+@router.get("/", response_model=LogSearchResults)
+def list_logs(
+        start_time: Optional[datetime] = Query(None, description="开始时间"),
+        end_time: Optional[datetime] = Query(None, description="结束时间"),
+        levels: Optional[str] = Query(None, description="日志级别，多个用逗号分隔"),
+        source: Optional[LogSourceEnum] = Query(None, description="日志来源"),
+        keyword: Optional[str] = Query(None, description="日志内容关键字"),
+        ip: Optional[str] = Query(None, description="IP地址"),
+        event_type: Optional[LogEventTypeEnum] = Query(None, description="事件类型"),
+        ingest_type: Optional[LogIngestTypeEnum] = Query(None, description="接入方式"),
+        parse_status: Optional[LogParseStatusEnum] = Query(None, description="解析状态"),
+        page: int = Query(1, ge=1, description="页码(仅浅页可用，深页请使用 cursor)"),
+        page_size: int = Query(20, ge=1, le=200, description="每页数量"),
+        cursor: Optional[str] = Query(None, description="分页游标(上一次返回的 next_cursor/prev_cursor)"),
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    查询日志列表
+
+    按 (timestamp, id) 倒序；传入 cursor 时按键集翻页(与深度无关)，
+    否则按页码 OFFSET 分页，跳过的行数超过 PAGINATION_MAX_OFFSET 时返回 400
+
+    管理员/审计员可查看全部日志，普通用户只能查看 user_name 为本人的日志；
+    只查询列表项需要的列，直接返回按 LogSearchResults 结构编码的 JSON
+    """
+    try:
+        level_list = [LogLevelEnum(level.strip()) for level in levels.split(",") if level.strip()] if levels else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="无效的日志级别")
+
+    filters = LogFilter(
+        start_time=start_time,
+        end_time=end_time,
+        levels=level_list,
+        source=source,
+        keyword=keyword,
+        ip=ip,
+        event_type=event_type,
+        ingest_type=ingest_type,
+        parse_status=parse_status,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+    )
+    user_name = None if current_user.role in ["admin", "auditor"] else current_user.username
+    try:
+        return Response(content=search_logs(db, filters, user_name), media_type="application/json")
+    except (InvalidCursor, PageTooDeep) as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -4,7 +4,7 @@
 
 提供操作日志的查询和统计接口
 """
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 from typing import Optional
@@ -13,46 +13,15 @@ from datetime import datetime
 from app.core.deps import get_db, get_current_user
 from app.models.user import User
 from app.models.operation_log import OperationLog
-from pydantic import BaseModel
+from app.schemas.operation_log import OperationLogListItem, OperationLogRead
+from app.services.query_count import normalize_filters, query_counter
+from app.utils.fulltext import keyword_condition, substring_condition
+from app.utils.pagination import InvalidCursor, keyset_page, offset_allowed, offset_page
+from app.utils.row_json import page_json, row_serializer
 
 router = APIRouter()
 
 
-class OperationLogRead(BaseModel):
-    """操作日志响应模型"""
-    id: int
-    user_id: int
-    username: str
-    action: str
-    resource_type: Optional[str] = None
-    resource_id: Optional[str] = None
-    detail: str
-    result: str
-    ip_address: Optional[str] = None
-    user_agent: Optional[str] = None
-    request_url: Optional[str] = None
-    request_method: Optional[str] = None
-    created_at: datetime
-    extra_data: Optional[str] = None
-
-    class Config:
-        from_attributes = True
-
-
-class OperationLogListItem(BaseModel):
-    """操作日志列表项(精简版)"""
-    id: int
-    username: str
-    action: str
-    detail: str
-    result: str
-    ip_address: Optional[str] = None
-    created_at: datetime
-
-    class Config:
-        from_attributes = True
-
-
 @router.get("/", response_model=dict)
 def get_operation_logs(
         user_id: Optional[int] = Query(None, description="用户ID"),
@@ -63,22 +32,26 @@ def get_operation_logs(
         ip_address: Optional[str] = Query(None, description="IP地址"),
         start_time: Optional[datetime] = Query(None, description="开始时间"),
         end_time: Optional[datetime] = Query(None, description="结束时间"),
-        search: Optional[str] = Query(None, description="搜索关键字(匹配detail)"),
-        page: int = Query(1, ge=1, description="页码"),
+        search: Optional[str] = Query(None, description="搜索关键字(匹配detail，多词AND/\"短语\"/前缀*)"),
+        page: int = Query(1, ge=1, description="页码(仅浅页可用，深页请使用 cursor)"),
         page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+        cursor: Optional[str] = Query(None, description="分页游标(上一次返回的 next_cursor/prev_cursor)"),
         db: Session = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     获取操作日志列表
 
-    支持多条件筛选和分页查询
+    支持多条件筛选和分页查询；按 (created_at, id) 倒序，
+    传入 cursor 时按键集翻页(与深度无关)，否则按页码 OFFSET 分页(仅限浅页)；
+    只查询列表项需要的列(不读取 user_agent/extra_data 等大字段)，直接编码为 JSON
 
     仅管理员或审计员可以查看所有操作日志
     普通用户只能查看自己的操作日志
     """
-    # 构建查询
-    query = db.query(OperationLog)
+    # 构建查询(只选取列表项的列)
+    serializer = row_serializer(OperationLogListItem)
+    query = db.query(*serializer.columns(OperationLog))
 
     # 权限控制：普通用户只能看自己的日志
     if current_user.role not in ["admin", "auditor"]:
@@ -87,8 +60,10 @@ def get_operation_logs(
     # 应用筛选条件
     if user_id:
         query = query.filter(OperationLog.user_id == user_id)
+    dialect_name = db.get_bind().dialect.name
     if username:
-        query = query.filter(OperationLog.username.like(f"%{username}%"))
+        # 整段用户名按子串匹配(不拆词)，可用时走 username 全文索引
+        query = query.filter(substring_condition(OperationLog.username, username, dialect_name))
     if action:
         query = query.filter(OperationLog.action == action)
     if resource_type:
@@ -102,25 +77,40 @@ def get_operation_logs(
     if end_time:
         query = query.filter(OperationLog.created_at <= end_time)
     if search:
-        query = query.filter(OperationLog.detail.like(f"%{search}%"))
+        # 走 detail 全文索引，支持多词(AND)/"短语"/前缀*
+        query = query.filter(keyword_condition(OperationLog.detail, search, dialect_name))
 
-    # 统计总数
-    total = query.count()
+    # 统计总数(阈值内精确，超过阈值估算，按筛选条件短期缓存)
+    count = query_counter.count(query, OperationLog.id, normalize_filters("operation_logs", {
+        "viewer": None if current_user.role in ["admin", "auditor"] else current_user.id,
+        "user_id": user_id, "username": username, "action": action, "resource_type": resource_type,
+        "result": result, "ip_address": ip_address, "start_time": start_time, "end_time": end_time,
+        "search": search,
+    }))
 
     # 分页查询
-    logs = query.order_by(OperationLog.created_at.desc()).offset(
-        (page - 1) * page_size
-    ).limit(page_size).all()
-
-    # 转换为列表项
-    items = [OperationLogListItem.model_validate(log) for log in logs]
-
-    return {
-        "total": total,
-        "page": page,
+    if cursor is None and page > 1:
+        if not offset_allowed(page, page_size):
+            raise HTTPException(status_code=400, detail="页码过深，请使用 cursor 翻页")
+        logs, next_cursor, prev_cursor = offset_page(
+            query, OperationLog.created_at, OperationLog.id, page, page_size
+        )
+    else:
+        try:
+            logs, next_cursor, prev_cursor = keyset_page(
+                query, OperationLog.created_at, OperationLog.id, page_size, cursor
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(content=page_json({
+        "total": count.total,
+        "total_exact": count.exact,
+        "page": None if cursor is not None else page,
         "page_size": page_size,
-        "items": items
-    }
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }, "items", serializer.dumps(logs)), media_type="application/json")
 
 
 @router.get("/{log_id}", response_model=OperationLogRead)
@@ -1,5 +1,97 @@
-from fastapi import APIRouter
+"""
+统计 API Endpoints
+
+提供入库链路、存储占用等运行指标
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import CurrentUser, get_db, get_current_user
+from app.services.event_classification import get_event_counts
+from app.services.ingest_buffer import ingest_buffer
+from app.services.query_cache import query_cache
+from app.services.raw_data_storage import get_raw_data_size_report
 
 router = APIRouter()
 
 # TODO: 第 2 周实现日志统计接口。
+
+
+@router.get("/ingest", response_model=dict)
+def get_ingest_stats(
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    异步写入缓冲运行指标
+
+    包括队列深度/容量、已接收/已写入/被拒绝条数、写库次数与耗时、最早记录等待时长
+
+    仅管理员或审计员可以查看
+    """
+    if current_user.role not in ["admin", "auditor"]:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    stats = ingest_buffer.snapshot()
+    stats["enabled"] = ingest_buffer.running
+    return stats
+
+
+@router.get("/storage", response_model=dict)
+def get_storage_stats(
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    原始日志(raw_data)存储占用
+
+    包括明文/压缩存储的行数与字节数，以及压缩节省的字节数
+
+    仅管理员或审计员可以查看
+    """
+    if current_user.role not in ["admin", "auditor"]:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    return query_cache.get_or_compute(db, "stats.storage", {}, lambda: get_raw_data_size_report(db))
+
+
+@router.get("/events", response_model=dict)
+def get_event_stats(
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    按事件类型(登录失败/登录成功等)统计日志条数
+
+    按入库时写入的 event_type 索引列分组，不扫描 message；结果经查询结果缓存
+
+    仅管理员或审计员可以查看
+    """
+    if current_user.role not in ["admin", "auditor"]:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    return query_cache.get_or_compute(
+        db, "stats.events", {"start_time": start_time, "end_time": end_time},
+        lambda: get_event_counts(db, start_time, end_time), end_time=end_time
+    )
+
+
+@router.get("/query-cache", response_model=dict)
+def get_query_cache_stats(
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    查询结果缓存运行指标
+
+    包括条目数/占用字节、命中/未命中/因水位前进失效/淘汰次数、命中率和当前入库水位
+
+    仅管理员或审计员可以查看
+    """
+    if current_user.role not in ["admin", "auditor"]:
+        raise HTTPException(status_code=403, detail="权限不足")
+
+    return query_cache.snapshot()
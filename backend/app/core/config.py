@@ -17,6 +17,59 @@ class Settings(BaseSettings):
     PASSWORD_SALT: str = Field("log-audit-salt", description="用于 PBKDF2 的盐")
     BACKEND_CORS_ORIGINS: list[str] = Field(default_factory=list, description="允许的 CORS 来源")
 
+    # 日志文件上传入库
+    INGEST_READ_CHUNK_SIZE: int = Field(1024 * 1024, description="上传文件每次读取的字节数")
+    INGEST_BATCH_SIZE: int = Field(2000, description="批量写入 logs 的行数，每批提交一次")
+    INGEST_MAX_LINE_BYTES: int = Field(64 * 1024, description="单行最大字节数，超出按解析失败处理")
+    INGEST_STORE_FAILED_LINES: bool = Field(True, description="解析失败的行是否以 failed 状态入库")
+    INGEST_DEDUP_ENABLED: bool = Field(False, description="文件上传是否丢弃已入库过的重复日志")
+    INGEST_DEDUP_BLOOM_CAPACITY: int = Field(5_000_000, description="去重布隆过滤器的设计容量(条)")
+    INGEST_DEDUP_BLOOM_ERROR_RATE: float = Field(0.01, description="去重布隆过滤器在设计容量下的误判率")
+    INGEST_DEDUP_WINDOW_DAYS: int = Field(30, description="去重窗口(天)：指纹保留天数，超过后清理，0 表示永久保留")
+    INGEST_DEDUP_PRUNE_INTERVAL_SECONDS: int = Field(3600, description="清理过期指纹的间隔(秒)")
+    INGEST_ASYNC_ENABLED: bool = Field(False, description="API 写入是否走异步写入缓冲(返回 202)")
+    INGEST_QUEUE_MAX_RECORDS: int = Field(200_000, description="异步写入缓冲队列的最大记录数")
+    INGEST_FLUSH_BATCH_SIZE: int = Field(5000, description="异步写入每次成组提交的最大记录数")
+    INGEST_FLUSH_INTERVAL_MS: int = Field(200, description="异步写入最早记录的最长等待时间(毫秒)")
+    INGEST_FLUSH_MAX_RETRIES: int = Field(5, description="异步写入一批连续失败的重试次数，超过后拆分批次，单条仍失败则丢弃")
+    INGEST_RETRY_AFTER_SECONDS: int = Field(1, description="写入缓冲已满时返回给客户端的 Retry-After 秒数")
+    LOG_RAW_DATA_COMPRESSION: bool = Field(False, description="raw_data 是否以 zlib 压缩写入 raw_data_z")
+    LOG_RAW_DATA_DICTIONARY: bool = Field(True, description="压缩 raw_data 时是否使用按来源预置的共享字典")
+    LOG_RAW_DATA_COMPRESS_LEVEL: int = Field(6, description="raw_data 的 zlib 压缩级别(1-9)")
+    INGEST_MAX_REPORTED_ERRORS: int = Field(100, description="批量接口响应中最多返回的错误明细条数")
+    PARSER_DETECT_SAMPLE_LINES: int = Field(50, description="自动识别日志格式时采样的行数")
+    INGEST_MMAP_MIN_BYTES: int = Field(4 * 1024 * 1024, description="文件达到该大小时落盘并通过 mmap 扫描")
+    INGEST_MAX_DECOMPRESSED_BYTES: int = Field(2 * 1024 * 1024 * 1024, description="压缩上传解压后的最大字节数")
+    INGEST_PARSE_WORKERS: int = Field(0, description="多进程解析的进程数，0/1 表示单进程解析")
+    INGEST_PARALLEL_MIN_BYTES: int = Field(64 * 1024 * 1024, description="文件达到该大小才启用多进程解析")
+    INGEST_PARALLEL_RANGE_BYTES: int = Field(8 * 1024 * 1024, description="多进程解析时每个任务处理的字节区间大小")
+    PAGINATION_MAX_OFFSET: int = Field(10000, description="列表接口按页码(OFFSET)分页时最多跳过的行数，更深的页需使用游标")
+    COUNT_EXACT_THRESHOLD: int = Field(10000, description="列表总数精确计数的行数上限，超过后返回估算值")
+    COUNT_CACHE_TTL_SECONDS: int = Field(30, description="列表总数按筛选条件缓存的秒数")
+    COUNT_CACHE_MAX_ENTRIES: int = Field(1024, description="列表总数缓存的最大条目数")
+    FULLTEXT_SEARCH_ENABLED: bool = Field(True, description="关键字检索是否使用全文索引(MySQL ngram 需先执行 005 迁移，SQLite 为 FTS5 trigram)")
+    FULLTEXT_NGRAM_SIZE: int = Field(2, description="与 MySQL ngram_token_size 一致，短于该长度的词不走全文索引")
+    QUERY_CACHE_ENABLED: bool = Field(True, description="是否缓存日志列表与统计查询的结果")
+    QUERY_CACHE_MAX_BYTES: int = Field(64 * 1024 * 1024, description="查询结果缓存的内存预算(按结果序列化后的字节数计)")
+    QUERY_CACHE_TTL_SECONDS: int = Field(300, description="包含当前时间的查询结果最长缓存秒数(入库水位前进时提前失效)")
+    QUERY_CACHE_CLOSED_TTL_SECONDS: int = Field(3600, description="已关闭历史区间的查询结果缓存秒数")
+    QUERY_CACHE_CLOSED_AFTER_SECONDS: int = Field(300, description="截止时间早于当前时间多少秒的区间视为已关闭")
+    QUERY_CACHE_WATERMARK_SECONDS: int = Field(1, description="从数据库读取入库水位(最大日志ID)的间隔(秒)")
+    CONFIG_CACHE_REFRESH_SECONDS: int = Field(5, description="系统配置快照检查数据库是否有变化的间隔(秒)")
+    ALERT_CHECK_ON_INGEST: bool = Field(False, description="入库后是否立即对每批日志执行告警检查(仅适合单进程部署)，关闭时由告警调度主节点在后台检测")
+    ALERT_SCHEDULER_ENABLED: bool = Field(True, description="是否启动告警后台调度(窗口检测与自动解决)")
+    ALERT_SCHEDULER_INTERVAL_SECONDS: int = Field(10, description="告警调度的执行周期(秒)")
+    ALERT_SCHEDULER_ROUND_SIZE: int = Field(50000, description="告警调度每轮(一个事务)最多检测的日志条数")
+    ALERT_SCHEDULER_COMMIT_LAG_SECONDS: int = Field(60, description="入库事务提交的最大延迟(秒)，检测水位只推进到可见超过该时长的日志ID")
+    ALERT_SCHEDULER_LOCK_NAME: str = Field("log_audit_alert_scheduler", description="多进程部署时告警调度主节点锁的名称")
+    ALERT_AUTO_RESOLVE_INTERVAL_SECONDS: int = Field(3600, description="自动解决过期告警的执行间隔(秒)")
+    ALERT_AUTO_RESOLVE_BATCH_SIZE: int = Field(1000, description="自动解决每批更新的告警数")
+    ALERT_REPLAY_CHUNK_SIZE: int = Field(10000, description="告警回放每次从数据库读取的日志条数")
+    OPEN_ALERT_INDEX_REFRESH_SECONDS: int = Field(60, description="未处理告警索引从数据库整表重新加载的间隔(秒)")
+    SUSPICIOUS_ACCESS_EXACT_MAX_IPS: int = Field(64, description="可疑访问检测中单个用户精确记录的最大 IP 数，超出后改用 HyperLogLog 估算")
+    SUSPICIOUS_ACCESS_SKETCH_PRECISION: int = Field(10, description="可疑访问检测 HyperLogLog 的精度(寄存器数为 2^precision)")
+    SUSPICIOUS_ACCESS_MAX_USERS: int = Field(1_000_000, description="可疑访问检测在内存中跟踪的最大用户数")
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -39,5 +39,5 @@ def get_current_user(authorization: str | None = Header(default=None)) -> Curren
 def get_current_admin(user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """简单的 admin 校验，供后续接口依赖。"""
     if user.role != "admin":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="权限不足")
     return user
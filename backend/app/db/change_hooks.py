@@ -0,0 +1,127 @@
+"""
+会话提交钩子 - Change Hooks
+
+进程内缓存(配置快照、告警规则集、未处理告警索引、入库水位)随本进程的提交同步更新：
+每个钩子在 flush 后从会话中收集相关改动，暂存在 session.info，提交后统一应用，回滚时丢弃。
+所有钩子共用一组全局 Session 事件(after_flush / after_commit / after_soft_rollback)
+
+version_hook 还在写入事务中递增 data_versions 表的版本号，其他进程比较版本号即可发现改动，
+不受 updated_at 秒级精度的限制
+"""
+import logging
+from typing import Any, Callable, Iterable, List, Sequence, Tuple, Type
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.config import DataVersion
+
+logger = logging.getLogger(__name__)
+
+
+class CommitHook:
+    """
+    一个进程内缓存的提交钩子
+
+    collect(session) 在每次 flush 后返回本次需要暂存的改动；提交后 apply(改动列表) 只调用一次
+    """
+
+    def __init__(
+            self,
+            name: str,
+            collect: Callable[[Session], Iterable[Any]],
+            apply: Callable[[List[Any]], None]
+    ):
+        self.name = name
+        self.collect = collect
+        self.apply = apply
+        self._key = f"commit_hook:{name}"
+
+    def stage(self, session: Session, items: Iterable[Any]) -> None:
+        """把改动暂存到会话，提交后交给 apply(不经过 ORM 对象的批量写入直接调用)"""
+        session.info.setdefault(self._key, []).extend(items)
+
+    def _pop(self, session: Session) -> List[Any]:
+        return session.info.pop(self._key, None) or []
+
+
+_hooks: List[CommitHook] = []
+
+
+def commit_hook(
+        name: str,
+        collect: Callable[[Session], Iterable[Any]],
+        apply: Callable[[List[Any]], None]
+) -> CommitHook:
+    """注册提交钩子(模块导入时调用，对所有会话生效)"""
+    hook = CommitHook(name, collect, apply)
+    _hooks.append(hook)
+    return hook
+
+
+def changed_instances(session: Session, models: Tuple[Type, ...]) -> List[Any]:
+    """本次 flush 新建、修改或删除的 models 实例"""
+    return [obj for obj in (*session.new, *session.dirty, *session.deleted) if isinstance(obj, models)]
+
+
+def version_hook(name: str, models: Sequence[Type], invalidate: Callable[[], None]) -> CommitHook:
+    """
+    models 有改动时，在同一事务中递增 data_versions[name]，提交后调用 invalidate
+
+    Args:
+        name: 版本名，与 data_version(name) 对应
+        models: 需要跟踪的 ORM 模型
+        invalidate: 使本进程缓存失效
+    """
+    models = tuple(models)
+
+    def collect(session: Session) -> Iterable[Any]:
+        if not changed_instances(session, models):
+            return ()
+        _bump_version(session, name)
+        return (True,)
+
+    return commit_hook(name, collect, lambda items: invalidate())
+
+
+def data_version(name: str):
+    """data_versions[name] 的标量子查询(没有该行时为 NULL)，用于缓存的变化检测"""
+    return select(DataVersion.version).where(DataVersion.name == name).scalar_subquery()
+
+
+def _bump_version(session: Session, name: str) -> None:
+    # flush 过程中不能再经过会话 flush，直接在当前事务的连接上执行
+    connection = session.connection()
+    result = connection.execute(
+        update(DataVersion).where(DataVersion.name == name).values(version=DataVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(DataVersion).values(name=name, version=1))
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    for hook in _hooks:
+        items = hook.collect(session)
+        if items:
+            hook.stage(session, items)
+
+
+def _after_commit(session: Session) -> None:
+    # 先取出全部暂存，某个钩子出错时不影响其他钩子，也不会遗留到下一次提交
+    pending = [(hook, hook._pop(session)) for hook in _hooks]
+    for hook, items in pending:
+        if items:
+            try:
+                hook.apply(items)
+            except Exception:  # noqa: BLE001
+                logger.exception("applying commit hook %s failed", hook.name)
+
+
+def _after_rollback(session: Session, previous_transaction) -> None:
+    for hook in _hooks:
+        hook._pop(session)
+
+
+event.listen(Session, "after_flush", _after_flush)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_soft_rollback", _after_rollback)
@@ -3,6 +3,12 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.services.alert_scheduler import start_alert_scheduler, stop_alert_scheduler
+from app.services.brute_force_detector import rebuild_brute_force_detector
+from app.services.ingest_buffer import start_ingest_buffer, stop_ingest_buffer
+from app.services.log_dedup import start_deduplicator
+from app.services.parallel_ingest import shutdown_parse_pool
+from app.services.suspicious_access_detector import rebuild_suspicious_access_detector
 
 
 def create_application() -> FastAPI:
@@ -22,6 +28,20 @@ def create_application() -> FastAPI:
         return {"status": "ok"}
 
     app.include_router(api_router, prefix=settings.API_V1_STR)
+
+    # 暴力破解/可疑访问检测器的内存窗口在启动时从数据库重建
+    app.add_event_handler("startup", rebuild_brute_force_detector)
+    app.add_event_handler("startup", rebuild_suspicious_access_detector)
+    # 告警后台调度: 窗口检测与自动解决，多 worker 时只有主节点执行
+    app.add_event_handler("startup", start_alert_scheduler)
+    app.add_event_handler("shutdown", stop_alert_scheduler)
+    # 异步写入缓冲: 启动时拉起后台写库线程，退出时先写完队列
+    app.add_event_handler("startup", start_ingest_buffer)
+    app.add_event_handler("shutdown", stop_ingest_buffer)
+    # 上传去重: 启动时在后台从指纹表重建布隆过滤器，不占用上传请求
+    app.add_event_handler("startup", start_deduplicator)
+    # 应用退出时回收日志解析进程池
+    app.add_event_handler("shutdown", shutdown_parse_pool)
     return app
 
 
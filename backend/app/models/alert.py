@@ -2,7 +2,7 @@
 告警模型 - Alerts Table ORM Definition
 负责人: 于凯程
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum as SQLEnum
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
@@ -65,7 +65,8 @@ class Alert(Base):
     # 关联信息
     related_ip = Column(String(50), index=True, comment="关联IP地址")
     related_user = Column(String(100), index=True, comment="关联用户")
-    related_log_ids = Column(Text, comment="关联日志ID列表(JSON格式)")
+    related_log_ids = Column(Text, comment="关联日志ID列表(逗号分隔，已停用，新告警的关联日志写入 alert_logs)")
+    rule_id = Column(Integer, index=True, comment="触发的自定义规则ID(仅 CUSTOM 告警)")
 
     # 告警统计信息
     trigger_count = Column(
@@ -106,3 +107,89 @@ class Alert(Base):
 
     def __repr__(self):
         return f"<Alert(id={self.id}, type={self.alert_type}, level={self.alert_level}, status={self.status})>"
+
+
+class AlertLogLink(Base):
+    """
+    告警-日志关联表模型
+
+    每条关联一行，主键 (alert_id, log_id)；告警重复触发时只追加新的日志，
+    不再整体重写逗号分隔的 related_log_ids
+    """
+    __tablename__ = "alert_logs"
+
+    alert_id = Column(Integer, primary_key=True, autoincrement=False, comment="告警ID")
+    log_id = Column(Integer, primary_key=True, autoincrement=False, index=True, comment="日志ID")
+
+    def __repr__(self):
+        return f"<AlertLogLink(alert_id={self.alert_id}, log_id={self.log_id})>"
+
+
+class AlertRule(Base):
+    """
+    自定义告警规则表模型
+
+    conditions 为字段条件列表(JSON，全部满足才计入)；在 window_minutes 分钟内按 group_by 分组，
+    匹配日志数(aggregate=count)或 distinct_field 的不同取值数(aggregate=distinct)达到 threshold 时
+    产生 CUSTOM 告警。规则在进程内编译后对每批入库日志求值，不查询 logs 表
+    """
+    __tablename__ = "alert_rules"
+
+    id = Column(Integer, primary_key=True, index=True, comment="规则ID")
+    name = Column(String(100), nullable=False, unique=True, comment="规则名称")
+    description = Column(Text, comment="规则说明")
+    enabled = Column(Boolean, nullable=False, default=True, index=True, comment="是否启用")
+    alert_level = Column(
+        SQLEnum(AlertLevel),
+        nullable=False,
+        default=AlertLevel.MEDIUM,
+        comment="产生告警的级别"
+    )
+
+    # 规则定义
+    conditions = Column(Text, nullable=False, comment="字段条件列表(JSON)")
+    group_by = Column(String(20), comment="分组字段(source/level/event_type/ip/user_name，空表示不分组)")
+    aggregate = Column(String(20), nullable=False, default="count", comment="聚合方式(count/distinct)")
+    distinct_field = Column(String(20), comment="aggregate=distinct 时统计不同取值的字段")
+    threshold = Column(Integer, nullable=False, default=1, comment="触发阈值")
+    window_minutes = Column(Integer, nullable=False, default=5, comment="时间窗口(分钟)")
+
+    created_by = Column(Integer, comment="创建人用户ID")
+    created_at = Column(
+        DateTime,
+        nullable=False,
+        default=func.now(),
+        comment="创建时间"
+    )
+    updated_at = Column(
+        DateTime,
+        default=func.now(),
+        onupdate=func.now(),
+        comment="更新时间"
+    )
+
+    def __repr__(self):
+        return f"<AlertRule(id={self.id}, name={self.name}, enabled={self.enabled})>"
+
+
+class AlertSchedulerState(Base):
+    """
+    告警调度状态表模型
+
+    保存主节点的检测水位(JSON)，主节点切换后新主节点从该水位继续检测，
+    不遗漏切换期间入库的日志，也不重复检测已检测过的日志
+    """
+    __tablename__ = "alert_scheduler_state"
+
+    name = Column(String(100), primary_key=True, comment="状态名")
+    value = Column(Text, nullable=False, comment="状态值(JSON)")
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=func.now(),
+        onupdate=func.now(),
+        comment="更新时间"
+    )
+
+    def __repr__(self):
+        return f"<AlertSchedulerState(name={self.name})>"
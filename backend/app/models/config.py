@@ -2,7 +2,7 @@
 系统配置模型 - System Config Table ORM Definition
 负责人: 于凯程
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, Text, Boolean
 from sqlalchemy.sql import func
 from datetime import datetime
 
@@ -90,6 +90,22 @@ class SystemConfig(Base):
         return f"<SystemConfig(key={self.config_key}, value={self.config_value})>"
 
 
+class DataVersion(Base):
+    """
+    数据版本表模型
+
+    每行是一类缓存数据(如 system_configs、alert_rules)的版本号，写入该类数据的事务同时递增版本号，
+    各进程比较版本号即可发现其他进程提交的改动(见 app.db.change_hooks)
+    """
+    __tablename__ = "data_versions"
+
+    name = Column(String(64), primary_key=True, comment="数据名(表名)")
+    version = Column(BigInteger, nullable=False, default=0, comment="版本号，每次写入事务递增")
+
+    def __repr__(self):
+        return f"<DataVersion(name={self.name}, version={self.version})>"
+
+
 # 预定义的配置键常量
 class ConfigKeys:
     """系统配置键常量"""
@@ -102,6 +118,8 @@ class ConfigKeys:
     ALERT_BRUTE_FORCE_THRESHOLD = "alert_brute_force_threshold"  # 暴力破解阈值(次数)
     ALERT_BRUTE_FORCE_WINDOW = "alert_brute_force_window_minutes"  # 暴力破解检测时间窗口(分钟)
     ALERT_ERROR_LOG_ENABLED = "alert_error_log_enabled"  # 是否启用ERROR日志告警
+    ALERT_SUSPICIOUS_IP_THRESHOLD = "alert_suspicious_ip_threshold"  # 可疑访问阈值(不同IP数超过该值告警)
+    ALERT_SUSPICIOUS_WINDOW = "alert_suspicious_window_minutes"  # 可疑访问检测时间窗口(分钟)
     ALERT_AUTO_RESOLVE_DAYS = "alert_auto_resolve_days"  # 告警自动解决天数
 
     # 安全相关
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, String, Text, DateTime, Enum, Index
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.db.base import Base
+from app.utils.fulltext import sqlite_fulltext
+from app.utils.raw_codec import decompress_raw_data, encode_raw_data
 import enum
 
 # =========================
@@ -59,6 +62,19 @@ class LogParseStatusEnum(enum.Enum):
     OK = "ok"
     FAILED = "failed"
 
+# =========================
+# 日志事件类型的枚举类型
+# =========================
+
+class LogEventTypeEnum(enum.Enum):
+    """
+    日志事件类型枚举，入库时由 message 分类得到(见 app.utils.event_classifier)
+    例如：LOGIN_FAILED（登录失败）、LOGIN_SUCCESS（登录成功）、OTHER（其他）
+    """
+    LOGIN_FAILED = "LOGIN_FAILED"
+    LOGIN_SUCCESS = "LOGIN_SUCCESS"
+    OTHER = "OTHER"
+
 # =========================
 # 日志模型
 # =========================
@@ -90,8 +106,18 @@ class Log(Base):
     # 日志内容，简要描述日志信息
     message = Column(String(1024), nullable=False)
 
+    # 事件类型，入库时由 message 分类写入；为空表示历史行尚未回填
+    event_type = Column(Enum(LogEventTypeEnum), nullable=True)
+
     # 原始日志数据，保存日志的完整原始文本，便于回溯与解析
-    raw_data = Column(Text, nullable=True)
+    # 只在详情与导出时读取，延迟加载；对外通过 raw_data 属性访问(见下方)
+    _raw_data = deferred(Column("raw_data", Text, nullable=True))
+
+    # 压缩存储的原始日志(开启 LOG_RAW_DATA_COMPRESSION 时写入，此时 raw_data 为空)，延迟加载
+    raw_data_z = deferred(Column(LargeBinary, nullable=True))
+
+    # 压缩前的原始日志字节数，用于统计节省的空间
+    raw_data_size = deferred(Column(Integer, nullable=True))
 
     # 日志接入方式，使用 ENUM 类型，取值参见 LogIngestTypeEnum，默认是文件上传
     ingest_type = Column(Enum(LogIngestTypeEnum), nullable=False, default=LogIngestTypeEnum.FILE)
@@ -116,10 +142,56 @@ class Log(Base):
         Index("idx_logs_user_name", "user_name"),
         # 组合索引：按时间、来源和级别组合查询
         Index("idx_logs_timestamp_source_level", "timestamp", "source", "level"),
+        # 组合索引：按事件类型与时间查询(登录失败/成功检测与统计)
+        Index("idx_logs_event_type_timestamp", "event_type", "timestamp"),
+        # 全文索引(MySQL ngram)：message 关键字检索，见 app.utils.fulltext
+        Index("ft_logs_message", "message", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
     )
 
+    @property
+    def raw_data(self):
+        """原始日志文本，压缩存储的行在首次访问时才加载并解压"""
+        if self.raw_data_z is not None:
+            return decompress_raw_data(self.raw_data_z)
+        return self._raw_data
+
+    @raw_data.setter
+    def raw_data(self, value):
+        # 按当前配置决定原文或压缩存储；来源需先于 raw_data 赋值才能使用来源字典
+        for key, stored in encode_raw_data(value, self.source).items():
+            setattr(self, key, stored)
+
     def __repr__(self):
         """
         日志对象的字符串表示，便于调试时查看
         """
         return f"<Log id={self.id}, source={self.source}, level={self.level}, timestamp={self.timestamp}>"
+
+
+# SQLite 下以 FTS5 trigram 表代替 message 的全文索引
+sqlite_fulltext(Log.__table__, "message")
+
+
+# =========================
+# 日志指纹模型
+# =========================
+
+class LogFingerprint(Base):
+    """
+    日志指纹表 `log_fingerprints`，保存已入库日志 (source, timestamp, raw_data) 的 64 位哈希，
+    供上传去重时确认布隆过滤器的命中
+    """
+    __tablename__ = "log_fingerprints"
+    __table_args__ = (
+        # 按写入时间清理超出去重窗口的指纹
+        Index("idx_log_fingerprints_created_at", "created_at"),
+    )
+
+    # 64 位指纹(有符号)，主键即唯一索引
+    fingerprint = Column(BigInteger, primary_key=True, autoincrement=False)
+
+    # 写入时间
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<LogFingerprint fingerprint={self.fingerprint}>"
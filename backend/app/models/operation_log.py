@@ -2,11 +2,12 @@
 操作日志模型 - Operation Log Table ORM Definition
 负责人: 于凯程
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Index, Integer, String, DateTime, Text
 from sqlalchemy.sql import func
 from datetime import datetime
 
 from app.db.base import Base
+from app.utils.fulltext import sqlite_fulltext
 
 
 class OperationLog(Base):
@@ -68,5 +69,16 @@ class OperationLog(Base):
     # 额外数据(JSON格式)
     extra_data = Column(Text, comment="额外数据(JSON格式)")
 
+    __table_args__ = (
+        # 全文索引(MySQL ngram)：detail 关键字检索与 username 模糊搜索，见 app.utils.fulltext
+        Index("ft_operation_log_detail", "detail", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        Index("ft_operation_log_username", "username", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
     def __repr__(self):
         return f"<OperationLog(id={self.id}, user={self.username}, action={self.action})>"
+
+
+# SQLite 下以 FTS5 trigram 表代替全文索引
+sqlite_fulltext(OperationLog.__table__, "detail")
+sqlite_fulltext(OperationLog.__table__, "username")
@@ -2,10 +2,13 @@
 告警 Pydantic Schemas
 负责人: 于凯程
 """
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Optional, List
 from datetime import datetime
 from enum import Enum
+import json
+
+from app.schemas.log import LogListItem
 
 
 # 枚举定义(与models保持一致)
@@ -71,6 +74,7 @@ class AlertRead(AlertBase):
     id: int
     status: AlertStatus
     trigger_count: int
+    rule_id: Optional[int] = None
     handler_user_id: Optional[int] = None
     handler_note: Optional[str] = None
     handled_at: Optional[datetime] = None
@@ -119,3 +123,117 @@ class AlertStats(BaseModel):
     ignored: int
     by_level: dict  # {level: count}
     by_type: dict  # {type: count}
+
+
+class AlertLogPage(BaseModel):
+    """告警关联日志分页(按日志ID升序键集分页)"""
+    alert_id: int
+    total: Optional[int] = Field(None, description="关联日志总数，只在首页(after_id=0)返回")
+    limit: int
+    next_after_id: Optional[int] = Field(None, description="下一页的 after_id，没有下一页时为空")
+    results: List[LogListItem]
+
+
+# 告警回放
+class AlertReplayRequest(BaseModel):
+    """
+    告警回放请求
+
+    阈值/窗口为空时使用当前系统配置，回放不写入 alerts 表
+    """
+    start_time: datetime
+    end_time: datetime
+    brute_force_threshold: Optional[int] = Field(None, ge=1, description="暴力破解阈值(次数)")
+    brute_force_window_minutes: Optional[int] = Field(None, ge=1, description="暴力破解时间窗口(分钟)")
+    suspicious_ip_threshold: Optional[int] = Field(None, ge=1, description="可疑访问阈值(不同IP数)")
+    suspicious_window_minutes: Optional[int] = Field(None, ge=1, description="可疑访问时间窗口(分钟)")
+    error_log_enabled: Optional[bool] = Field(None, description="是否回放ERROR日志告警")
+    max_alerts: int = Field(1000, ge=0, le=10000, description="结果中最多返回的告警明细条数")
+
+
+class ReplayedAlert(BaseModel):
+    """回放中会产生的告警"""
+    alert_type: AlertType
+    alert_level: AlertLevel
+    title: str
+    related_ip: Optional[str] = None
+    related_user: Optional[str] = None
+    trigger_count: int = 1
+    first_fired_at: datetime
+    last_fired_at: datetime
+
+
+class AlertReplayResult(BaseModel):
+    """告警回放结果"""
+    start_time: datetime
+    end_time: datetime
+    scanned: int = Field(0, description="读取的日志条数(只读取可能触发规则的日志)")
+    elapsed_ms: float = 0.0
+    settings: dict = Field(default_factory=dict, description="回放使用的阈值与窗口")
+    by_type: dict = Field(default_factory=dict, description="{告警类型: {alerts: 新告警数, triggers: 触发次数}}")
+    alerts: List[ReplayedAlert] = Field(default_factory=list)
+    alerts_truncated: bool = False
+
+
+# 自定义告警规则
+class AlertRuleCondition(BaseModel):
+    """
+    规则字段条件
+
+    op: eq/ne/in/not_in/contains/startswith/endswith/regex/cidr/exists；
+    in/not_in 的 value 为列表，exists 的 value 为布尔值，cidr 只用于 ip 字段
+    """
+    field: str = Field(..., description="字段(source/level/event_type/ip/user_name/message)")
+    op: str = Field("eq", description="比较方式")
+    value: Any = None
+    ignore_case: bool = Field(False, description="字符串比较是否忽略大小写")
+
+
+class AlertRuleBase(BaseModel):
+    """告警规则基础模型"""
+    name: str = Field(..., max_length=100)
+    description: Optional[str] = None
+    enabled: bool = True
+    alert_level: AlertLevel = AlertLevel.MEDIUM
+    conditions: List[AlertRuleCondition] = Field(default_factory=list, description="全部满足才计入")
+    group_by: Optional[str] = Field(None, description="分组字段(source/level/event_type/ip/user_name)")
+    aggregate: str = Field("count", description="聚合方式(count/distinct)")
+    distinct_field: Optional[str] = Field(None, description="aggregate=distinct 时统计不同取值的字段")
+    threshold: int = Field(1, ge=1, description="触发阈值")
+    window_minutes: int = Field(5, ge=1, le=1440, description="时间窗口(分钟)")
+
+
+class AlertRuleCreate(AlertRuleBase):
+    """创建告警规则的请求模型"""
+    pass
+
+
+class AlertRuleUpdate(BaseModel):
+    """更新告警规则的请求模型"""
+    name: Optional[str] = Field(None, max_length=100)
+    description: Optional[str] = None
+    enabled: Optional[bool] = None
+    alert_level: Optional[AlertLevel] = None
+    conditions: Optional[List[AlertRuleCondition]] = None
+    group_by: Optional[str] = None
+    aggregate: Optional[str] = None
+    distinct_field: Optional[str] = None
+    threshold: Optional[int] = Field(None, ge=1)
+    window_minutes: Optional[int] = Field(None, ge=1, le=1440)
+
+
+class AlertRuleRead(AlertRuleBase):
+    """返回告警规则的响应模型"""
+    id: int
+    created_by: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    @field_validator("conditions", mode="before")
+    @classmethod
+    def _load_conditions(cls, value):
+        # ORM 中以 JSON 文本存储
+        return json.loads(value) if isinstance(value, str) else value
+
+    class Config:
+        from_attributes = True
@@ -55,6 +55,18 @@ class LogParseStatusEnum(str, Enum):
     OK = "ok"
     FAILED = "failed"
 
+# =========================
+# 日志事件类型的枚举类型
+# =========================
+
+class LogEventTypeEnum(str, Enum):
+    """
+    日志事件类型枚举，由服务端在入库时分类写入
+    """
+    LOGIN_FAILED = "LOGIN_FAILED"
+    LOGIN_SUCCESS = "LOGIN_SUCCESS"
+    OTHER = "OTHER"
+
 # =========================
 # 日志基础模型
 # =========================
@@ -90,10 +102,32 @@ class LogRead(LogBase):
     返回给前端的日志详情模型，包含数据库自动生成的字段
     """
     id: int
+    event_type: Optional[LogEventTypeEnum] = Field(None, description="事件类型，历史行回填前为空")
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# =========================
+# 日志列表项（不含原始日志）
+# =========================
+
+class LogListItem(BaseModel):
+    """
+    日志列表项，不含 raw_data，列表查询不加载原始日志列
+    """
+    id: int
+    source: LogSourceEnum
+    level: LogLevelEnum
+    timestamp: datetime
+    ip: Optional[str] = None
+    user_name: Optional[str] = None
+    message: str
+    event_type: Optional[LogEventTypeEnum] = None
     created_at: datetime
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 # =========================
 # 日志分页查询结果模型
@@ -102,11 +136,17 @@ class LogRead(LogBase):
 class LogSearchResults(BaseModel):
     """
     日志分页查询结果模型，包含分页信息和日志列表
+
+    page 为空表示本页由游标取得；next_cursor / prev_cursor 为空表示没有下一页/上一页；
+    total_exact 为 False 时 total 为估算值
     """
     total: int
-    page: int
+    total_exact: bool = True
+    page: Optional[int] = None
     page_size: int
-    results: List[LogRead]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    results: List[LogListItem]
 
 # =========================
 # 日志查询过滤条件模型
@@ -122,8 +162,47 @@ class LogFilter(BaseModel):
     source: Optional[LogSourceEnum] = Field(None, description="日志来源的过滤")
     keyword: Optional[str] = Field(None, description="日志内容的关键字搜索")
     ip: Optional[str] = Field(None, description="按 IP 地址过滤")
+    event_type: Optional[LogEventTypeEnum] = Field(None, description="事件类型的过滤")
     ingest_type: Optional[LogIngestTypeEnum] = Field(None, description="日志接入方式的过滤")
     parse_status: Optional[LogParseStatusEnum] = Field(None, description="日志解析状态的过滤")
-    page: int = Field(1, description="当前页，默认第 1 页")
-    page_size: int = Field(20, description="每页返回的日志条数，默认 20 条")
+    page: int = Field(1, ge=1, description="当前页，默认第 1 页(仅浅页可用，深页请使用 cursor)")
+    page_size: int = Field(20, ge=1, le=200, description="每页返回的日志条数，默认 20 条")
+    cursor: Optional[str] = Field(None, description="分页游标，传入时忽略 page")
+
+# =========================
+# 日志文件上传结果模型
+# =========================
+
+class LogUploadResult(BaseModel):
+    """
+    日志文件上传入库结果，inserted 为解析成功并写入的条数，failed 为解析失败的行数，
+    duplicates 为开启去重时因已入库而丢弃的条数；压缩文件读取中途出错时
+    truncated 为 true，统计为出错前已入库的部分
+    """
+    inserted: int = Field(0, description="成功入库的日志条数")
+    failed: int = Field(0, description="解析失败的行数")
+    duplicates: int = Field(0, description="重复而未入库的日志条数")
+    truncated: bool = Field(False, description="压缩文件是否读取中断(此前的批次已入库)")
+    error: Optional[str] = Field(None, description="读取中断原因: corrupt/too_large")
+
+# =========================
+# API 批量写入结果模型
+# =========================
+
+class LogBatchError(BaseModel):
+    """
+    批量写入中单条记录的错误，line 为 NDJSON 行号或 JSON 数组下标(从 1 开始)
+    """
+    line: int
+    error: str
+
 
+class LogBatchResult(BaseModel):
+    """
+    批量写入结果，errors 最多返回 INGEST_MAX_REPORTED_ERRORS 条，超出时 errors_truncated 为 True
+    """
+    inserted: int = Field(0, description="成功入库的日志条数")
+    failed: int = Field(0, description="校验或解析失败的记录数")
+    errors: List[LogBatchError] = Field(default_factory=list, description="失败记录明细")
+    errors_truncated: bool = Field(False, description="错误明细是否被截断")
+    queued: bool = Field(False, description="为 True 时 inserted 表示已进入异步写入队列的条数")
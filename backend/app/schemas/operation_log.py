@@ -0,0 +1,43 @@
+"""
+操作日志 Pydantic Schemas
+负责人: 于凯程
+"""
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class OperationLogRead(BaseModel):
+    """操作日志响应模型"""
+    id: int
+    user_id: int
+    username: str
+    action: str
+    resource_type: Optional[str] = None
+    resource_id: Optional[str] = None
+    detail: str
+    result: str
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    request_url: Optional[str] = None
+    request_method: Optional[str] = None
+    created_at: datetime
+    extra_data: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class OperationLogListItem(BaseModel):
+    """操作日志列表项(精简版)"""
+    id: int
+    username: str
+    action: str
+    detail: str
+    result: str
+    ip_address: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
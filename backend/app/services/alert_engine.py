@@ -5,14 +5,51 @@
 实现各类告警规则的检测和触发逻辑
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, NamedTuple, Sequence, Set, Tuple, Union
 import json
+import logging
 
+from app.core.config import settings
 from app.models.alert import Alert, AlertType, AlertLevel, AlertStatus
-from app.models.log import Log
-from app.models.config import SystemConfig, ConfigKeys
+from app.models.log import Log, LogEventTypeEnum, LogLevelEnum, LogSourceEnum
+from app.models.config import ConfigKeys
+from app.services.alert_log_links import link_alert_logs
+from app.services.config_service import get_config_snapshot
+from app.services.open_alert_index import open_alert_index
+from app.services.brute_force_detector import brute_force_detector, is_login_failure
+from app.services.rule_engine import RuleHits, get_rule_set
+from app.services.suspicious_access_detector import SuspiciousHit, suspicious_access_detector
+from app.utils.event_classifier import event_type_of
+
+logger = logging.getLogger(__name__)
+
+
+class LogEvent(NamedTuple):
+    """
+    告警检测所需的日志字段
+
+    批量入库时无需为每行构造 ORM 对象，check_batch 同时接受 Log 对象和 LogEvent
+    """
+    id: int
+    source: LogSourceEnum
+    level: LogLevelEnum
+    timestamp: datetime
+    ip: Optional[str]
+    user_name: Optional[str]
+    message: str
+    event_type: Optional[LogEventTypeEnum] = None
+
+
+def log_events_from_rows(rows: Sequence[dict], ids: Sequence[int]) -> List[LogEvent]:
+    """由 bulk_insert_logs 写入的行字典及其 ID 构造 LogEvent 列表"""
+    return [
+        LogEvent(
+            log_id, row["source"], row["level"], row["timestamp"], row["ip"], row["user_name"], row["message"],
+            row.get("event_type"),
+        )
+        for row, log_id in zip(rows, ids)
+    ]
 
 
 class AlertEngine:
@@ -20,6 +57,8 @@ class AlertEngine:
 
     def __init__(self, db: Session):
         self.db = db
+        # 待写入 alert_logs 的 (告警或告警ID, 日志ID列表)，新告警 flush 后才有 ID
+        self._links: List[Tuple[Union[Alert, int], Sequence[int]]] = []
 
     def check_all_rules(self, log_id: Optional[int] = None) -> List[Alert]:
         """
@@ -31,119 +70,262 @@ class AlertEngine:
         Returns:
             生成的告警列表
         """
-        alerts = []
+        if log_id is None:
+            return []
+
+        # 只加载一次日志，各规则共用
+        log = self.db.query(Log).filter(Log.id == log_id).first()
+        if not log:
+            return []
+        return self.check_batch([log])
+
+    def check_batch(
+        self, logs: Sequence[Union[Log, LogEvent]], now: Optional[datetime] = None, commit: bool = True
+    ) -> List[Alert]:
+        """
+        对一批已入库的日志执行所有告警规则
+
+        每条规则对整批只执行一次: 暴力破解按 IP 汇总本批的触发结果，
+        已存在的未处理告警用一次查询取回，新建与更新的告警一次提交
+
+        Args:
+            logs: 已写入数据库(带 ID)的日志
+            now: 时间窗口终点，默认当前时间
+            commit: 是否提交；为 False 时只 flush，由调用方与其他写入一起提交
+
+        Returns:
+            新创建的告警列表
+        """
+        if not logs:
+            return []
+        now = now or datetime.now()
+        batch_ids = {log.id for log in logs}
 
         # 规则1: 暴力破解检测
-        brute_force_alerts = self.check_brute_force_attack(log_id)
-        alerts.extend(brute_force_alerts)
+        self.sync_brute_force_config()
+        hits: Dict[str, List] = {}
+        for log in logs:
+            if is_login_failure(log):
+                hit = brute_force_detector.observe(log.ip, log.timestamp, log.id, now)
+                if hit is not None:
+                    # IP -> [本批触发次数, 最近一次的窗口内失败次数, 窗口内日志ID]
+                    fired = hits.get(log.ip)
+                    hits[log.ip] = [fired[0] + 1 if fired else 1, hit[0], hit[1]]
+        alerts = self._apply_brute_force_hits(hits, now, batch_ids)
 
         # 规则2: ERROR日志告警
-        if log_id:
-            error_alert = self.check_error_log(log_id)
-            if error_alert:
-                alerts.append(error_alert)
+        if self._get_config_bool(ConfigKeys.ALERT_ERROR_LOG_ENABLED, default=True):
+            for log in logs:
+                if log.level == LogLevelEnum.ERROR:
+                    alert = self._build_error_alert(log)
+                    self.db.add(alert)
+                    self._links.append((alert, [log.id]))
+                    alerts.append(alert)
+
+        # 规则3: 可疑访问检测(同一用户窗口内从多个不同IP登录成功)
+        self.sync_suspicious_access_config()
+        suspicious_hits: Dict[str, SuspiciousHit] = {}
+        for log in logs:
+            if log.user_name and log.ip and event_type_of(log) == LogEventTypeEnum.LOGIN_SUCCESS:
+                hit = suspicious_access_detector.observe(log.user_name, log.ip, log.timestamp, now)
+                if hit is not None:
+                    suspicious_hits[log.user_name] = hit
+        alerts.extend(self._apply_suspicious_access_hits(suspicious_hits, now))
+
+        # 规则4: 自定义规则(alert_rules 表，编译后在内存中求值)；
+        # 规则表不可读时只跳过自定义规则，前三类告警照常提交
+        try:
+            rule_set = get_rule_set(self.db)
+        except Exception:  # noqa: BLE001
+            logger.exception("loading custom alert rules failed, custom rules skipped for this batch")
+        else:
+            alerts.extend(self._apply_custom_rule_hits(rule_set.evaluate(logs, now), rule_set, now, batch_ids))
+
+        self._commit(commit)
+        return alerts
 
-        # 规则3: 可疑访问检测(可扩展)
-        # suspicious_alerts = self.check_suspicious_access()
-        # alerts.extend(suspicious_alerts)
+    def replay(self, request) -> dict:
+        """
+        用历史日志回放暴力破解/ERROR日志/可疑访问规则(模拟时钟，不写入 alerts 表)
 
-        return alerts
+        Args:
+            request: AlertReplayRequest，阈值为空时使用当前配置
+
+        Returns:
+            与 AlertReplayResult 对应的字典
+        """
+        from app.services.alert_replay import replay_alerts
+        return replay_alerts(self.db, request)
 
-    def check_brute_force_attack(self, log_id: Optional[int] = None) -> List[Alert]:
+    def check_brute_force_attack(self, log_id: Optional[int] = None, now: Optional[datetime] = None) -> List[Alert]:
         """
         检测暴力破解攻击
 
         规则: 在N分钟内，来自同一IP的登录失败次数超过阈值
 
+        由内存滑动窗口(brute_force_detector)增量判定: 只有登录失败日志会更新窗口，
+        每条日志的判定为 O(1)，不再扫描 logs 表
+
         Args:
             log_id: 新插入的日志ID
+            now: 窗口终点，默认当前时间
 
         Returns:
             告警列表
         """
-        alerts = []
+        if log_id is None:
+            return []
 
-        # 获取配置参数
-        threshold = self._get_config_int(
-            ConfigKeys.ALERT_BRUTE_FORCE_THRESHOLD,
-            default=5
-        )
-        window_minutes = self._get_config_int(
-            ConfigKeys.ALERT_BRUTE_FORCE_WINDOW,
-            default=5
-        )
+        log = self.db.query(Log).filter(Log.id == log_id).first()
+        if not log or not is_login_failure(log):
+            return []
+
+        self.sync_brute_force_config()
+        now = now or datetime.now()
+        hit = brute_force_detector.observe(log.ip, log.timestamp, log.id, now)
+        if hit is None:
+            return []
 
-        # 计算时间窗口
-        time_threshold = datetime.now() - timedelta(minutes=window_minutes)
-
-        # 查询登录失败的日志，按IP分组统计
-        # 假设登录失败日志的message包含"login failed"或"authentication failed"
-        failed_login_query = self.db.query(
-            Log.ip,
-            func.count(Log.id).label('fail_count'),
-            func.group_concat(Log.id).label('log_ids')
-        ).filter(
-            and_(
-                Log.timestamp >= time_threshold,
-                Log.level == "ERROR",
-                Log.message.like('%login%failed%') | Log.message.like('%authentication%failed%')
+        alerts = self._apply_brute_force_hits({log.ip: [1, hit[0], hit[1]]}, now, {log.id})
+        self._commit()
+        return alerts
+
+    def sync_brute_force_config(self, force: bool = False) -> None:
+        """配置快照更新后把阈值/窗口同步到检测器"""
+        snapshot = get_config_snapshot(self.db)
+        if force or brute_force_detector.config_outdated(snapshot):
+            previous_window = brute_force_detector.configure(
+                snapshot.get_int(ConfigKeys.ALERT_BRUTE_FORCE_THRESHOLD, default=5),
+                snapshot.get_int(ConfigKeys.ALERT_BRUTE_FORCE_WINDOW, default=5),
+                source=snapshot,
             )
-        ).group_by(Log.ip).having(
-            func.count(Log.id) >= threshold
-        )
+            if previous_window is not None:
+                # 窗口变大: 补载原窗口之外、新窗口之内的登录失败
+                brute_force_detector.backfill(self.db, previous_window)
+
+    def _commit(self, commit: bool = True) -> None:
+        """写入待处理的告警关联日志并提交(commit 为 False 时只 flush)"""
+        if self._links:
+            # 新建告警先 flush 取得 ID
+            self.db.flush()
+            link_alert_logs(self.db, [
+                (target.id if isinstance(target, Alert) else target, log_ids) for target, log_ids in self._links
+            ])
+            self._links = []
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+
+    def _link_hit(self, alert_id: int, log_ids: Sequence[int], batch_ids: Set[int]) -> None:
+        """已有告警重复触发: 只追加本批新增的日志"""
+        new_ids = [log_id for log_id in log_ids if log_id in batch_ids]
+        if new_ids:
+            self._links.append((alert_id, new_ids))
+
+    def _apply_brute_force_hits(self, hits: Dict[str, List], now: datetime, batch_ids: Set[int]) -> List[Alert]:
+        """
+        按 IP 创建或更新暴力破解告警(不提交)
+
+        Args:
+            hits: IP -> [触发次数, 窗口内失败次数, 窗口内日志ID]
+            now: 时间窗口终点
+            batch_ids: 本批日志ID，重复触发时只关联其中的日志
+
+        Returns:
+            新创建的告警列表
+        """
+        if not hits:
+            return []
+
+        threshold = brute_force_detector.threshold
+        window_minutes = brute_force_detector.window_minutes
+        time_threshold = now - brute_force_detector.window
+
+        alerts = []
+        for ip, (fired, fail_count, log_ids) in hits.items():
+            description = (
+                f"检测到来自IP {ip} 的暴力破解尝试，"
+                f"在过去{window_minutes}分钟内登录失败{fail_count}次"
+            )
+            # 已存在未处理告警时原子累加触发次数
+            alert_id = open_alert_index.lookup(self.db, (AlertType.BRUTE_FORCE, ip), time_threshold)
+            if alert_id is not None and open_alert_index.increment(self.db, alert_id, fired, description=description):
+                self._link_hit(alert_id, log_ids, batch_ids)
+                continue
+
+            # 创建新告警(本批内的后续触发计入 trigger_count)
+            alert = Alert(
+                alert_type=AlertType.BRUTE_FORCE,
+                alert_level=AlertLevel.HIGH if fail_count >= threshold * 2 else AlertLevel.MEDIUM,
+                title=f"检测到暴力破解攻击 - IP: {ip}",
+                description=description,
+                related_ip=ip,
+                trigger_count=fired,
+                status=AlertStatus.UNHANDLED,
+                extra_data=json.dumps({
+                    "fail_count": fail_count,
+                    "time_window_minutes": window_minutes,
+                    "threshold": threshold
+                })
+            )
+            self.db.add(alert)
+            self._links.append((alert, log_ids))
+            alerts.append(alert)
+        return alerts
+
+    def _apply_custom_rule_hits(self, hits: RuleHits, rule_set, now: datetime, batch_ids: Set[int]) -> List[Alert]:
+        """
+        按 (规则, 分组值) 创建或更新 CUSTOM 告警(不提交)
+
+        Args:
+            hits: (规则ID, 分组值) -> [触发次数, 窗口内计数, 窗口内日志ID, 最近一次触发的日志]
+            rule_set: 产生 hits 的规则集
+            now: 时间窗口终点
+            batch_ids: 本批日志ID，重复触发时只关联其中的日志
 
-        failed_attempts = failed_login_query.all()
-
-        for attempt in failed_attempts:
-            ip = attempt.ip
-            fail_count = attempt.fail_count
-            log_ids = attempt.log_ids
-
-            # 检查是否已存在未处理的同类告警
-            existing_alert = self.db.query(Alert).filter(
-                and_(
-                    Alert.alert_type == AlertType.BRUTE_FORCE,
-                    Alert.related_ip == ip,
-                    Alert.status.in_([AlertStatus.UNHANDLED, AlertStatus.HANDLING]),
-                    Alert.created_at >= time_threshold
-                )
-            ).first()
-
-            if existing_alert:
-                # 更新已存在的告警
-                existing_alert.trigger_count += 1
-                existing_alert.description = (
-                    f"检测到来自IP {ip} 的暴力破解尝试，"
-                    f"在过去{window_minutes}分钟内登录失败{fail_count}次，"
-                    f"已累计触发{existing_alert.trigger_count}次"
-                )
-                existing_alert.related_log_ids = log_ids
-                existing_alert.updated_at = datetime.now()
-                self.db.commit()
-            else:
-                # 创建新告警
-                alert = Alert(
-                    alert_type=AlertType.BRUTE_FORCE,
-                    alert_level=AlertLevel.HIGH if fail_count >= threshold * 2 else AlertLevel.MEDIUM,
-                    title=f"检测到暴力破解攻击 - IP: {ip}",
-                    description=(
-                        f"检测到来自IP {ip} 的暴力破解尝试，"
-                        f"在过去{window_minutes}分钟内登录失败{fail_count}次"
-                    ),
-                    related_ip=ip,
-                    related_log_ids=log_ids,
-                    status=AlertStatus.UNHANDLED,
-                    extra_data=json.dumps({
-                        "fail_count": fail_count,
-                        "time_window_minutes": window_minutes,
-                        "threshold": threshold
-                    })
-                )
-                self.db.add(alert)
-                self.db.commit()
-                self.db.refresh(alert)
-                alerts.append(alert)
+        Returns:
+            新创建的告警列表
+        """
+        if not hits:
+            return []
 
+        alerts = []
+        for (rule_id, group), (fired, count, log_ids, log) in hits.items():
+            rule = rule_set.by_id[rule_id]
+            measure = f"{rule.distinct_field}不同取值{count}个" if rule.aggregate == "distinct" else f"匹配日志{count}条"
+            scope = f"{rule.group_by}={group} " if rule.group_by else ""
+            description = f"自定义规则「{rule.name}」: {scope}在过去{rule.window_minutes}分钟内{measure}"
+            alert_id = open_alert_index.lookup(
+                self.db, (AlertType.CUSTOM, (rule_id, group)), now - timedelta(minutes=rule.window_minutes)
+            )
+            if alert_id is not None and open_alert_index.increment(self.db, alert_id, fired, description=description):
+                self._link_hit(alert_id, log_ids, batch_ids)
+                continue
+
+            alert = Alert(
+                alert_type=AlertType.CUSTOM,
+                alert_level=AlertLevel(rule.alert_level),
+                title=f"自定义规则告警 - {rule.name}" + (f" - {group}" if rule.group_by else ""),
+                description=description,
+                related_ip=group if rule.group_by == "ip" else log.ip,
+                related_user=group if rule.group_by == "user_name" else log.user_name,
+                rule_id=rule_id,
+                trigger_count=fired,
+                status=AlertStatus.UNHANDLED,
+                extra_data=json.dumps({
+                    "rule_name": rule.name,
+                    "group_by": rule.group_by,
+                    "group": group,
+                    "aggregate": rule.aggregate,
+                    "count": count,
+                    "threshold": rule.threshold,
+                    "time_window_minutes": rule.window_minutes
+                }, ensure_ascii=False)
+            )
+            self.db.add(alert)
+            self._links.append((alert, log_ids))
+            alerts.append(alert)
         return alerts
 
     def check_error_log(self, log_id: int) -> Optional[Alert]:
@@ -169,123 +351,125 @@ class AlertEngine:
 
         # 获取日志记录
         log = self.db.query(Log).filter(Log.id == log_id).first()
-        if not log or log.level != "ERROR":
+        if not log or log.level != LogLevelEnum.ERROR:
             return None
 
-        # 创建告警
-        alert = Alert(
+        alert = self._build_error_alert(log)
+        self.db.add(alert)
+        self._links.append((alert, [log.id]))
+        self._commit()
+        self.db.refresh(alert)
+
+        return alert
+
+    @staticmethod
+    def _build_error_alert(log: Union[Log, LogEvent]) -> Alert:
+        """由 ERROR 日志构造告警(不写库)"""
+        return Alert(
             alert_type=AlertType.ERROR_LOG,
             alert_level=AlertLevel.MEDIUM,
-            title=f"ERROR日志告警 - {log.source}",
+            title=f"ERROR日志告警 - {log.source.value}",
             description=f"系统检测到ERROR级别日志: {log.message[:200]}",
             related_ip=log.ip,
-            related_user=log.user,
-            related_log_ids=str(log_id),
+            related_user=log.user_name,
             status=AlertStatus.UNHANDLED,
             extra_data=json.dumps({
-                "log_id": log_id,
-                "log_source": log.source,
-                "log_level": log.level
+                "log_id": log.id,
+                "log_source": log.source.value,
+                "log_level": log.level.value
             })
         )
 
-        self.db.add(alert)
+    def check_suspicious_access(self, now: Optional[datetime] = None) -> List[Alert]:
+        """
+        检测可疑访问行为
+
+        规则: 同一用户在N分钟内从超过阈值个不同IP登录成功
+
+        由内存窗口(suspicious_access_detector)在入库时增量维护，此处只读取当前超过阈值的用户，
+        不再对 logs 做 COUNT(DISTINCT ip) / GROUP_CONCAT 扫描
+
+        Args:
+            now: 窗口终点，默认当前时间
+
+        Returns:
+            新创建的告警列表
+        """
+        self.sync_suspicious_access_config()
+        now = now or datetime.now()
+        alerts = self._apply_suspicious_access_hits(suspicious_access_detector.over_threshold(now), now)
         self.db.commit()
-        self.db.refresh(alert)
+        return alerts
 
-        return alert
+    def sync_suspicious_access_config(self, force: bool = False) -> None:
+        """配置快照更新后把阈值/窗口同步到可疑访问检测器"""
+        snapshot = get_config_snapshot(self.db)
+        if force or suspicious_access_detector.config_outdated(snapshot):
+            previous_window = suspicious_access_detector.configure(
+                snapshot.get_int(ConfigKeys.ALERT_SUSPICIOUS_IP_THRESHOLD, default=3),
+                snapshot.get_int(ConfigKeys.ALERT_SUSPICIOUS_WINDOW, default=30),
+                source=snapshot,
+            )
+            if previous_window is not None:
+                # 窗口变大: 补载原窗口之外、新窗口之内的登录成功
+                suspicious_access_detector.backfill(self.db, previous_window)
 
-    def check_suspicious_access(self) -> List[Alert]:
+    def _apply_suspicious_access_hits(self, hits: Dict[str, SuspiciousHit], now: datetime) -> List[Alert]:
         """
-        检测可疑访问行为(可扩展)
+        按用户创建或更新可疑访问告警(不提交)
 
-        例如:
-        - 同一用户短时间内从多个IP登录
-        - 访问敏感资源的异常行为
-        - 非工作时间的大量操作
+        Args:
+            hits: 用户 -> (不同IP数, IP列表, 是否估算)
+            now: 时间窗口终点
 
         Returns:
-            告警列表
+            新创建的告警列表
         """
-        # 此处可以实现更多复杂的检测规则
-        # 示例:检测同一用户30分钟内从超过3个不同IP登录
-        alerts = []
+        if not hits:
+            return []
 
-        time_threshold = datetime.now() - timedelta(minutes=30)
-
-        multi_ip_users = self.db.query(
-            Log.user,
-            func.count(func.distinct(Log.ip)).label('ip_count'),
-            func.group_concat(func.distinct(Log.ip)).label('ip_list')
-        ).filter(
-            and_(
-                Log.timestamp >= time_threshold,
-                Log.user.isnot(None),
-                Log.message.like('%login%success%')
-            )
-        ).group_by(Log.user).having(
-            func.count(func.distinct(Log.ip)) > 3
-        ).all()
-
-        for record in multi_ip_users:
-            user = record.user
-            ip_count = record.ip_count
-            ip_list = record.ip_list
-
-            # 检查是否已存在告警
-            existing_alert = self.db.query(Alert).filter(
-                and_(
-                    Alert.alert_type == AlertType.SUSPICIOUS_ACCESS,
-                    Alert.related_user == user,
-                    Alert.status.in_([AlertStatus.UNHANDLED, AlertStatus.HANDLING]),
-                    Alert.created_at >= time_threshold
-                )
-            ).first()
-
-            if not existing_alert:
-                alert = Alert(
-                    alert_type=AlertType.SUSPICIOUS_ACCESS,
-                    alert_level=AlertLevel.HIGH,
-                    title=f"可疑访问行为 - 用户: {user}",
-                    description=(
-                        f"用户 {user} 在30分钟内从{ip_count}个不同IP地址登录: {ip_list}"
-                    ),
-                    related_user=user,
-                    status=AlertStatus.UNHANDLED,
-                    extra_data=json.dumps({
-                        "ip_count": ip_count,
-                        "ip_list": ip_list.split(',') if ip_list else []
-                    })
-                )
-                self.db.add(alert)
-                self.db.commit()
-                self.db.refresh(alert)
-                alerts.append(alert)
+        window_minutes = suspicious_access_detector.window_minutes
+        time_threshold = now - suspicious_access_detector.window
 
+        alerts = []
+        for user, (ip_count, ip_list, approximate) in hits.items():
+            count_text = f"约{ip_count}个" if approximate else f"{ip_count}个"
+            description = f"用户 {user} 在{window_minutes}分钟内从{count_text}不同IP地址登录"
+            if ip_list:
+                description += f": {','.join(ip_list)}"
+            extra_data = json.dumps({
+                "ip_count": ip_count,
+                "ip_list": ip_list,
+                "approximate": approximate,
+                "time_window_minutes": window_minutes,
+                "threshold": suspicious_access_detector.threshold
+            })
+            alert_id = open_alert_index.lookup(self.db, (AlertType.SUSPICIOUS_ACCESS, user), time_threshold)
+            if alert_id is not None and open_alert_index.increment(
+                self.db, alert_id, 1, description=description, extra_data=extra_data
+            ):
+                continue
+
+            alert = Alert(
+                alert_type=AlertType.SUSPICIOUS_ACCESS,
+                alert_level=AlertLevel.HIGH,
+                title=f"可疑访问行为 - 用户: {user}",
+                description=description,
+                related_user=user,
+                status=AlertStatus.UNHANDLED,
+                extra_data=extra_data
+            )
+            self.db.add(alert)
+            alerts.append(alert)
         return alerts
 
     def _get_config_int(self, key: str, default: int) -> int:
-        """获取整型配置值"""
-        config = self.db.query(SystemConfig).filter(
-            SystemConfig.config_key == key
-        ).first()
-
-        if config and config.is_active:
-            try:
-                return int(config.config_value)
-            except ValueError:
-                return default
-        return default
+        """获取整型配置值(读取进程内配置快照)"""
+        return get_config_snapshot(self.db).get_int(key, default)
 
     def _get_config_bool(self, key: str, default: bool) -> bool:
-        """获取布尔型配置值"""
-        config = self.db.query(SystemConfig).filter(
-            SystemConfig.config_key == key
-        ).first()
-
-        if config and config.is_active:
-            return config.config_value.lower() in ('true', '1', 'yes')
-        return default
+        """获取布尔型配置值(读取进程内配置快照)"""
+        return get_config_snapshot(self.db).get_bool(key, default)
 
 
 def trigger_alert_check(db: Session, log_id: Optional[int] = None):
@@ -300,3 +484,39 @@ def trigger_alert_check(db: Session, log_id: Optional[int] = None):
     """
     engine = AlertEngine(db)
     return engine.check_all_rules(log_id)
+
+
+def trigger_batch_alert_check(db: Session, logs: Sequence[Union[Log, LogEvent]]) -> List[Alert]:
+    """
+    批量入库后触发告警检查的便捷函数
+
+    Args:
+        db: 数据库会话
+        logs: 本批已入库的日志
+    """
+    engine = AlertEngine(db)
+    return engine.check_batch(logs)
+
+
+def check_ingested_rows(db: Session, rows: Sequence[dict], ids: Sequence[int]) -> int:
+    """
+    批量入库(已提交)后对本批日志执行告警检查
+
+    受 ALERT_CHECK_ON_INGEST 控制；告警检查失败只回滚告警，不影响已入库的日志
+
+    Args:
+        db: 数据库会话
+        rows: bulk_insert_logs 写入的行字典
+        ids: 与 rows 一一对应的日志ID
+
+    Returns:
+        新创建的告警数
+    """
+    if not settings.ALERT_CHECK_ON_INGEST or not rows:
+        return 0
+    try:
+        return len(trigger_batch_alert_check(db, log_events_from_rows(rows, ids)))
+    except Exception:  # noqa: BLE001
+        db.rollback()
+        logger.warning("alert check failed for %d ingested logs", len(rows), exc_info=True)
+        return 0
@@ -0,0 +1,151 @@
+"""
+告警关联日志服务 - Alert Log Links
+
+告警与日志的关联保存在 alert_logs 表(每条关联一行，主键 (alert_id, log_id))：
+- 写入: 新告警写入窗口内的全部日志，重复触发只追加本批新增的日志，
+  用 INSERT IGNORE 批量写入，已存在的关联直接跳过
+- 读取: 按 log_id 键集分页，先从关联表主键范围取一页日志ID，再按主键取日志行
+
+替代逗号分隔的 alerts.related_log_ids(可能被 GROUP_CONCAT 截断，且每次触发整体重写)；
+历史告警可在 backend 目录下执行迁移(可重复执行，已迁移的告警会被跳过):
+    python -m app.services.alert_log_links --batch-size 1000
+"""
+import argparse
+import json
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Row, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.alert import Alert, AlertLogLink
+from app.models.log import Log
+from app.schemas.log import LogListItem
+from app.utils.row_json import row_serializer
+
+# MySQL group_concat_max_len 默认值，达到该长度的历史列表末尾可能是被截断的ID
+GROUP_CONCAT_MAX_LEN = 1024
+
+
+def parse_legacy_log_ids(text: Optional[str]) -> List[int]:
+    """解析历史告警逗号分隔的 related_log_ids，丢弃可能被截断的末尾项"""
+    if not text:
+        return []
+    parts = text.split(",")
+    if len(text) >= GROUP_CONCAT_MAX_LEN:
+        parts = parts[:-1]
+    return [int(part) for part in parts if part.strip().isdigit()]
+
+
+class AlertLogService:
+    """告警关联日志的写入、分页读取和历史数据迁移"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def link(self, pairs: Iterable[Tuple[int, int]]) -> int:
+        """
+        批量写入 (告警ID, 日志ID) 关联(不提交)，已存在的关联跳过
+
+        Returns:
+            提交写入的关联数(含被跳过的重复项)
+        """
+        rows = [{"alert_id": alert_id, "log_id": log_id} for alert_id, log_id in pairs]
+        stmt = insert(AlertLogLink).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        batch_size = settings.INGEST_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            self.db.execute(stmt, rows[start:start + batch_size])
+        return len(rows)
+
+    def count(self, alert_id: int) -> int:
+        """告警的关联日志数(关联表主键前缀范围计数)"""
+        return self.db.execute(
+            select(func.count()).select_from(AlertLogLink).where(AlertLogLink.alert_id == alert_id)
+        ).scalar() or 0
+
+    def list_logs(self, alert_id: int, after_id: int = 0, limit: int = 100) -> Tuple[List[Row], Optional[int]]:
+        """
+        按日志ID升序分页读取告警的关联日志(只选取 LogListItem 的列)
+
+        Args:
+            alert_id: 告警ID
+            after_id: 上一页最后一条日志的ID，首页为 0
+            limit: 每页条数
+
+        Returns:
+            (日志行列表，列顺序同 LogListItem 字段, 下一页的 after_id；没有下一页时为 None)
+        """
+        log_ids = list(self.db.execute(
+            select(AlertLogLink.log_id)
+            .where(AlertLogLink.alert_id == alert_id, AlertLogLink.log_id > after_id)
+            .order_by(AlertLogLink.log_id)
+            .limit(limit + 1)
+        ).scalars())
+        has_more = len(log_ids) > limit
+        log_ids = log_ids[:limit]
+        if not log_ids:
+            return [], None
+
+        # 已被清理的日志不返回，分页游标仍以关联表为准
+        logs = self.db.execute(
+            select(*row_serializer(LogListItem).columns(Log)).where(Log.id.in_(log_ids)).order_by(Log.id)
+        ).all()
+        return logs, log_ids[-1] if has_more else None
+
+    def migrate_legacy(self, batch_size: Optional[int] = None) -> dict:
+        """
+        把历史告警的 related_log_ids 写入关联表并清空该列
+
+        按告警主键分批(keyset)处理，每批提交一次，可随时中断后重新执行
+
+        Returns:
+            迁移的告警数和关联数
+        """
+        batch_size = batch_size or 1000
+        report = {"alerts": 0, "links": 0}
+        last_id = 0
+        while True:
+            rows = self.db.execute(
+                select(Alert.id, Alert.related_log_ids)
+                .where(Alert.id > last_id, Alert.related_log_ids.is_not(None))
+                .order_by(Alert.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return report
+
+            ids = [alert_id for alert_id, _ in rows]
+            report["links"] += self.link(
+                (alert_id, log_id) for alert_id, text in rows for log_id in parse_legacy_log_ids(text)
+            )
+            self.db.execute(
+                update(Alert).where(Alert.id.in_(ids)).values(related_log_ids=None)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+
+            report["alerts"] += len(rows)
+            last_id = ids[-1]
+
+
+def link_alert_logs(db: Session, links: Sequence[Tuple[int, Sequence[int]]]) -> int:
+    """写入 [(告警ID, 日志ID列表)] 的便捷函数(不提交)"""
+    return AlertLogService(db).link((alert_id, log_id) for alert_id, log_ids in links for log_id in log_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="把历史告警的 related_log_ids 迁移到 alert_logs 表")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批告警数")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(AlertLogService(db).migrate_legacy(args.batch_size), ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
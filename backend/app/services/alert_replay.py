@@ -0,0 +1,260 @@
+"""
+告警回放服务 - Alert Replay Service
+
+按时间顺序回放一段历史日志，用独立的检测器实例和模拟时钟(每条日志的时间即当前时间)
+执行暴力破解、ERROR 日志和可疑访问规则，报告会产生的告警，不写入 alerts 表，
+用于在启用新阈值前评估效果
+
+日志按 (timestamp, id) 顺序分块读取: 驱动支持服务端游标时用一条流式查询(yield_per)，
+否则(如 mysql-connector)按 (timestamp, id) 键集分页，每块一条查询；
+只读取可能触发规则的日志(ERROR 级别、LOGIN_SUCCESS 事件及尚未回填事件类型的行)；
+检测器窗口与模拟中的未处理告警随模拟时钟淘汰，内存占用与回放时长无关
+
+回放命令(在 backend 目录下):
+    python -m app.services.alert_replay --start "2025-11-01 00:00:00" --end "2025-12-01 00:00:00" --brute-force-threshold 10
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.alert import AlertLevel, AlertType
+from app.models.config import ConfigKeys
+from app.models.log import Log, LogEventTypeEnum, LogLevelEnum
+from app.schemas.alert import AlertReplayRequest
+from app.services.alert_engine import LogEvent
+from app.services.brute_force_detector import BruteForceDetector, is_login_failure
+from app.services.config_service import get_config_snapshot
+from app.services.suspicious_access_detector import SuspiciousAccessDetector
+from app.utils.event_classifier import event_type_of
+
+
+class AlertReplay:
+    """
+    一次告警回放
+
+    模拟告警引擎的去重: 同一对象在窗口内已有(模拟的)未处理告警时只累加触发次数
+    """
+
+    def __init__(self, db: Session, request: AlertReplayRequest):
+        self.db = db
+        self.request = request
+        snapshot = get_config_snapshot(db)
+
+        def pick(value, key: str, default):
+            return value if value is not None else snapshot.get_int(key, default)
+
+        self.brute_force = BruteForceDetector(
+            pick(request.brute_force_threshold, ConfigKeys.ALERT_BRUTE_FORCE_THRESHOLD, 5),
+            pick(request.brute_force_window_minutes, ConfigKeys.ALERT_BRUTE_FORCE_WINDOW, 5),
+        )
+        self.suspicious = SuspiciousAccessDetector(
+            pick(request.suspicious_ip_threshold, ConfigKeys.ALERT_SUSPICIOUS_IP_THRESHOLD, 3),
+            pick(request.suspicious_window_minutes, ConfigKeys.ALERT_SUSPICIOUS_WINDOW, 30),
+        )
+        self.error_log_enabled = (
+            request.error_log_enabled if request.error_log_enabled is not None
+            else snapshot.get_bool(ConfigKeys.ALERT_ERROR_LOG_ENABLED, default=True)
+        )
+
+        self.scanned = 0
+        self.by_type: Dict[str, Dict[str, int]] = {}
+        self.alerts: List[Dict[str, Any]] = []
+        self.truncated = False
+        # (告警类型, 对象) -> [创建时间, 明细(未进入结果时为 None)]
+        self._open: Dict[Tuple[AlertType, str], List[Any]] = {}
+        self._last_sweep: Optional[datetime] = None
+
+    def run(self) -> dict:
+        """
+        执行回放
+
+        Returns:
+            与 AlertReplayResult 对应的字典
+        """
+        started = time.perf_counter()
+        request = self.request
+        for rows in self._iter_chunks():
+            for row in rows:
+                self._observe(LogEvent(*row))
+            self.scanned += len(rows)
+
+        return {
+            "start_time": request.start_time,
+            "end_time": request.end_time,
+            "scanned": self.scanned,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "settings": {
+                "brute_force_threshold": self.brute_force.threshold,
+                "brute_force_window_minutes": self.brute_force.window_minutes,
+                "suspicious_ip_threshold": self.suspicious.threshold,
+                "suspicious_window_minutes": self.suspicious.window_minutes,
+                "error_log_enabled": self.error_log_enabled,
+            },
+            "by_type": self.by_type,
+            "alerts": self.alerts,
+            "alerts_truncated": self.truncated,
+        }
+
+    def _iter_chunks(self) -> Iterator[Sequence[Any]]:
+        """按时间顺序分块产出回放范围内的日志行"""
+        request = self.request
+        chunk_size = settings.ALERT_REPLAY_CHUNK_SIZE
+        stmt = select(
+            Log.id, Log.source, Log.level, Log.timestamp, Log.ip, Log.user_name, Log.message, Log.event_type
+        ).where(
+            Log.timestamp >= request.start_time,
+            Log.timestamp < request.end_time,
+            or_(
+                Log.level == LogLevelEnum.ERROR,
+                Log.event_type == LogEventTypeEnum.LOGIN_SUCCESS,
+                Log.event_type.is_(None),
+            ),
+        )
+
+        if self.db.get_bind().dialect.supports_server_side_cursors:
+            result = self.db.execute(
+                stmt.order_by(Log.timestamp, Log.id).execution_options(yield_per=chunk_size)
+            )
+            try:
+                yield from result.partitions()
+            finally:
+                result.close()
+            return
+
+        last: Optional[Tuple[datetime, int]] = None
+        while True:
+            page = stmt
+            if last is not None:
+                page = page.where(or_(
+                    Log.timestamp > last[0],
+                    and_(Log.timestamp == last[0], Log.id > last[1]),
+                ))
+            rows = self.db.execute(page.order_by(Log.timestamp, Log.id).limit(chunk_size)).all()
+            if not rows:
+                return
+            yield rows
+            last = (rows[-1].timestamp, rows[-1].id)
+
+    def _observe(self, log: LogEvent) -> None:
+        now = log.timestamp
+
+        # 规则1: 暴力破解
+        if is_login_failure(log):
+            hit = self.brute_force.observe(log.ip, log.timestamp, log.id, now)
+            if hit is not None:
+                level = AlertLevel.HIGH if hit[0] >= self.brute_force.threshold * 2 else AlertLevel.MEDIUM
+                self._fire(
+                    AlertType.BRUTE_FORCE, log.ip, now, self.brute_force.window,
+                    level, f"检测到暴力破解攻击 - IP: {log.ip}", related_ip=log.ip,
+                )
+
+        # 规则2: ERROR日志(每条日志一条告警，不去重)
+        if self.error_log_enabled and log.level == LogLevelEnum.ERROR:
+            self._record(
+                AlertType.ERROR_LOG, AlertLevel.MEDIUM, f"ERROR日志告警 - {log.source.value}", now,
+                related_ip=log.ip, related_user=log.user_name,
+            )
+
+        # 规则3: 可疑访问
+        if log.user_name and log.ip and event_type_of(log) == LogEventTypeEnum.LOGIN_SUCCESS:
+            hit = self.suspicious.observe(log.user_name, log.ip, log.timestamp, now)
+            if hit is not None:
+                self._fire(
+                    AlertType.SUSPICIOUS_ACCESS, log.user_name, now, self.suspicious.window,
+                    AlertLevel.HIGH, f"可疑访问行为 - 用户: {log.user_name}", related_user=log.user_name,
+                )
+
+        self._maybe_sweep(now)
+
+    def _fire(self, alert_type: AlertType, subject: str, now: datetime, window, level: AlertLevel, title: str,
+              **related) -> None:
+        """模拟创建或累加告警"""
+        counts = self.by_type.setdefault(alert_type.value, {"alerts": 0, "triggers": 0})
+        key = (alert_type, subject)
+        entry = self._open.get(key)
+        if entry is not None and entry[0] >= now - window:
+            counts["triggers"] += 1
+            if entry[1] is not None:
+                entry[1]["trigger_count"] += 1
+                entry[1]["last_fired_at"] = now
+            return
+        self._open[key] = [now, self._record(alert_type, level, title, now, **related)]
+
+    def _record(self, alert_type: AlertType, level: AlertLevel, title: str, now: datetime,
+                **related) -> Optional[Dict[str, Any]]:
+        """计入一条新告警，结果明细未满时返回明细"""
+        counts = self.by_type.setdefault(alert_type.value, {"alerts": 0, "triggers": 0})
+        counts["alerts"] += 1
+        counts["triggers"] += 1
+        if len(self.alerts) >= self.request.max_alerts:
+            self.truncated = True
+            return None
+        alert = {
+            "alert_type": alert_type,
+            "alert_level": level,
+            "title": title,
+            "related_ip": related.get("related_ip"),
+            "related_user": related.get("related_user"),
+            "trigger_count": 1,
+            "first_fired_at": now,
+            "last_fired_at": now,
+        }
+        self.alerts.append(alert)
+        return alert
+
+    def _maybe_sweep(self, now: datetime) -> None:
+        """每过一个最大窗口清理一次已超出窗口的模拟告警"""
+        window = max(self.brute_force.window, self.suspicious.window)
+        if self._last_sweep is not None and now - self._last_sweep < window:
+            return
+        self._last_sweep = now
+        cutoff = now - window
+        for key in [key for key, entry in self._open.items() if entry[0] < cutoff]:
+            del self._open[key]
+
+
+def replay_alerts(db: Session, request: AlertReplayRequest) -> dict:
+    """告警回放的便捷函数"""
+    return AlertReplay(db, request).run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="用历史日志回放告警规则(不写入 alerts 表)")
+    parser.add_argument("--start", required=True, help="起始时间，如 2025-11-01 00:00:00")
+    parser.add_argument("--end", required=True, help="结束时间(不含)")
+    parser.add_argument("--brute-force-threshold", type=int, default=None)
+    parser.add_argument("--brute-force-window", type=int, default=None, help="分钟")
+    parser.add_argument("--suspicious-ip-threshold", type=int, default=None)
+    parser.add_argument("--suspicious-window", type=int, default=None, help="分钟")
+    parser.add_argument("--no-error-log", action="store_true", help="不回放ERROR日志告警")
+    parser.add_argument("--max-alerts", type=int, default=100, help="最多输出的告警明细条数")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    request = AlertReplayRequest(
+        start_time=datetime.fromisoformat(args.start),
+        end_time=datetime.fromisoformat(args.end),
+        brute_force_threshold=args.brute_force_threshold,
+        brute_force_window_minutes=args.brute_force_window,
+        suspicious_ip_threshold=args.suspicious_ip_threshold,
+        suspicious_window_minutes=args.suspicious_window,
+        error_log_enabled=False if args.no_error_log else None,
+        max_alerts=args.max_alerts,
+    )
+    db = SessionLocal()
+    try:
+        result = replay_alerts(db, request)
+        print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+告警调度器 - Alert Scheduler
+
+应用启动时拉起的 asyncio 后台任务，把告警检测移出请求路径：
+- 窗口检测: 每 ALERT_SCHEDULER_INTERVAL_SECONDS 按主键水位读取新入库的日志，分批执行 check_batch
+  (暴力破解/可疑访问/自定义规则的滑动窗口只在主节点进程内维护，多 worker 时计数不被分摊)；
+  仅在 ALERT_CHECK_ON_INGEST 关闭(默认)时执行，避免与入库时的检测重复计数
+- 自动解决: 每 ALERT_AUTO_RESOLVE_INTERVAL_SECONDS 把创建超过 alert_auto_resolve_days 天仍未处理的告警
+  分批(每批 ALERT_AUTO_RESOLVE_BATCH_SIZE 条)更新为 RESOLVED
+
+多个 uvicorn worker 中只有持有主节点锁的进程执行任务：MySQL 使用 GET_LOCK(锁随连接释放)，
+其他数据库使用临时目录下锁文件的文件锁；未取得锁的进程每个周期重试一次，主节点退出后自动接替
+
+检测水位(见 EvaluationWatermark)与告警在同一事务中写入 alert_scheduler_state：
+并发的多行 INSERT 不按ID顺序提交，水位只推进到可见超过 ALERT_SCHEDULER_COMMIT_LAG_SECONDS 的ID，
+其上已检测的ID记录为区间；新主节点从保存的水位继续，并只用已检测过的日志重建检测器窗口
+"""
+import asyncio
+import bisect
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.alert import Alert, AlertSchedulerState, AlertStatus
+from app.models.config import ConfigKeys
+from app.models.log import Log
+from app.services.alert_engine import AlertEngine, LogEvent
+from app.services.brute_force_detector import brute_force_detector
+from app.services.config_service import get_config_snapshot
+from app.services.open_alert_index import OPEN_STATUSES, open_alert_index
+from app.services.suspicious_access_detector import suspicious_access_detector
+
+logger = logging.getLogger(__name__)
+
+AUTO_RESOLVE_NOTE = "超过自动解决天数未处理，系统自动解决"
+
+# alert_scheduler_state 中检测水位的状态名
+WATERMARK_STATE = "evaluation_watermark"
+
+
+class EvaluationWatermark:
+    """
+    告警检测的日志ID水位
+
+    low 及以下的日志均已检测(或ID空洞已确认不会再出现)；seen 为 low 之上已检测的ID，
+    按升序保存为互不相邻的闭区间，紧接 low 的区间直接并入 low。
+    每次 mark 只在内存中记录 (看到时间, 本次最大ID)；可见超过提交延迟上限后，
+    更小的ID若仍未出现视为已回滚，low 推进到该ID。持久化状态只有 low 与区间
+    """
+
+    def __init__(self, low: int, seen: Iterable[Tuple[int, int]] = (), seen_at: Optional[float] = None):
+        self.low = low
+        self.seen: List[Tuple[int, int]] = []
+        # (首次看到的时间, 本次标记的最大ID)，按时间升序
+        self._marks: List[Tuple[float, int]] = []
+        for start, end in seen:
+            self._add(start, end)
+        if self.seen:
+            self._marks.append((time.monotonic() if seen_at is None else seen_at, self.seen[-1][1]))
+
+    def mark(self, log_ids: Sequence[int], seen_at: float) -> None:
+        """标记已检测的ID(升序)"""
+        if not log_ids:
+            return
+        start = prev = log_ids[0]
+        for log_id in log_ids[1:]:
+            if log_id != prev + 1:
+                self._add(start, prev)
+                start = log_id
+            prev = log_id
+        self._add(start, prev)
+        self._marks.append((seen_at, log_ids[-1]))
+
+    def _add(self, start: int, end: int) -> None:
+        """插入区间并与相邻区间、low 合并"""
+        start = max(start, self.low + 1)
+        if start > end:
+            return
+        i = bisect.bisect_left(self.seen, (start, end))
+        if i > 0 and self.seen[i - 1][1] + 1 >= start:
+            i -= 1
+            start = self.seen[i][0]
+            end = max(end, self.seen[i][1])
+            del self.seen[i]
+        while i < len(self.seen) and self.seen[i][0] <= end + 1:
+            end = max(end, self.seen[i][1])
+            del self.seen[i]
+        if start == self.low + 1:
+            self.low = end
+        else:
+            self.seen.insert(i, (start, end))
+
+    def settle(self, visible_before: float) -> bool:
+        """
+        把 low 推进到 visible_before 之前已看到的最大ID
+
+        Returns:
+            low 是否变化
+        """
+        settled = [log_id for seen_at, log_id in self._marks if seen_at <= visible_before]
+        self._marks = [mark for mark in self._marks if mark[0] > visible_before]
+        if not settled or max(settled) <= self.low:
+            return False
+        low = max(settled)
+        seen, self.seen = self.seen, []
+        self.low = low
+        for start, end in seen:
+            self._add(start, end)
+        return True
+
+    def gaps(self) -> List[Tuple[int, Optional[int]]]:
+        """尚未检测的ID开区间 (after, before)，最后一个区间没有上界"""
+        gaps: List[Tuple[int, Optional[int]]] = []
+        after = self.low
+        for start, end in self.seen:
+            gaps.append((after, start))
+            after = end
+        gaps.append((after, None))
+        return gaps
+
+    def copy(self) -> "EvaluationWatermark":
+        watermark = EvaluationWatermark(self.low)
+        watermark.seen = list(self.seen)
+        watermark._marks = list(self._marks)
+        return watermark
+
+    def dumps(self) -> str:
+        return json.dumps({"low": self.low, "seen": self.seen})
+
+    @classmethod
+    def loads(cls, value: str) -> "EvaluationWatermark":
+        data = json.loads(value)
+        return cls(int(data["low"]), [(int(start), int(end)) for start, end in data.get("seen", [])])
+
+    def evaluated_condition(self):
+        """已检测日志的筛选条件(重建检测器窗口用)"""
+        return or_(Log.id <= self.low, *(Log.id.between(start, end) for start, end in self.seen))
+
+
+class LeaderLock:
+    """跨进程的主节点锁(非阻塞获取，进程退出时自动释放)"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._connection: Optional[Connection] = None
+        self._file = None
+
+    def acquire(self) -> bool:
+        """获取或确认持有锁；连接断开导致锁丢失时重新竞争"""
+        if self._file is not None:
+            return True
+        if self._connection is not None:
+            try:
+                if self._connection.execute(
+                    text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name}
+                ).scalar() == 1:
+                    return True
+            except Exception:  # noqa: BLE001
+                logger.warning("alert scheduler lock connection lost", exc_info=True)
+            self._close_connection()
+
+        from app.db.session import engine
+
+        if engine.dialect.name == "mysql":
+            connection = engine.connect()
+            try:
+                acquired = connection.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name}).scalar()
+            except Exception:  # noqa: BLE001
+                connection.close()
+                raise
+            if acquired == 1:
+                self._connection = connection
+                return True
+            connection.close()
+            return False
+        return self._acquire_file()
+
+    def _acquire_file(self) -> bool:
+        path = os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+        handle = open(path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def _close_connection(self) -> None:
+        try:
+            self._connection.close()
+        except Exception:  # noqa: BLE001
+            pass
+        self._connection = None
+
+    def release(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name})
+            except Exception:  # noqa: BLE001
+                pass
+            self._close_connection()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class AlertScheduler:
+    """
+    告警后台调度
+
+    任务函数均为同步数据库操作，通过线程池执行，不阻塞事件循环
+    """
+
+    def __init__(self):
+        self.lock = LeaderLock(settings.ALERT_SCHEDULER_LOCK_NAME)
+        self._task: Optional[asyncio.Task] = None
+        # 成为主节点后首次检测时从数据库载入，失去主节点锁时丢弃
+        self._watermark: Optional[EvaluationWatermark] = None
+        self._warned_ingest_checks = False
+        self._last_resolve = 0.0
+        self.last_run: Optional[datetime] = None
+        self.evaluated = 0
+        self.resolved = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop(), name="alert-scheduler")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_in_threadpool(self.lock.release)
+
+    async def _loop(self) -> None:
+        interval = settings.ALERT_SCHEDULER_INTERVAL_SECONDS
+        while True:
+            try:
+                if await run_in_threadpool(self.lock.acquire):
+                    await run_in_threadpool(self.run_once)
+                else:
+                    self._watermark = None
+                    self._warn_ingest_checks()
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                logger.warning("alert scheduler run failed", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def _warn_ingest_checks(self) -> None:
+        """主节点锁被其他进程持有说明是多进程部署，入库时检测的窗口计数会被分摊到各进程"""
+        if settings.ALERT_CHECK_ON_INGEST and not self._warned_ingest_checks:
+            self._warned_ingest_checks = True
+            logger.warning(
+                "ALERT_CHECK_ON_INGEST is enabled with multiple worker processes: brute force, suspicious access "
+                "and custom rule windows are counted per process and may never reach their thresholds; "
+                "disable it to let the scheduler leader evaluate every log"
+            )
+
+    def run_once(self, now: Optional[datetime] = None) -> None:
+        """执行一轮到期的任务(主节点调用)"""
+        from app.db.session import SessionLocal
+
+        now = now or datetime.now()
+        db = SessionLocal()
+        try:
+            if not settings.ALERT_CHECK_ON_INGEST:
+                self.evaluated += self.evaluate_new_logs(db, now)
+
+            if time.monotonic() - self._last_resolve >= settings.ALERT_AUTO_RESOLVE_INTERVAL_SECONDS:
+                days = get_config_snapshot(db).get_int(ConfigKeys.ALERT_AUTO_RESOLVE_DAYS, default=0)
+                if days > 0:
+                    self.resolved += self.auto_resolve(db, now - timedelta(days=days), now)
+                self._last_resolve = time.monotonic()
+        finally:
+            db.close()
+        self.last_run = now
+
+    def evaluate_new_logs(self, db: Session, now: datetime) -> int:
+        """
+        对水位之后尚未检测的日志分批执行告警检测
+
+        每轮只扫描水位中未检测的ID区间(晚提交的小ID落在区间内，因此不会被跳过)，
+        每批 INGEST_BATCH_SIZE 条；一轮最多检测 ALERT_SCHEDULER_ROUND_SIZE 条，
+        本轮的告警与水位在同一事务中一次提交，失败时整轮回滚并恢复水位
+
+        Returns:
+            本次检测的日志条数
+        """
+        if self._watermark is None:
+            self._watermark = self.load_watermark(db, now)
+
+        total = 0
+        while True:
+            evaluated = self._evaluate_round(db, now)
+            total += evaluated
+            if evaluated < settings.ALERT_SCHEDULER_ROUND_SIZE:
+                return total
+
+    def _evaluate_round(self, db: Session, now: datetime) -> int:
+        watermark = self._watermark
+        saved = watermark.copy()
+        engine = AlertEngine(db)
+        batch_size = settings.INGEST_BATCH_SIZE
+        limit = settings.ALERT_SCHEDULER_ROUND_SIZE
+        total = 0
+        try:
+            for after, before in watermark.gaps():
+                while total < limit:
+                    query = select(
+                        Log.id, Log.source, Log.level, Log.timestamp, Log.ip, Log.user_name, Log.message,
+                        Log.event_type
+                    ).where(Log.id > after)
+                    if before is not None:
+                        query = query.where(Log.id < before)
+                    rows = db.execute(query.order_by(Log.id).limit(min(batch_size, limit - total))).all()
+                    if not rows:
+                        break
+                    engine.check_batch([LogEvent(*row) for row in rows], now, commit=False)
+                    watermark.mark([row.id for row in rows], time.monotonic())
+                    total += len(rows)
+                    after = rows[-1].id
+                if total >= limit:
+                    break
+
+            settled = watermark.settle(time.monotonic() - settings.ALERT_SCHEDULER_COMMIT_LAG_SECONDS)
+            if total or settled:
+                # 水位随本轮告警一起提交
+                self._stage_watermark(db)
+                db.commit()
+        except Exception:
+            db.rollback()
+            self._watermark = saved
+            raise
+        return total
+
+    def load_watermark(self, db: Session, now: datetime) -> EvaluationWatermark:
+        """
+        成为主节点时载入检测水位，并用已检测过的日志重建检测器窗口
+
+        没有保存的水位时(首次部署)从当前最大日志ID开始，不对历史日志补发告警
+        """
+        state = db.get(AlertSchedulerState, WATERMARK_STATE)
+        if state is not None:
+            watermark = EvaluationWatermark.loads(state.value)
+        else:
+            watermark = EvaluationWatermark(db.execute(select(func.max(Log.id))).scalar() or 0)
+            self._stage_watermark(db, watermark)
+            db.commit()
+
+        engine = AlertEngine(db)
+        engine.sync_brute_force_config(force=True)
+        engine.sync_suspicious_access_config(force=True)
+        condition = watermark.evaluated_condition()
+        brute_force_detector.rebuild(db, now, condition)
+        suspicious_access_detector.rebuild(db, now, condition)
+        logger.info(
+            "alert scheduler resumed from log id %d (%d evaluated above)",
+            watermark.low, sum(end - start + 1 for start, end in watermark.seen)
+        )
+        return watermark
+
+    def _stage_watermark(self, db: Session, watermark: Optional[EvaluationWatermark] = None) -> None:
+        """把检测水位写入当前事务(不提交)"""
+        db.merge(AlertSchedulerState(
+            name=WATERMARK_STATE, value=(watermark or self._watermark).dumps(), updated_at=datetime.now()
+        ))
+
+    @staticmethod
+    def auto_resolve(db: Session, created_before: datetime, now: datetime) -> int:
+        """
+        把 created_before 之前创建且仍未处理的告警分批更新为 RESOLVED
+
+        每批先按主键取出一批ID，再用一条 UPDATE 更新并提交，避免长事务和大范围锁
+
+        Returns:
+            本次自动解决的告警数
+        """
+        total = 0
+        batch_size = settings.ALERT_AUTO_RESOLVE_BATCH_SIZE
+        while True:
+            ids: List[int] = list(db.execute(
+                select(Alert.id)
+                .where(Alert.status.in_(OPEN_STATUSES), Alert.created_at < created_before)
+                .order_by(Alert.id)
+                .limit(batch_size)
+            ).scalars())
+            if not ids:
+                return total
+            db.execute(
+                update(Alert)
+                .where(Alert.id.in_(ids), Alert.status.in_(OPEN_STATUSES))
+                .values(status=AlertStatus.RESOLVED, handler_note=AUTO_RESOLVE_NOTE, handled_at=now, updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            # 批量 UPDATE 不经过 ORM 对象，直接从未处理告警索引中移除
+            for alert_id in ids:
+                open_alert_index.discard(alert_id)
+            total += len(ids)
+            if len(ids) < batch_size:
+                return total
+
+
+# 进程内单例，由 main.py 在启动/退出时 start/stop
+alert_scheduler = AlertScheduler()
+
+
+async def start_alert_scheduler() -> None:
+    if settings.ALERT_SCHEDULER_ENABLED:
+        alert_scheduler.start()
+
+
+async def stop_alert_scheduler() -> None:
+    await alert_scheduler.stop()
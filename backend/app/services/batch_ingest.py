@@ -0,0 +1,309 @@
+"""
+API 批量入库服务 - Batch Log Ingest Service
+
+POST /logs/batch 的实现：流式读取 NDJSON 或 JSON 数组请求体，
+按批复用 LogCreate 规则校验，整批以多行 INSERT 写入
+"""
+import codecs
+import json
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.log import (
+    LogSourceEnum,
+    LogLevelEnum,
+    LogIngestTypeEnum,
+    LogParseStatusEnum,
+)
+from app.schemas.log import LogCreate
+from app.services.alert_engine import check_ingested_rows
+from app.services.ingest_buffer import IngestBuffer
+from app.services.log_ingest import (
+    IP_MAX_LENGTH,
+    MESSAGE_MAX_LENGTH,
+    USER_NAME_MAX_LENGTH,
+    bulk_insert_logs,
+)
+from app.utils.event_classifier import classify_event
+
+# (行号/数组下标, 解析出的 JSON 对象, 错误信息)
+JsonRecord = Tuple[int, Any, Optional[str]]
+
+
+@dataclass
+class BatchIngestResult:
+    """
+    批量入库结果统计，errors 只保留前 INGEST_MAX_REPORTED_ERRORS 条；
+    queued 为 True 时 inserted 表示已进入写入缓冲、尚未提交的条数
+    """
+    inserted: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    queued: bool = False
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.INGEST_MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "queued": self.queued,
+        }
+
+
+class LogBatchValidator:
+    """
+    批量校验器
+
+    一次调用 pydantic-core 校验整批记录(规则与 LogCreate 完全一致)，
+    只有出现错误时才对剩余的合法记录再校验一次
+    """
+    _adapter = TypeAdapter(List[LogCreate])
+
+    def validate(self, records: List[Tuple[int, Any]]) -> Tuple[List[LogCreate], List[Tuple[int, str]]]:
+        """
+        Args:
+            records: (行号, JSON 对象) 列表
+
+        Returns:
+            (校验通过的 LogCreate 列表, (行号, 错误信息) 列表)
+        """
+        objs = [obj for _, obj in records]
+        try:
+            return self._adapter.validate_python(objs), []
+        except ValidationError as exc:
+            bad = {}
+            for err in exc.errors(include_url=False, include_input=False):
+                index = err["loc"][0]
+                if index not in bad:
+                    loc = ".".join(str(part) for part in err["loc"][1:])
+                    bad[index] = f"{loc}: {err['msg']}" if loc else err["msg"]
+
+        errors = [(records[i][0], msg) for i, msg in sorted(bad.items())]
+        good = [obj for i, obj in enumerate(objs) if i not in bad]
+        return (self._adapter.validate_python(good) if good else []), errors
+
+
+def build_api_row(log: LogCreate) -> dict:
+    """LogCreate -> logs 表字段字典"""
+    message = log.message[:MESSAGE_MAX_LENGTH]
+    return {
+        "source": LogSourceEnum(log.source.value),
+        "level": LogLevelEnum(log.level.value),
+        "timestamp": log.timestamp,
+        "ip": log.ip[:IP_MAX_LENGTH] if log.ip else None,
+        "user_name": log.user_name[:USER_NAME_MAX_LENGTH] if log.user_name else None,
+        "message": message,
+        "event_type": classify_event(message),
+        "raw_data": log.raw_data,
+        "ingest_type": LogIngestTypeEnum.API,
+        "parse_status": LogParseStatusEnum.OK,
+    }
+
+
+class JsonStreamReader:
+    """
+    增量 JSON 读取器
+
+    根据首个非空白字符判断格式: '[' 为 JSON 数组，否则按 NDJSON(每行一个对象)处理；
+    数组元素用 raw_decode 逐个解码，缓冲区只保留尚未解码完成的部分
+    """
+
+    def __init__(self, max_record_bytes: Optional[int] = None):
+        self.max_record = max_record_bytes or settings.INGEST_MAX_LINE_BYTES
+        self._mode: Optional[str] = None
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buf = ""
+        self._carry = b""
+        self._skipping = False
+        self._index = 0
+        self._started = False
+        self._expect_comma = False
+        self._done = False
+
+    async def iter_records(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[JsonRecord]:
+        async for chunk in chunks:
+            if chunk:
+                for record in self.feed(chunk):
+                    yield record
+        for record in self.close():
+            yield record
+
+    def feed(self, chunk: bytes) -> Iterator[JsonRecord]:
+        """喂入一块数据，产出其中已完整的记录"""
+        if self._mode is None:
+            head = chunk.lstrip()
+            if not head:
+                return
+            self._mode = "array" if head[:1] == b"[" else "ndjson"
+
+        if self._mode == "ndjson":
+            yield from self._feed_ndjson(chunk, final=False)
+        else:
+            self._buf += self._text_decoder.decode(chunk)
+            yield from self._drain_array(final=False)
+
+    def close(self) -> Iterator[JsonRecord]:
+        """请求体读取完毕，处理剩余数据"""
+        if self._mode == "ndjson":
+            yield from self._feed_ndjson(b"", final=True)
+        elif self._mode == "array":
+            self._buf += self._text_decoder.decode(b"", final=True)
+            yield from self._drain_array(final=True)
+            if not self._done:
+                # 缺少结尾的 ']'：请求体被截断，已读出的完整元素照常入库
+                self._done = True
+                yield self._index + 1, None, "invalid JSON array"
+
+    def _feed_ndjson(self, chunk: bytes, final: bool) -> Iterator[JsonRecord]:
+        lines = (self._carry + chunk).split(b"\n")
+        self._carry = b"" if final else lines.pop()
+        if self._skipping and lines:
+            # 超长行的剩余部分，已报告过错误
+            lines.pop(0)
+            self._skipping = False
+
+        for line in lines:
+            self._index += 1
+            if len(line) > self.max_record:
+                yield self._index, None, "record too large"
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield self._index, json.loads(line), None
+            except ValueError:
+                yield self._index, None, "invalid JSON"
+
+        if len(self._carry) > self.max_record:
+            # 超长行: 立即报错并丢弃到下一个换行符，避免缓冲区无限增长
+            if not self._skipping:
+                self._index += 1
+                yield self._index, None, "record too large"
+            self._skipping = True
+            self._carry = b""
+
+    def _drain_array(self, final: bool) -> Iterator[JsonRecord]:
+        buf = self._buf
+        pos = 0
+        size = len(buf)
+        while not self._done:
+            while pos < size and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos >= size:
+                break
+
+            ch = buf[pos]
+            if not self._started:
+                # 首个非空白字符必为 '['(见 feed 中的格式判断)
+                self._started = True
+                pos += 1
+                continue
+            if ch == "]":
+                self._done = True
+                pos += 1
+                break
+            if self._expect_comma:
+                if ch != ",":
+                    yield self._index + 1, None, "invalid JSON array"
+                    self._done = True
+                    break
+                self._expect_comma = False
+                pos += 1
+                continue
+
+            try:
+                obj, end = self._decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if final or size - pos > self.max_record:
+                    yield self._index + 1, None, "invalid JSON"
+                    self._done = True
+                break
+            if end == size and not final:
+                # 可能是被截断的数字等标量，等更多数据到达后再解码
+                break
+
+            self._index += 1
+            self._expect_comma = True
+            pos = end
+            yield self._index, obj, None
+
+        self._buf = "" if self._done else buf[pos:]
+
+
+class BatchLogIngestService:
+    """API 批量入库服务"""
+
+    def __init__(
+            self,
+            db: Session,
+            batch_size: Optional[int] = None,
+            buffer: Optional[IngestBuffer] = None
+    ):
+        self.db = db
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.buffer = buffer
+        self.validator = LogBatchValidator()
+        self.result = BatchIngestResult(queued=buffer is not None)
+
+    async def ingest(self, chunks: AsyncIterator[bytes]) -> BatchIngestResult:
+        """
+        流式读取请求体并分批入库
+
+        Args:
+            chunks: 请求体字节流(request.stream())
+
+        Returns:
+            入库结果统计
+        """
+        # 写入缓冲模式下只做校验和入队，不占用数据库连接
+        write = self.write_batch if self.buffer is None else self.enqueue_batch
+        pending: List[Tuple[int, Any]] = []
+        async for line, obj, error in JsonStreamReader().iter_records(chunks):
+            if error is not None:
+                self.result.add_error(line, error)
+                continue
+            pending.append((line, obj))
+            if len(pending) >= self.batch_size:
+                await run_in_threadpool(write, pending)
+                pending = []
+        if pending:
+            await run_in_threadpool(write, pending)
+        return self.result
+
+    def write_batch(self, records: List[Tuple[int, Any]]) -> None:
+        """校验一批记录并以一条多行 INSERT 写入，每批提交一次，提交后对整批执行告警检查"""
+        rows = self._validate(records)
+        if rows:
+            ids = bulk_insert_logs(self.db, rows)
+            self.db.commit()
+            self.result.inserted += len(rows)
+            check_ingested_rows(self.db, rows, ids)
+
+    def enqueue_batch(self, records: List[Tuple[int, Any]]) -> None:
+        """
+        校验一批记录并放入写入缓冲
+
+        Raises:
+            IngestBufferFull: 缓冲已满，本批及之后的记录均未被接收
+        """
+        rows = self._validate(records)
+        self.buffer.offer(rows)
+        self.result.inserted += len(rows)
+
+    def _validate(self, records: List[Tuple[int, Any]]) -> List[dict]:
+        logs, errors = self.validator.validate(records)
+        for line, error in errors:
+            self.result.add_error(line, error)
+        return [build_api_row(log) for log in logs]
@@ -0,0 +1,198 @@
+"""
+暴力破解检测器 - Brute Force Detector
+
+在内存中按 IP 维护登录失败的滑动时间窗口，日志写入时增量更新，
+替代每次检测都对 logs 做一次 GROUP BY ip 全窗口扫描；
+进程启动时从数据库重建窗口内的状态
+"""
+import logging
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, select, true
+from sqlalchemy.orm import Session
+
+from app.models.log import Log, LogEventTypeEnum, LogLevelEnum
+from app.utils.event_classifier import event_type_of
+
+logger = logging.getLogger(__name__)
+
+
+def is_login_failure(log) -> bool:
+    """判断日志是否为登录失败(ERROR 级别且事件类型为 LOGIN_FAILED)"""
+    return log.level == LogLevelEnum.ERROR and event_type_of(log) == LogEventTypeEnum.LOGIN_FAILED
+
+
+class BruteForceDetector:
+    """
+    按 IP 的滑动窗口登录失败计数器
+
+    每个 IP 保存窗口内 (日志时间, 日志ID) 的有序列表；observe 只处理登录失败日志，
+    淘汰过期项后直接比较列表长度与阈值，单条日志的判定与窗口内日志总量无关。
+    窗口以当前时间为终点(与原 SQL 的 timestamp >= now - window 一致)，回放等场景可传入 now
+
+    状态只在当前进程内: 多进程部署时应由告警调度主节点统一检测(ALERT_CHECK_ON_INGEST 关闭)，
+    否则每个进程只看到自己那部分失败日志
+    """
+
+    def __init__(self, threshold: int = 5, window_minutes: int = 5):
+        self.threshold = threshold
+        self.window = timedelta(minutes=window_minutes)
+        self._windows: Dict[str, List[Tuple[datetime, int]]] = {}
+        self._lock = threading.Lock()
+        self._config_source: Optional[object] = None
+        self._last_sweep: Optional[datetime] = None
+
+    @property
+    def window_minutes(self) -> int:
+        return int(self.window.total_seconds() // 60)
+
+    def config_outdated(self, source: object) -> bool:
+        """阈值/窗口是否不是由 source(配置快照)设置的"""
+        return source is not self._config_source
+
+    def configure(self, threshold: int, window_minutes: int, source: Optional[object] = None) -> Optional[timedelta]:
+        """
+        更新阈值和窗口
+
+        Returns:
+            窗口变大时返回原窗口，调用方应随后调用 backfill 补载已淘汰的记录；否则 None
+        """
+        previous = self.window
+        self.threshold = threshold
+        self.window = timedelta(minutes=window_minutes)
+        self._config_source = source
+        return previous if self.window > previous else None
+
+    def observe(
+            self,
+            ip: Optional[str],
+            timestamp: datetime,
+            log_id: int,
+            now: Optional[datetime] = None
+    ) -> Optional[Tuple[int, List[int]]]:
+        """
+        记录一次登录失败
+
+        Args:
+            ip: 来源 IP，为空时忽略
+            timestamp: 日志时间
+            log_id: 日志ID
+            now: 窗口终点，默认当前时间
+
+        Returns:
+            窗口内失败次数达到阈值时返回 (失败次数, 窗口内日志ID列表)，否则 None
+        """
+        now = now or datetime.now()
+        cutoff = now - self.window
+        if ip is None or timestamp < cutoff:
+            return None
+
+        with self._lock:
+            entries = self._windows.get(ip)
+            if entries is None:
+                entries = self._windows[ip] = []
+            # 日志基本按时间顺序到达，insort 通常退化为追加
+            insort(entries, (timestamp, log_id))
+            expired = bisect_left(entries, (cutoff,))
+            if expired:
+                del entries[:expired]
+            self._maybe_sweep(now, cutoff)
+
+            if len(entries) >= self.threshold:
+                return len(entries), [log_id for _, log_id in entries]
+        return None
+
+    def rebuild(self, db: Session, now: Optional[datetime] = None, condition=None) -> int:
+        """
+        从数据库重建窗口内的状态(进程启动或接替告警调度主节点时调用)
+
+        Args:
+            db: 数据库会话
+            now: 窗口终点，默认当前时间
+            condition: 附加的日志筛选条件(如只载入已检测过的日志)
+
+        Returns:
+            载入的登录失败日志条数
+        """
+        now = now or datetime.now()
+        cutoff = now - self.window
+        rows = db.execute(
+            select(Log.id, Log.ip, Log.timestamp).where(
+                and_(
+                    Log.timestamp >= cutoff,
+                    Log.level == LogLevelEnum.ERROR,
+                    Log.ip.is_not(None),
+                    Log.event_type == LogEventTypeEnum.LOGIN_FAILED,
+                    condition if condition is not None else true(),
+                )
+            ).order_by(Log.timestamp, Log.id)
+        ).all()
+
+        windows: Dict[str, List[Tuple[datetime, int]]] = {}
+        for log_id, ip, timestamp in rows:
+            windows.setdefault(ip, []).append((timestamp, log_id))
+        with self._lock:
+            self._windows = windows
+            self._last_sweep = now
+        return len(rows)
+
+    def backfill(self, db: Session, previous_window: timedelta, now: Optional[datetime] = None) -> int:
+        """
+        窗口变大后从数据库补载 [now - window, now - previous_window) 内的登录失败，与现有状态合并
+
+        只读取原窗口之外的部分，原窗口内的状态保持不变
+
+        Returns:
+            补载的登录失败日志条数
+        """
+        now = now or datetime.now()
+        rows = db.execute(
+            select(Log.id, Log.ip, Log.timestamp).where(
+                and_(
+                    Log.timestamp >= now - self.window,
+                    Log.timestamp < now - previous_window,
+                    Log.level == LogLevelEnum.ERROR,
+                    Log.ip.is_not(None),
+                    Log.event_type == LogEventTypeEnum.LOGIN_FAILED,
+                )
+            )
+        ).all()
+        with self._lock:
+            for log_id, ip, timestamp in rows:
+                entries = self._windows.setdefault(ip, [])
+                entry = (timestamp, log_id)
+                index = bisect_left(entries, entry)
+                if index == len(entries) or entries[index] != entry:
+                    entries.insert(index, entry)
+        return len(rows)
+
+    def _maybe_sweep(self, now: datetime, cutoff: datetime) -> None:
+        """每过一个窗口清理一次不再出现的 IP，避免内存随历史 IP 数增长(调用方持锁)"""
+        if self._last_sweep is not None and now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        for ip in [ip for ip, entries in self._windows.items() if entries[-1][0] < cutoff]:
+            del self._windows[ip]
+
+
+# 进程内单例，由 main.py 在启动时从数据库重建
+brute_force_detector = BruteForceDetector()
+
+
+def rebuild_brute_force_detector() -> None:
+    """启动时读取阈值配置并重建检测器状态，数据库不可用时只记录警告"""
+    from app.db.session import SessionLocal
+    from app.services.alert_engine import AlertEngine
+
+    db = SessionLocal()
+    try:
+        AlertEngine(db).sync_brute_force_config(force=True)
+        count = brute_force_detector.rebuild(db)
+        logger.info("brute force detector rebuilt with %d failed logins", count)
+    except Exception:  # noqa: BLE001
+        logger.warning("brute force detector rebuild failed", exc_info=True)
+    finally:
+        db.close()
@@ -0,0 +1,236 @@
+"""
+系统配置服务 - System Config Service
+
+把所有启用的 SystemConfig 行按 value_type 解析为只读快照，进程内共享：
+读取方直接拿当前快照(无锁)，快照每隔 CONFIG_CACHE_REFRESH_SECONDS 用一次查询比较
+data_versions 版本号与 COUNT/MAX(updated_at)(后者覆盖绕过应用直接改表的情况)，有变化才整表重新加载；
+任何提交了 SystemConfig 改动的会话(含 ConfigBatch 批量更新)在同一事务中递增版本号，
+并立即使本进程的快照失效(见 app.db.change_hooks)
+"""
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.change_hooks import data_version, version_hook
+from app.models.config import SystemConfig
+from app.schemas.config import ConfigBatch
+
+logger = logging.getLogger(__name__)
+
+_TRUE_VALUES = ("true", "1", "yes")
+
+# data_versions 中配置的版本名
+CONFIG_VERSION = "system_configs"
+
+
+def parse_config_value(value: str, value_type: Optional[str]) -> Any:
+    """
+    按 value_type 解析配置值
+
+    Raises:
+        ValueError: 值与类型不符
+    """
+    value_type = (value_type or "string").lower()
+    if value_type in ("int", "integer"):
+        return int(value)
+    if value_type == "float":
+        return float(value)
+    if value_type in ("bool", "boolean"):
+        return value.strip().lower() in _TRUE_VALUES
+    if value_type == "json":
+        return json.loads(value)
+    return value
+
+
+def format_config_value(value: Any, value_type: Optional[str]) -> str:
+    """
+    把接口传入的值转为存储字符串
+
+    json 类型的对象/数组/数字等按 JSON 编码(字符串视为已编码的 JSON 原文)，其他类型取 str
+    """
+    if (value_type or "").lower() == "json" and not isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class ConfigSnapshot:
+    """
+    某一时刻全部启用配置的只读快照
+
+    values 为解析后的值，raw 为原始字符串(类型不符时 get_int/get_bool 按原文再解析一次，
+    与之前逐条查询时的行为一致)
+    """
+
+    __slots__ = ("values", "raw", "version", "fingerprint", "loaded_at")
+
+    def __init__(self, values: Dict[str, Any], raw: Dict[str, str], version: int, fingerprint: Tuple):
+        self.values: Mapping[str, Any] = MappingProxyType(values)
+        self.raw: Mapping[str, str] = MappingProxyType(raw)
+        self.version = version
+        self.fingerprint = fingerprint
+        self.loaded_at = datetime.now()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+    def get_int(self, key: str, default: int) -> int:
+        value = self.values.get(key)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        try:
+            return int(self.raw[key])
+        except (KeyError, ValueError):
+            return default
+
+    def get_bool(self, key: str, default: bool) -> bool:
+        value = self.values.get(key)
+        if isinstance(value, bool):
+            return value
+        if key not in self.raw:
+            return default
+        return self.raw[key].lower() in _TRUE_VALUES
+
+
+class ConfigCache:
+    """
+    进程内配置快照缓存
+
+    version 在本进程提交配置改动时递增；快照版本落后或超过检查间隔时才访问数据库，
+    其余情况 get() 只是一次属性读取
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._version = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, db: Session) -> ConfigSnapshot:
+        """返回当前快照，必要时用 db 校验/重新加载"""
+        snapshot = self._snapshot
+        if (
+                snapshot is not None
+                and snapshot.version == self._version
+                and time.monotonic() - self._checked_at < settings.CONFIG_CACHE_REFRESH_SECONDS
+        ):
+            return snapshot
+        return self._refresh(db)
+
+    def invalidate(self) -> None:
+        """配置已修改，下次读取时重新加载"""
+        with self._lock:
+            self._version += 1
+
+    def _refresh(self, db: Session) -> ConfigSnapshot:
+        with self._lock:
+            version = self._version
+            fingerprint = tuple(db.execute(select(
+                data_version(CONFIG_VERSION), func.count(SystemConfig.id), func.max(SystemConfig.updated_at)
+            )).one())
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version or snapshot.fingerprint != fingerprint:
+                snapshot = self._load(db, version, fingerprint)
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    @staticmethod
+    def _load(db: Session, version: int, fingerprint: Tuple) -> ConfigSnapshot:
+        values: Dict[str, Any] = {}
+        raw: Dict[str, str] = {}
+        rows = db.execute(
+            select(SystemConfig.config_key, SystemConfig.config_value, SystemConfig.value_type)
+            .where(SystemConfig.is_active.is_(True))
+        ).all()
+        for key, value, value_type in rows:
+            raw[key] = value
+            try:
+                values[key] = parse_config_value(value, value_type)
+            except ValueError:
+                logger.warning("config %s is not a valid %s: %r", key, value_type, value)
+        return ConfigSnapshot(values, raw, version, fingerprint)
+
+
+# 进程内单例
+config_cache = ConfigCache()
+
+
+def get_config_snapshot(db: Session) -> ConfigSnapshot:
+    """获取当前配置快照的便捷函数"""
+    return config_cache.get(db)
+
+
+class ConfigService:
+    """系统配置读写"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_configs(self, category: Optional[str] = None) -> List[SystemConfig]:
+        query = self.db.query(SystemConfig)
+        if category:
+            query = query.filter(SystemConfig.category == category)
+        return query.order_by(SystemConfig.category, SystemConfig.config_key).all()
+
+    def update_batch(self, batch: ConfigBatch, user_id: Optional[int] = None) -> List[Tuple[str, str, str]]:
+        """
+        批量更新配置值，一次提交
+
+        Args:
+            batch: {key: value}
+            user_id: 修改人
+
+        Returns:
+            实际发生变化的 (key, 旧值, 新值) 列表
+
+        Raises:
+            KeyError: 配置不存在
+            PermissionError: 配置不可编辑
+            ValueError: 值与 value_type 不符
+        """
+        configs = {
+            config.config_key: config
+            for config in self.db.query(SystemConfig).filter(SystemConfig.config_key.in_(list(batch.configs)))
+        }
+        values = {}
+        for key, value in batch.configs.items():
+            config = configs.get(key)
+            if config is None:
+                raise KeyError(key)
+            if not config.is_editable:
+                raise PermissionError(key)
+            values[key] = format_config_value(value, config.value_type)
+            parse_config_value(values[key], config.value_type)
+
+        now = datetime.now()
+        changes = []
+        for key, value in values.items():
+            config = configs[key]
+            if config.config_value == value:
+                continue
+            changes.append((key, config.config_value, value))
+            config.config_value = value
+            config.last_modified_by = user_id
+            config.last_modified_at = now
+        # 提交时由 after_commit 钩子使快照失效
+        self.db.commit()
+        return changes
+
+
+# 对所有会话生效: 任何写入 SystemConfig 的提交都会递增版本号并使快照失效
+version_hook(CONFIG_VERSION, [SystemConfig], config_cache.invalidate)
@@ -0,0 +1,117 @@
+"""
+日志事件分类服务 - Event Classification Service
+
+按 logs.event_type 统计各类事件，并为该列上线前写入的历史行回填事件类型
+
+回填命令(在 backend 目录下，可重复执行，已分类的行会被跳过):
+    python -m app.services.event_classification --batch-size 5000
+"""
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.log import Log
+from app.utils.event_classifier import classify_event
+
+
+class EventClassificationService:
+    """事件类型统计与历史数据回填"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def event_counts(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> dict:
+        """
+        按事件类型统计日志条数(走 event_type + timestamp 组合索引)
+
+        Returns:
+            {事件类型: 条数}，尚未回填的历史行计入 UNCLASSIFIED
+        """
+        conditions = []
+        if start_time is not None:
+            conditions.append(Log.timestamp >= start_time)
+        if end_time is not None:
+            conditions.append(Log.timestamp <= end_time)
+        rows = self.db.execute(
+            select(Log.event_type, func.count(Log.id)).where(and_(*conditions)).group_by(Log.event_type)
+        ).all()
+        return {
+            (event_type.value if event_type is not None else "UNCLASSIFIED"): count
+            for event_type, count in rows
+        }
+
+    def backfill(self, batch_size: Optional[int] = None, max_rows: Optional[int] = None) -> dict:
+        """
+        为 event_type 为空的历史行写入事件类型
+
+        按主键分批(keyset)扫描，每批一次批量 UPDATE 并提交，可随时中断后重新执行
+
+        Args:
+            batch_size: 每批行数，默认 INGEST_BATCH_SIZE
+            max_rows: 最多处理的行数，None 表示全部
+
+        Returns:
+            本次处理的行数及各事件类型的条数
+        """
+        batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        report = {"classified": 0, "by_event_type": defaultdict(int)}
+        last_id = 0
+        while max_rows is None or report["classified"] < max_rows:
+            limit = batch_size if max_rows is None else min(batch_size, max_rows - report["classified"])
+            rows = self.db.execute(
+                select(Log.id, Log.message)
+                .where(Log.id > last_id, Log.event_type.is_(None))
+                .order_by(Log.id)
+                .limit(limit)
+            ).all()
+            if not rows:
+                break
+
+            updates = []
+            for log_id, message in rows:
+                event_type = classify_event(message)
+                updates.append({"id": log_id, "event_type": event_type})
+                report["by_event_type"][event_type.value] += 1
+            self.db.execute(update(Log), updates)
+            self.db.commit()
+
+            report["classified"] += len(rows)
+            last_id = rows[-1].id
+        report["by_event_type"] = dict(report["by_event_type"])
+        return report
+
+
+def get_event_counts(
+        db: Session,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+) -> dict:
+    """按事件类型统计的便捷函数"""
+    return EventClassificationService(db).event_counts(start_time, end_time)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="为 logs 历史行回填 event_type")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批行数")
+    parser.add_argument("--max-rows", type=int, default=None, help="最多处理的行数")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        service = EventClassificationService(db)
+        result = service.backfill(args.batch_size, args.max_rows)
+        print(json.dumps({"backfill": result, "events": service.event_counts()}, ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+异步写入缓冲 - Write-behind Ingest Buffer
+
+开启 INGEST_ASYNC_ENABLED 后，POST /logs 与 POST /logs/batch 只把校验通过的记录放入
+进程内有界队列并立即返回 202；后台线程按条数或时间阈值把队列成组写入 logs 表。
+队列满时拒绝新记录(接口返回 503 + Retry-After)，而不是让请求堆积拖垮数据库连接池
+"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Deque, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IngestBufferFull(Exception):
+    """缓冲队列已满"""
+
+
+@dataclass
+class IngestBufferStats:
+    """
+    缓冲区运行指标
+
+    dropped 为未能写入的记录数: 队列已满被拒绝的，加上已接收但最终写库失败
+    而丢弃的(dead_lettered，单条重试仍失败或停止时写库失败)
+    """
+    queue_depth: int = 0
+    queue_capacity: int = 0
+    accepted: int = 0
+    flushed: int = 0
+    dropped: int = 0
+    dead_lettered: int = 0
+    flush_count: int = 0
+    flush_errors: int = 0
+    last_flush_rows: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    oldest_record_age_ms: float = 0.0
+
+
+class IngestBuffer:
+    """
+    有界写入队列 + 后台成组提交线程
+
+    - offer: 整批入队，队列剩余空间不足时整批拒绝并计入 dropped
+    - 后台线程在积累到 flush_size 条或最早记录等待超过 flush_interval 时写库，
+      每次写库为一条多行 INSERT + 一次提交
+    - 写库失败时退避重试同一批(不放回队列，队列容量不受影响)；连续失败 max_retries 次后
+      对半拆分逐段写入，单条仍失败的记录写入错误日志后丢弃，避免一条坏记录永久阻塞队列
+    - 停止过程中写库失败时不再重试，该批与队列中剩余的记录计入 dropped
+    """
+
+    def __init__(
+            self,
+            max_records: Optional[int] = None,
+            flush_size: Optional[int] = None,
+            flush_interval_ms: Optional[int] = None,
+            max_retries: Optional[int] = None
+    ):
+        self.max_records = max_records or settings.INGEST_QUEUE_MAX_RECORDS
+        self.flush_size = flush_size or settings.INGEST_FLUSH_BATCH_SIZE
+        self.flush_interval = (flush_interval_ms or settings.INGEST_FLUSH_INTERVAL_MS) / 1000
+        self.max_retries = settings.INGEST_FLUSH_MAX_RETRIES if max_retries is None else max_retries
+        self._queue: Deque[dict] = deque()
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.stats = IngestBufferStats(queue_capacity=self.max_records)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def offer(self, rows: List[dict]) -> None:
+        """
+        整批放入队列
+
+        Raises:
+            IngestBufferFull: 队列剩余空间不足
+        """
+        if not rows:
+            return
+        with self._cond:
+            if len(self._queue) + len(rows) > self.max_records:
+                self.stats.dropped += len(rows)
+                raise IngestBufferFull()
+            was_empty = not self._queue
+            if was_empty:
+                self._oldest = time.monotonic()
+            self._queue.extend(rows)
+            self.stats.accepted += len(rows)
+            # 空队列收到首批记录时唤醒线程开始计时，攒满一批时唤醒立即写库
+            if was_empty or len(self._queue) >= self.flush_size:
+                self._cond.notify()
+
+    def start(self) -> None:
+        """启动后台写库线程"""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ingest-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """停止后台线程，退出前写完队列中剩余的记录"""
+        if not self.running:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("ingest buffer did not drain within %.0fs, %d rows still queued", timeout, len(self._queue))
+        self._thread = None
+
+    def snapshot(self) -> dict:
+        """当前指标快照"""
+        with self._cond:
+            self.stats.queue_depth = len(self._queue)
+            self.stats.queue_capacity = self.max_records
+            self.stats.oldest_record_age_ms = (
+                (time.monotonic() - self._oldest) * 1000 if self._queue and self._oldest else 0.0
+            )
+            return asdict(self.stats)
+
+    def _take_batch(self) -> List[dict]:
+        """等待触发条件并取出一批记录(持锁时间只包含出队)"""
+        with self._cond:
+            while not self._stopping:
+                if len(self._queue) >= self.flush_size:
+                    break
+                if self._queue:
+                    remaining = self.flush_interval - (time.monotonic() - self._oldest)
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+
+            count = min(len(self._queue), self.flush_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            self._oldest = time.monotonic() if self._queue else None
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self._stopping:
+                    return
+                continue
+            if not self._flush(batch):
+                self._drop_queued()
+                return
+
+    def _flush(self, batch: List[dict]) -> bool:
+        """
+        写入一批记录，失败时退避重试，超过 max_retries 次后拆分写入
+
+        Returns:
+            停止过程中写库失败(该批已丢弃)时返回 False
+        """
+        backoff = 0.5
+        for attempt in range(self.max_retries + 1):
+            if self._write(batch):
+                return True
+            if self._stopping:
+                self._dead_letter(batch, "buffer stopping")
+                return False
+            if attempt < self.max_retries:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+        self._split(batch)
+        return True
+
+    def _split(self, batch: List[dict]) -> None:
+        """对半拆分逐段写入，定位并丢弃无法写入的单条记录"""
+        if len(batch) == 1:
+            self._dead_letter(batch, "insert failed after retries")
+            return
+        middle = len(batch) // 2
+        for part in (batch[:middle], batch[middle:]):
+            if not self._write(part):
+                self._split(part)
+
+    def _write(self, batch: List[dict]) -> bool:
+        """一条多行 INSERT + 一次提交，成功后对新日志做告警检查"""
+        # 延迟导入，避免模块加载时创建数据库连接
+        from app.db.session import SessionLocal
+        from app.services.alert_engine import check_ingested_rows
+        from app.services.log_ingest import bulk_insert_logs
+
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            ids = bulk_insert_logs(db, batch)
+            db.commit()
+        except Exception as exc:  # noqa: BLE001
+            db.rollback()
+            db.close()
+            self.stats.flush_errors += 1
+            logger.warning("ingest buffer flush of %d rows failed: %s", len(batch), exc)
+            return False
+
+        elapsed = (time.perf_counter() - started) * 1000
+        try:
+            # 日志已提交，告警检查失败不会导致重新写入
+            check_ingested_rows(db, batch, ids)
+        except Exception:  # noqa: BLE001
+            logger.exception("alert check after ingest buffer flush failed")
+        finally:
+            db.close()
+
+        self.stats.flushed += len(batch)
+        self.stats.flush_count += 1
+        self.stats.last_flush_rows = len(batch)
+        self.stats.last_flush_ms = round(elapsed, 2)
+        self.stats.max_flush_ms = round(max(self.stats.max_flush_ms, elapsed), 2)
+        return True
+
+    def _dead_letter(self, rows: List[dict], reason: str) -> None:
+        """丢弃无法写入的记录: 原样写入错误日志并计入 dropped"""
+        for row in rows:
+            logger.error("ingest buffer dropped row (%s): %r", reason, row)
+        self.stats.dropped += len(rows)
+        self.stats.dead_lettered += len(rows)
+
+    def _drop_queued(self) -> None:
+        """停止过程中放弃写库，队列中剩余的记录计入 dropped"""
+        with self._cond:
+            rows = list(self._queue)
+            self._queue.clear()
+            self._oldest = None
+        if rows:
+            self._dead_letter(rows, "buffer stopping")
+
+
+# 进程内单例，由 main.py 在启动/退出时 start/stop
+ingest_buffer = IngestBuffer()
+
+
+def start_ingest_buffer() -> None:
+    if settings.INGEST_ASYNC_ENABLED:
+        ingest_buffer.start()
+
+
+def stop_ingest_buffer() -> None:
+    ingest_buffer.stop()
@@ -0,0 +1,267 @@
+"""
+上传去重 - Log Dedup
+
+对 (source, timestamp, raw_data) 计算 64 位指纹，先查进程内布隆过滤器，
+只有可能重复的指纹才到 log_fingerprints 表确认；新指纹先于日志在同一事务中写入，
+写入成功的行才入库，重复日志在写库前丢弃
+"""
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from typing import List, Optional, Sequence, Set
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.log import LogFingerprint, LogSourceEnum
+from app.utils.parser import Buffer
+
+logger = logging.getLogger(__name__)
+
+# 确认重复时 IN 查询每次携带的指纹数
+_LOOKUP_CHUNK = 1000
+# 清理过期指纹时每批删除的条数
+_PRUNE_CHUNK = 5000
+_MASK32 = 0xFFFFFFFF
+
+
+def log_fingerprint(source: LogSourceEnum, timestamp: datetime, raw: Buffer) -> int:
+    """
+    计算日志指纹(64 位有符号整数，可直接存入 BIGINT)
+
+    时间戳参与哈希: syslog 类格式行内不含年份，同一行文本在不同年份是不同事件
+    """
+    h = blake2b(source.value.encode(), digest_size=8)
+    h.update(timestamp.isoformat().encode())
+    h.update(b"\0")
+    h.update(raw)
+    return int.from_bytes(h.digest(), "little", signed=True)
+
+
+class BloomFilter:
+    """
+    定长布隆过滤器
+
+    位数组大小由设计容量和误判率决定，之后不再增长；
+    k 个位置由指纹高低 32 位双重哈希得到，不再额外计算哈希
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    # 位置计算在 add/__contains__ 中内联，省去每行一次函数调用
+    def add(self, fingerprint: int) -> None:
+        h1 = fingerprint & _MASK32
+        h2 = ((fingerprint >> 32) & _MASK32) | 1
+        size, bits = self.size, self.bits
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % size
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, fingerprint: int) -> bool:
+        h1 = fingerprint & _MASK32
+        h2 = ((fingerprint >> 32) & _MASK32) | 1
+        size, bits = self.size, self.bits
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class LogDeduplicator:
+    """
+    布隆过滤器 + 指纹表的两级去重
+
+    - 布隆过滤器未命中: 本进程未见过的指纹，无需查询，直接尝试写入指纹表(绝大多数行走这条路径)
+    - 布隆过滤器命中: 批量 IN 查询 log_fingerprints 确认，误判只增加一次查询，不会误删
+    - 新指纹以普通 INSERT 先于日志写入，主键冲突(其他会话/进程已写入同一指纹)时
+      调用方回滚本批并以 verify_all 重试，因此同一日志只会有一个事务写入成功
+    - 过滤器由后台线程从指纹表重建(start_loading)，不占用上传请求；重建完成前
+      所有指纹都到指纹表确认；超过设计容量后误判率上升，但结果仍由指纹表保证正确
+    - 去重窗口为 INGEST_DEDUP_WINDOW_DAYS：同一线程定期清理写入时间超出窗口的指纹，
+      指纹表大小与窗口内的上传量相关，不随时间无限增长；窗口之外重传的日志会再次入库
+    """
+
+    def __init__(self, capacity: Optional[int] = None, error_rate: Optional[float] = None):
+        self.bloom = BloomFilter(
+            capacity or settings.INGEST_DEDUP_BLOOM_CAPACITY,
+            error_rate or settings.INGEST_DEDUP_BLOOM_ERROR_RATE,
+        )
+        self._loaded = False
+        self._loading = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def start_loading(self) -> None:
+        """启动后台线程从指纹表重建布隆过滤器(进程内只执行一次)"""
+        with self._lock:
+            if self._loaded or self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._maintain, name="dedup-maintenance", daemon=True).start()
+
+    def _maintain(self) -> None:
+        """后台线程: 重建布隆过滤器，之后按 INGEST_DEDUP_PRUNE_INTERVAL_SECONDS 清理过期指纹"""
+        # 延迟导入，避免模块加载时创建数据库连接
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            self.load(db)
+        except Exception:  # noqa: BLE001
+            logger.exception("rebuilding dedup bloom filter failed, fingerprints are verified against the table")
+        finally:
+            db.close()
+            self._loading = False
+
+        while settings.INGEST_DEDUP_WINDOW_DAYS > 0:
+            db = SessionLocal()
+            try:
+                self.prune(db)
+            except Exception:  # noqa: BLE001
+                db.rollback()
+                logger.exception("pruning expired log fingerprints failed")
+            finally:
+                db.close()
+            time.sleep(settings.INGEST_DEDUP_PRUNE_INTERVAL_SECONDS)
+
+    def load(self, db: Session) -> None:
+        """从指纹表重建布隆过滤器(只加载去重窗口内的指纹)，分块加入(与 claim 并发时不丢位)"""
+        if self._loaded:
+            return
+        query = select(LogFingerprint.fingerprint)
+        cutoff = _window_start()
+        if cutoff is not None:
+            query = query.where(LogFingerprint.created_at >= cutoff)
+        rows = db.execute(query.execution_options(yield_per=10000))
+        add = self.bloom.add
+        for chunk in rows.partitions():
+            with self._lock:
+                for (fingerprint,) in chunk:
+                    add(fingerprint)
+        self._loaded = True
+
+    def filter(self, db: Session, fingerprints: Sequence[int], verify_all: bool = False) -> List[bool]:
+        """
+        判断一批指纹是否为新日志
+
+        同一批内重复出现的指纹只保留第一条；过滤器未重建完成或 verify_all 时
+        全部指纹都到指纹表确认
+
+        Returns:
+            与 fingerprints 一一对应，True 表示需要写入
+        """
+        if verify_all or not self._loaded:
+            candidates = list(fingerprints)
+        else:
+            bloom = self.bloom
+            candidates = [fp for fp in fingerprints if fp in bloom]
+        existing = self._lookup(db, candidates) if candidates else set()
+
+        keep = []
+        seen: Set[int] = set()
+        for fp in fingerprints:
+            if fp in existing or fp in seen:
+                keep.append(False)
+            else:
+                seen.add(fp)
+                keep.append(True)
+        return keep
+
+    def claim(self, db: Session, fingerprints: Sequence[int], verify_all: bool = False) -> List[bool]:
+        """
+        判断一批指纹是否为新日志，并在当前事务中写入新指纹(不提交)、加入布隆过滤器
+
+        调用方应在同一事务中只写入返回 True 的行
+
+        Returns:
+            与 fingerprints 一一对应，True 表示指纹写入成功、该行需要写入
+
+        Raises:
+            IntegrityError: 指纹已被其他会话写入(如并发上传同一文件)，调用方回滚后以 verify_all=True 重试
+        """
+        keep = self.filter(db, fingerprints, verify_all)
+        new = [fp for fp, k in zip(fingerprints, keep) if k]
+        if new:
+            db.execute(insert(LogFingerprint).values([{"fingerprint": fp} for fp in new]))
+
+            # 事务若回滚，过滤器中多出的位只会造成误判，由指纹表兜底
+            with self._lock:
+                for fp in new:
+                    self.bloom.add(fp)
+        return keep
+
+    @staticmethod
+    def prune(db: Session, now: Optional[datetime] = None) -> int:
+        """
+        分批删除写入时间早于去重窗口的指纹并提交，窗口为 0 时不清理
+
+        过期指纹留在布隆过滤器中的位只会造成误判(多一次查询)，不影响结果
+
+        Returns:
+            删除的指纹数
+        """
+        cutoff = _window_start(now)
+        if cutoff is None:
+            return 0
+        deleted = 0
+        while True:
+            chunk = list(db.scalars(
+                select(LogFingerprint.fingerprint).where(LogFingerprint.created_at < cutoff).limit(_PRUNE_CHUNK)
+            ))
+            if not chunk:
+                return deleted
+            db.execute(delete(LogFingerprint).where(LogFingerprint.fingerprint.in_(chunk)))
+            db.commit()
+            deleted += len(chunk)
+
+    @staticmethod
+    def _lookup(db: Session, fingerprints: List[int]) -> Set[int]:
+        found: Set[int] = set()
+        unique = list(set(fingerprints))
+        for i in range(0, len(unique), _LOOKUP_CHUNK):
+            chunk = unique[i:i + _LOOKUP_CHUNK]
+            found.update(db.scalars(
+                select(LogFingerprint.fingerprint).where(LogFingerprint.fingerprint.in_(chunk))
+            ))
+        return found
+
+
+def _window_start(now: Optional[datetime] = None) -> Optional[datetime]:
+    """去重窗口起点，窗口为 0(永久保留)时返回 None"""
+    days = settings.INGEST_DEDUP_WINDOW_DAYS
+    if days <= 0:
+        return None
+    return (now or datetime.now()) - timedelta(days=days)
+
+
+_deduplicator: Optional[LogDeduplicator] = None
+
+
+def get_deduplicator() -> Optional[LogDeduplicator]:
+    """获取进程内去重器，未开启 INGEST_DEDUP_ENABLED 时返回 None"""
+    global _deduplicator
+    if not settings.INGEST_DEDUP_ENABLED:
+        return None
+    if _deduplicator is None:
+        _deduplicator = LogDeduplicator()
+        _deduplicator.start_loading()
+    return _deduplicator
+
+
+def start_deduplicator() -> None:
+    """应用启动时创建去重器并在后台重建布隆过滤器(未开启去重时不做任何事)"""
+    get_deduplicator()
+
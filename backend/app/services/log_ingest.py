@@ -0,0 +1,455 @@
+"""
+日志入库服务 - Log Ingest Service
+
+负责上传日志文件的流式读取(或 mmap 扫描)、逐行解析与分批写入
+"""
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+import mmap
+import os
+import shutil
+import tempfile
+from weakref import WeakKeyDictionary
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.models.config import ConfigKeys
+from app.models.log import (
+    Log,
+    LogSourceEnum,
+    LogLevelEnum,
+    LogIngestTypeEnum,
+    LogParseStatusEnum,
+)
+from app.services.alert_engine import check_ingested_rows
+from app.services.config_service import get_config_snapshot
+from app.services.log_dedup import LogDeduplicator, get_deduplicator, log_fingerprint
+from app.services.query_cache import note_ingested
+from app.utils.compression import (
+    CompressedDataError,
+    DecompressedSizeExceeded,
+    detect_compression,
+    open_decompressed,
+)
+from app.utils.event_classifier import classify_event
+from app.utils.parser import Buffer, LogParser, ParsedLog, detect_parser, iter_line_spans
+from app.utils.raw_codec import encode_raw_data
+
+# 压缩文件读取中断的原因(IngestResult.error)
+INGEST_ERROR_CORRUPT = "corrupt"
+INGEST_ERROR_TOO_LARGE = "too_large"
+
+# 写入指纹与并发上传冲突时本批的最多尝试次数
+FINGERPRINT_CLAIM_ATTEMPTS = 3
+
+# 与 logs 表字段长度保持一致
+MESSAGE_MAX_LENGTH = 1024
+IP_MAX_LENGTH = 45
+USER_NAME_MAX_LENGTH = 64
+
+
+@dataclass
+class IngestResult:
+    """
+    入库结果统计，duplicates 为去重丢弃的条数(不计入 inserted)
+
+    truncated 表示压缩文件在读取中途出错而提前结束，此前的批次已提交，
+    error 为中断原因(INGEST_ERROR_*)
+    """
+    inserted: int = 0
+    failed: int = 0
+    duplicates: int = 0
+    truncated: bool = False
+    error: Optional[str] = None
+
+    @property
+    def processed(self) -> int:
+        """已处理的行数(含失败与重复)"""
+        return self.inserted + self.failed + self.duplicates
+
+    def as_dict(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "truncated": self.truncated,
+            "error": self.error,
+        }
+
+
+class LogIngestService:
+    """
+    日志文件入库服务
+
+    凑满一批行后整批解析、一次性写入并提交，内存占用只与块大小和批大小有关，
+    与文件大小无关；解析器由第一批样本行自动识别，之后整份文件复用
+
+    两种读取方式:
+    - ingest_stream: 按块读取文件对象(小文件/无法落盘的流)
+    - ingest_file: 对落盘文件 mmap，按偏移切行并直接在映射内存上匹配，不复制整行
+    """
+
+    def __init__(
+            self,
+            db: Session,
+            source: LogSourceEnum,
+            ingest_type: LogIngestTypeEnum = LogIngestTypeEnum.FILE,
+            batch_size: Optional[int] = None,
+            dedup: Optional[LogDeduplicator] = None
+    ):
+        self.db = db
+        self.source = source
+        self.ingest_type = ingest_type
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.dedup = dedup
+        self.parser: Optional[LogParser] = None
+        self.result = IngestResult()
+        self._lines: List[bytes] = []
+
+    def ingest_stream(self, stream: BinaryIO) -> IngestResult:
+        """
+        从二进制流中按块读取并入库全部日志
+
+        解压流读取中途损坏或超过解压大小限制时停止读取：已切出的完整行照常入库，
+        未读完的半行丢弃，结果标记 truncated 与中断原因，不抛出异常
+
+        Args:
+            stream: 可按字节读取的文件对象
+
+        Returns:
+            入库结果统计
+        """
+        try:
+            for line in self._iter_lines(stream):
+                self.add_line(line)
+        except DecompressedSizeExceeded:
+            self._mark_truncated(INGEST_ERROR_TOO_LARGE)
+        except CompressedDataError:
+            self._mark_truncated(INGEST_ERROR_CORRUPT)
+        self.flush()
+        return self.result
+
+    def _mark_truncated(self, error: str) -> None:
+        self.result.truncated = True
+        self.result.error = error
+
+    def ingest_file(self, path: str) -> IngestResult:
+        """
+        通过 mmap 入库落盘文件
+
+        行切分只计算偏移，正则直接匹配映射内存，原始行以 memoryview 切片传递，
+        只在写入 raw_data 时解码一次
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            入库结果统计
+        """
+        if os.path.getsize(path) == 0:
+            return self.result
+
+        max_line = settings.INGEST_MAX_LINE_BYTES
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                spans: List[Tuple[int, int]] = []
+                for span in iter_line_spans(mm, 0, len(mm), max_line):
+                    if span is None:
+                        self.result.failed += 1
+                        continue
+                    spans.append(span)
+                    if len(spans) >= self.batch_size:
+                        self._flush_spans(mm, view, spans)
+                        spans = []
+                self._flush_spans(mm, view, spans)
+            finally:
+                view.release()
+        return self.result
+
+    def add_line(self, line: Optional[bytes]) -> None:
+        """加入一行到待处理批次(None 表示超长行，直接记为失败)"""
+        if line is None:
+            self.result.failed += 1
+            return
+
+        self._lines.append(line)
+        if len(self._lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """解析并写入当前批次，每批一次提交"""
+        if not self._lines:
+            return
+
+        lines, self._lines = self._lines, []
+        if self.parser is None:
+            self.parser = detect_parser(lines, preferred=self.source)
+        self.write_batch(lines, self.parser.parse_batch(lines))
+
+    def _flush_spans(self, mm: mmap.mmap, view: memoryview, spans: List[Tuple[int, int]]) -> None:
+        if not spans:
+            return
+        lines = [view[start:stop] for start, stop in spans]
+        try:
+            if self.parser is None:
+                self.parser = detect_parser(lines, preferred=self.source)
+            self.write_batch(lines, self.parser.parse_spans(mm, spans))
+        finally:
+            # 切片未释放时关闭映射会抛出 BufferError，掩盖写入失败的原始异常
+            for line in lines:
+                line.release()
+
+    def write_batch(self, lines: Sequence[Buffer], parsed: Sequence[Optional[ParsedLog]]) -> None:
+        """
+        写入一批已解析的行并提交
+
+        Args:
+            lines: 原始行(bytes 或 memoryview)
+            parsed: 与 lines 一一对应的解析结果，None 表示解析失败
+        """
+        rows = []
+        inserted = 0
+        fingerprints = []
+        store_failed = settings.INGEST_STORE_FAILED_LINES
+        dedup = self.dedup
+        for line, item in zip(lines, parsed):
+            if item is not None:
+                rows.append(self._build_row(item, line))
+                inserted += 1
+                if dedup is not None:
+                    fingerprints.append((len(rows) - 1, log_fingerprint(self.source, item.timestamp, line)))
+            else:
+                self.result.failed += 1
+                if store_failed:
+                    rows.append(self._failed_row(line))
+
+        # 只对解析成功的行去重: 失败行的时间戳是入库时间，无法判断是否重复
+        if fingerprints:
+            keep = self._claim_fingerprints([fp for _, fp in fingerprints])
+            dropped = {index for (index, _), k in zip(fingerprints, keep) if not k}
+            if dropped:
+                rows = [row for i, row in enumerate(rows) if i not in dropped]
+                inserted -= len(dropped)
+                self.result.duplicates += len(dropped)
+
+        if rows:
+            ids = bulk_insert_logs(self.db, rows)
+            self.db.commit()
+            check_ingested_rows(self.db, rows, ids)
+        self.result.inserted += inserted
+
+    def _claim_fingerprints(self, fingerprints: List[int]) -> List[bool]:
+        """
+        在本批事务中先写入新指纹，返回每行是否需要写入
+
+        指纹与其他会话冲突时回滚本批(此时事务中只有指纹)，全部指纹到指纹表确认后重试
+        """
+        for attempt in range(FINGERPRINT_CLAIM_ATTEMPTS):
+            try:
+                return self.dedup.claim(self.db, fingerprints, verify_all=attempt > 0)
+            except IntegrityError:
+                self.db.rollback()
+                if attempt == FINGERPRINT_CLAIM_ATTEMPTS - 1:
+                    raise
+
+    def _build_row(self, parsed: ParsedLog, raw: Buffer) -> dict:
+        message = parsed.message[:MESSAGE_MAX_LENGTH]
+        return {
+            "source": self.source,
+            "level": parsed.level,
+            "timestamp": parsed.timestamp,
+            "ip": parsed.ip[:IP_MAX_LENGTH] if parsed.ip else None,
+            "user_name": parsed.user_name[:USER_NAME_MAX_LENGTH] if parsed.user_name else None,
+            "message": message,
+            "event_type": classify_event(message),
+            "raw_data": str(raw, "utf-8", "replace"),
+            "ingest_type": self.ingest_type,
+            "parse_status": LogParseStatusEnum.OK,
+        }
+
+    def _failed_row(self, raw: Buffer) -> dict:
+        text = str(raw, "utf-8", "replace")
+        return {
+            "source": self.source,
+            "level": LogLevelEnum.INFO,
+            "timestamp": datetime.now(),
+            "ip": None,
+            "user_name": None,
+            "message": text[:MESSAGE_MAX_LENGTH],
+            "event_type": classify_event(text[:MESSAGE_MAX_LENGTH]),
+            "raw_data": text,
+            "ingest_type": self.ingest_type,
+            "parse_status": LogParseStatusEnum.FAILED,
+        }
+
+    @staticmethod
+    def _iter_lines(stream: BinaryIO) -> Iterator[Optional[bytes]]:
+        """
+        按块读取并切分行，规则与 iter_line_spans 一致
+
+        跨块的半行保存在 carry 中；单行超过 INGEST_MAX_LINE_BYTES 时
+        丢弃到下一个换行符为止，并产出 None 作为失败标记
+        """
+        chunk_size = settings.INGEST_READ_CHUNK_SIZE
+        max_line = settings.INGEST_MAX_LINE_BYTES
+        carry = b""
+        skipping = False
+
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            buf = carry + chunk if carry else chunk
+            last_nl = buf.rfind(b"\n")
+            if last_nl < 0:
+                carry = buf
+            else:
+                start = 0
+                if skipping:
+                    start = buf.find(b"\n") + 1
+                    skipping = False
+                for span in iter_line_spans(buf, start, last_nl, max_line):
+                    yield None if span is None else buf[span[0]:span[1]]
+                carry = buf[last_nl + 1:]
+            if len(carry) > max_line:
+                if not skipping:
+                    yield None
+                skipping = True
+                carry = b""
+
+        if carry and not skipping:
+            for span in iter_line_spans(carry, 0, len(carry), max_line):
+                yield None if span is None else carry[span[0]:span[1]]
+
+
+def bulk_insert_logs(db: Session, rows: List[dict]) -> List[int]:
+    """
+    以单条多行 INSERT 写入一批日志(不提交)
+
+    rows 中的 raw_data 按 LOG_RAW_DATA_COMPRESSION 原地转换为原文或压缩存储字段
+    (已转换过的行不再处理，写入失败后可原样重试)
+
+    Args:
+        db: 数据库会话
+        rows: logs 表字段字典列表
+
+    Returns:
+        与 rows 一一对应的日志ID
+    """
+    if not rows:
+        return []
+    for row in rows:
+        if "raw_data" in row:
+            row.update(encode_raw_data(row.pop("raw_data"), row["source"]))
+    result = db.execute(insert(Log).values(rows))
+    last_id = result.lastrowid
+    bind = db.get_bind()
+    if bind.dialect.name == "sqlite":
+        # SQLite 单写者，lastrowid 是最后一行的ID
+        ids = list(range(last_id - len(rows) + 1, last_id + 1))
+    else:
+        # lastrowid 是第一行的ID，其余ID按 auto_increment_increment 递增(见 _mysql_autoinc_increment)
+        step = _mysql_autoinc_increment(db)
+        ids = list(range(last_id, last_id + len(rows) * step, step))
+    # 只记录本批最大ID；会话提交后(after_commit)才推进入库水位，回滚则丢弃
+    note_ingested(db, ids[-1])
+    return ids
+
+
+# engine -> auto_increment_increment，每个连接池只查询一次
+_AUTOINC_INCREMENTS: "WeakKeyDictionary[Engine, int]" = WeakKeyDictionary()
+
+
+def _mysql_autoinc_increment(db: Session) -> int:
+    """
+    确认多行 INSERT 的自增ID连续，返回相邻ID的步长
+
+    单条多行 INSERT ... VALUES 是 InnoDB 的 "simple insert"：行数在执行前确定，
+    innodb_autoinc_lock_mode 为 0/1 时在表级自增锁下、为 2(MySQL 8 默认)时在自增互斥量下一次分配全部ID，
+    并发写入只会让不同语句之间出现空洞，同一语句的ID始终以 auto_increment_increment 为步长连续；
+    只有 INSERT ... SELECT / LOAD DATA 等 bulk insert 在模式 2 下才可能交错，入库不使用这类语句。
+    其他取值(未知的锁模式)无法保证，直接报错而不是写入错误的告警关联
+
+    Raises:
+        RuntimeError: innodb_autoinc_lock_mode 不是 0/1/2
+    """
+    engine = db.get_bind().engine
+    step = _AUTOINC_INCREMENTS.get(engine)
+    if step is None:
+        lock_mode, step = db.execute(
+            text("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+        ).one()
+        if int(lock_mode) not in (0, 1, 2):
+            raise RuntimeError(f"unsupported innodb_autoinc_lock_mode {lock_mode}: log ids cannot be derived")
+        step = _AUTOINC_INCREMENTS[engine] = int(step)
+    return step
+
+
+@contextmanager
+def spool_to_file(stream: BinaryIO) -> Iterator[str]:
+    """把上传流按块复制到临时文件，产出文件路径，退出时删除"""
+    tmp = tempfile.NamedTemporaryFile(prefix="log_upload_", suffix=".log", delete=False)
+    try:
+        with tmp:
+            stream.seek(0)
+            shutil.copyfileobj(stream, tmp, settings.INGEST_READ_CHUNK_SIZE)
+        yield tmp.name
+    finally:
+        os.unlink(tmp.name)
+
+
+def get_max_upload_bytes(db: Session, default_mb: int = 100) -> int:
+    """读取 LOG_MAX_UPLOAD_SIZE 配置(MB)并换算为字节"""
+    size_mb = get_config_snapshot(db).get_int(ConfigKeys.LOG_MAX_UPLOAD_SIZE, default_mb)
+    return size_mb * 1024 * 1024
+
+
+def ingest_upload(db: Session, upload: UploadFile, source: LogSourceEnum) -> IngestResult:
+    """
+    上传文件入库的便捷函数
+
+    Args:
+        db: 数据库会话
+        upload: FastAPI 上传文件对象
+        source: 日志来源
+
+    Returns:
+        入库结果统计；压缩文件解压后超过 INGEST_MAX_DECOMPRESSED_BYTES 或损坏、被截断时
+        返回出错前已入库部分的统计(truncated=True)
+    """
+    service = LogIngestService(db, source, dedup=get_deduplicator())
+
+    # gzip/bz2/xz 边读边解压，直接走流式解析，不落盘解压后的数据
+    compression = detect_compression(upload.file)
+    if compression is not None:
+        with open_decompressed(upload.file, compression) as stream:
+            return service.ingest_stream(stream)
+
+    size = _stream_size(upload.file)
+    if size < settings.INGEST_MMAP_MIN_BYTES:
+        return service.ingest_stream(upload.file)
+
+    # 大文件落盘后 mmap 扫描，达到阈值时再交给进程池并行解析
+    with spool_to_file(upload.file) as path:
+        workers = settings.INGEST_PARSE_WORKERS
+        if workers > 1 and size >= settings.INGEST_PARALLEL_MIN_BYTES:
+            # 延迟导入，避免与 parallel_ingest 循环导入
+            from app.services.parallel_ingest import ingest_parallel
+            return ingest_parallel(service, path, workers)
+        return service.ingest_file(path)
+
+
+def _stream_size(stream: BinaryIO) -> int:
+    """获取文件对象大小并将读写位置恢复到开头"""
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(0)
+    return size
@@ -0,0 +1,111 @@
+"""
+日志查询服务 - Log Query Service
+
+按 LogFilter 筛选 logs 并分页：按 (timestamp, id) 倒序，
+传入游标时按键集翻页(每页读取量与深度无关)，否则按页码 OFFSET 分页(仅限浅页)；
+总数由 query_counter 计算(阈值内精确、超过阈值估算，按筛选条件短期缓存)；
+关键字检索走 message 全文索引(见 app.utils.fulltext)，与其他条件在同一查询中求交；
+只查询 LogListItem 需要的列并直接编码为 JSON(见 app.utils.row_json)，
+编码结果按规范化的筛选条件和入库水位缓存(见 app.services.query_cache)
+"""
+from typing import Optional
+
+from sqlalchemy.orm import Query, Session
+
+from app.models.log import (
+    Log,
+    LogEventTypeEnum,
+    LogIngestTypeEnum,
+    LogLevelEnum,
+    LogParseStatusEnum,
+    LogSourceEnum,
+)
+from app.schemas.log import LogFilter, LogListItem
+from app.services.query_cache import query_cache
+from app.services.query_count import normalize_filters, query_counter
+from app.utils.fulltext import keyword_condition
+from app.utils.pagination import keyset_page, offset_allowed, offset_page
+from app.utils.row_json import page_json, row_serializer
+
+
+class PageTooDeep(ValueError):
+    """页码超出 OFFSET 分页允许的深度"""
+
+
+class LogQueryService:
+    """日志列表查询"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def build_query(self, filters: LogFilter, user_name: Optional[str] = None) -> Query:
+        """
+        按筛选条件构造查询(未排序、未分页)，只选取 LogListItem 的列
+
+        Args:
+            filters: 筛选条件
+            user_name: 非空时只查询该用户相关的日志(普通用户)
+        """
+        query = self.db.query(*row_serializer(LogListItem).columns(Log))
+        if user_name is not None:
+            query = query.filter(Log.user_name == user_name)
+        if filters.start_time:
+            query = query.filter(Log.timestamp >= filters.start_time)
+        if filters.end_time:
+            query = query.filter(Log.timestamp <= filters.end_time)
+        if filters.levels:
+            query = query.filter(Log.level.in_([LogLevelEnum(level.value) for level in filters.levels]))
+        if filters.source:
+            query = query.filter(Log.source == LogSourceEnum(filters.source.value))
+        if filters.ip:
+            query = query.filter(Log.ip == filters.ip)
+        if filters.event_type:
+            query = query.filter(Log.event_type == LogEventTypeEnum(filters.event_type.value))
+        if filters.ingest_type:
+            query = query.filter(Log.ingest_type == LogIngestTypeEnum(filters.ingest_type.value))
+        if filters.parse_status:
+            query = query.filter(Log.parse_status == LogParseStatusEnum(filters.parse_status.value))
+        if filters.keyword:
+            query = query.filter(keyword_condition(Log.message, filters.keyword, self.db.get_bind().dialect.name))
+        return query
+
+    def search(self, filters: LogFilter, user_name: Optional[str] = None) -> bytes:
+        """
+        分页查询日志(经查询结果缓存)
+
+        Returns:
+            与 LogSearchResults 对应的 JSON
+
+        Raises:
+            InvalidCursor: 游标格式错误
+            PageTooDeep: 未传游标且页码超出浅页范围
+        """
+        params = {**filters.model_dump(), "user_name": user_name}
+        return query_cache.get_or_compute(
+            self.db, "logs", params, lambda: self._search(filters, user_name, params), end_time=filters.end_time
+        )
+
+    def _search(self, filters: LogFilter, user_name: Optional[str], params: dict) -> bytes:
+        query = self.build_query(filters, user_name)
+        count = query_counter.count(query, Log.id, normalize_filters("logs", params))
+
+        if filters.cursor is None and filters.page > 1:
+            if not offset_allowed(filters.page, filters.page_size):
+                raise PageTooDeep("页码过深，请使用 cursor 翻页")
+            page = offset_page(query, Log.timestamp, Log.id, filters.page, filters.page_size)
+        else:
+            page = keyset_page(query, Log.timestamp, Log.id, filters.page_size, filters.cursor)
+
+        return page_json({
+            "total": count.total,
+            "total_exact": count.exact,
+            "page": None if filters.cursor is not None else filters.page,
+            "page_size": filters.page_size,
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }, "results", row_serializer(LogListItem).dumps(page.items))
+
+
+def search_logs(db: Session, filters: LogFilter, user_name: Optional[str] = None) -> bytes:
+    """日志分页查询的便捷函数"""
+    return LogQueryService(db).search(filters, user_name)
@@ -0,0 +1,199 @@
+"""
+未处理告警索引 - Open Alert Index
+
+进程内按 (告警类型, 对象) 记录最新一条未处理(UNHANDLED/HANDLING)告警的 ID 和创建时间，
+告警引擎去重时直接查索引，不再为每批/每次触发查询 alerts 表；
+重复触发用一条 UPDATE ... SET trigger_count = trigger_count + n 原子累加
+
+对象: 暴力破解为 related_ip，可疑访问为 related_user，自定义规则为 (rule_id, 分组值)
+本进程内的会话提交新建告警、把告警改为已解决/已忽略或删除告警后，索引随提交同步更新；
+其他进程的改动在 OPEN_ALERT_INDEX_REFRESH_SECONDS 内整表重新加载后可见，
+期间累加到已被关闭的告警时 UPDATE 不命中，此时丢弃索引项并新建告警
+"""
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.change_hooks import commit_hook
+from app.models.alert import Alert, AlertStatus, AlertType
+
+OPEN_STATUSES = (AlertStatus.UNHANDLED, AlertStatus.HANDLING)
+
+# (告警类型, 对象)
+AlertKey = Tuple[AlertType, Any]
+
+
+def alert_key(
+        alert_type: AlertType,
+        related_ip: Optional[str],
+        related_user: Optional[str],
+        rule_id: Optional[int],
+        extra_data: Optional[str]
+) -> Optional[AlertKey]:
+    """告警的去重键，不参与去重的类型返回 None"""
+    if alert_type == AlertType.BRUTE_FORCE:
+        return (alert_type, related_ip) if related_ip else None
+    if alert_type == AlertType.SUSPICIOUS_ACCESS:
+        return (alert_type, related_user) if related_user else None
+    if alert_type == AlertType.CUSTOM and rule_id is not None:
+        try:
+            group = json.loads(extra_data or "{}").get("group")
+        except ValueError:
+            return None
+        return alert_type, (rule_id, group)
+    return None
+
+
+class OpenAlertIndex:
+    """
+    未处理告警索引
+
+    首次查询或超过刷新间隔时从数据库加载全部未处理告警，其余情况查询只是一次字典读取
+    """
+
+    def __init__(self):
+        self._entries: Dict[AlertKey, Tuple[int, datetime]] = {}
+        self._keys: Dict[int, AlertKey] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, db: Session, key: AlertKey, since: datetime) -> Optional[int]:
+        """
+        查找 since 之后创建的未处理告警
+
+        Returns:
+            告警ID，不存在时为 None
+        """
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= settings.OPEN_ALERT_INDEX_REFRESH_SECONDS:
+            self.load(db)
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < since:
+            return None
+        return entry[0]
+
+    def increment(self, db: Session, alert_id: int, fired: int, **values: Any) -> bool:
+        """
+        原子累加告警的触发次数并更新其他字段(不提交)
+
+        Returns:
+            告警仍处于未处理状态并已更新时为 True；告警已被关闭时丢弃索引项并返回 False
+        """
+        result = db.execute(
+            update(Alert)
+            .where(Alert.id == alert_id, Alert.status.in_(OPEN_STATUSES))
+            .values(trigger_count=Alert.trigger_count + fired, updated_at=datetime.now(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return True
+        self.discard(alert_id)
+        return False
+
+    def add(self, key: AlertKey, alert_id: int, created_at: datetime) -> None:
+        """
+        记录未处理告警
+
+        同一键保留最新的告警: 旧告警超出时间窗口后新建的告警需要被后续触发命中，
+        否则每次触发都会再新建一条
+        """
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] > alert_id:
+                return
+            self._entries[key] = (alert_id, created_at)
+            self._keys[alert_id] = key
+
+    def discard(self, alert_id: int) -> None:
+        """告警已关闭或删除"""
+        with self._lock:
+            key = self._keys.pop(alert_id, None)
+            if key is not None and self._entries.get(key, (None,))[0] == alert_id:
+                del self._entries[key]
+                # 同一键下可能还有更早的未处理告警，下次查询时重新加载
+                self._loaded_at = None
+
+    def invalidate(self) -> None:
+        """告警状态被批量修改(不经过 ORM 对象)，下次查询时重新加载"""
+        self._loaded_at = None
+
+    def load(self, db: Session) -> int:
+        """
+        从数据库加载全部未处理告警
+
+        Returns:
+            索引项数
+        """
+        rows = db.execute(
+            select(
+                Alert.id, Alert.alert_type, Alert.related_ip, Alert.related_user,
+                Alert.rule_id, Alert.extra_data, Alert.created_at
+            ).where(
+                Alert.status.in_(OPEN_STATUSES),
+                Alert.alert_type.in_([AlertType.BRUTE_FORCE, AlertType.SUSPICIOUS_ACCESS, AlertType.CUSTOM])
+            ).order_by(Alert.id.desc())
+        ).all()
+
+        entries: Dict[AlertKey, Tuple[int, datetime]] = {}
+        keys: Dict[int, AlertKey] = {}
+        for alert_id, alert_type, related_ip, related_user, rule_id, extra_data, created_at in rows:
+            key = alert_key(alert_type, related_ip, related_user, rule_id, extra_data)
+            # 按 ID 倒序，同一键保留最新的告警
+            if key is not None and key not in entries:
+                entries[key] = (alert_id, created_at)
+                keys[alert_id] = key
+        with self._lock:
+            self._entries = entries
+            self._keys = keys
+            self._loaded_at = time.monotonic()
+        return len(entries)
+
+
+# 进程内单例
+open_alert_index = OpenAlertIndex()
+
+
+def _collect_alert_changes(session: Session) -> List[Tuple]:
+    """flush 后记下新建/关闭/删除的告警，提交后再更新索引(只读取已加载的属性，不触发查询)"""
+    changes = []
+    for obj in session.new:
+        if not isinstance(obj, Alert):
+            continue
+        state = inspect(obj).dict
+        if state.get("status") not in OPEN_STATUSES:
+            continue
+        key = alert_key(
+            state.get("alert_type"), state.get("related_ip"), state.get("related_user"),
+            state.get("rule_id"), state.get("extra_data")
+        )
+        if key is not None:
+            created_at = state.get("created_at")
+            changes.append(("add", obj.id, key, created_at if isinstance(created_at, datetime) else datetime.now()))
+    for obj in session.dirty:
+        if isinstance(obj, Alert) and inspect(obj).attrs.status.history.has_changes() \
+                and inspect(obj).dict.get("status") not in OPEN_STATUSES:
+            changes.append(("discard", obj.id, None, None))
+    for obj in session.deleted:
+        if isinstance(obj, Alert):
+            changes.append(("discard", obj.id, None, None))
+    return changes
+
+
+def _apply_changes(changes: List[Tuple]) -> None:
+    for action, alert_id, key, created_at in changes:
+        if action == "add":
+            open_alert_index.add(key, alert_id, created_at)
+        else:
+            open_alert_index.discard(alert_id)
+
+
+# 对所有会话生效: 告警的新建、关闭和删除随提交同步到索引
+commit_hook("open_alert_index", _collect_alert_changes, _apply_changes)
@@ -31,6 +31,9 @@ class OperationLogger:
         UPDATE_ALERT_STATUS = "UPDATE_ALERT_STATUS"
         CREATE_ALERT = "CREATE_ALERT"
         DELETE_ALERT = "DELETE_ALERT"
+        CREATE_ALERT_RULE = "CREATE_ALERT_RULE"
+        UPDATE_ALERT_RULE = "UPDATE_ALERT_RULE"
+        DELETE_ALERT_RULE = "DELETE_ALERT_RULE"
 
         # 配置相关
         UPDATE_CONFIG = "UPDATE_CONFIG"
@@ -48,6 +51,7 @@ class OperationLogger:
         USER = "user"
         LOG = "log"
         ALERT = "alert"
+        ALERT_RULE = "alert_rule"
         CONFIG = "config"
         SYSTEM = "system"
 
@@ -166,8 +170,9 @@ class OperationTemplates:
         return f"用户 {username} 从 {ip} 登录失败" + (f": {reason}" if reason else "")
 
     @staticmethod
-    def upload_log(filename: str, count: int) -> str:
-        return f"上传日志文件 {filename}，解析成功 {count} 条"
+    def upload_log(filename: str, count: int, error: Optional[str] = None) -> str:
+        base = f"上传日志文件 {filename}，解析成功 {count} 条"
+        return base + (f"，文件读取中断({error})" if error else "")
 
     @staticmethod
     def export_log(count: int, filters: str = "") -> str:
@@ -178,6 +183,10 @@ class OperationTemplates:
     def update_alert_status(alert_id: int, old_status: str, new_status: str) -> str:
         return f"修改告警 #{alert_id} 状态: {old_status} -> {new_status}"
 
+    @staticmethod
+    def alert_rule(verb: str, rule_id: int, name: str) -> str:
+        return f"{verb}告警规则 #{rule_id}: {name}"
+
     @staticmethod
     def update_config(key: str, old_value: str, new_value: str) -> str:
         return f"修改配置 {key}: {old_value} -> {new_value}"
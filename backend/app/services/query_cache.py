@@ -0,0 +1,186 @@
+"""
+查询结果缓存 - Query Result Cache
+
+仪表盘每隔几秒轮询的 GET /logs 与 /stats/* 查询按 (范围, 规范化参数) 缓存结果，
+每个条目记录计算时的入库水位(logs 最大ID)：
+- 截止时间早于 now - QUERY_CACHE_CLOSED_AFTER_SECONDS 的已关闭历史区间不随水位失效，
+  保留 QUERY_CACHE_CLOSED_TTL_SECONDS(补传历史日志的可见延迟以此为上限)
+- 其余包含"现在"的区间在水位前进后失效(读取时比较一次整数)，最长保留 QUERY_CACHE_TTL_SECONDS
+水位: 本进程会话提交新日志后立即前进；其他进程的写入在 QUERY_CACHE_WATERMARK_SECONDS 内
+通过一次 SELECT MAX(id) 感知
+
+条目按 LRU 淘汰，总大小(结果 JSON 序列化后的字节数)不超过 QUERY_CACHE_MAX_BYTES；
+命中率等指标见 GET /stats/query-cache
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.change_hooks import commit_hook
+from app.models.log import Log
+from app.services.query_count import normalize_filters
+
+
+class IngestWatermark:
+    """logs 的入库水位(最大日志ID)"""
+
+    def __init__(self):
+        self._value = 0
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def current(self, db: Session) -> int:
+        """当前水位，超过检查间隔时从数据库读取一次最大ID"""
+        if self._checked_at is None or time.monotonic() - self._checked_at >= settings.QUERY_CACHE_WATERMARK_SECONDS:
+            max_id = db.execute(select(func.max(Log.id))).scalar() or 0
+            with self._lock:
+                self._value = max(self._value, max_id)
+                self._checked_at = time.monotonic()
+        return self._value
+
+    def advance(self, log_id: int) -> None:
+        """本进程提交了新日志"""
+        with self._lock:
+            if log_id > self._value:
+                self._value = log_id
+
+
+class _Entry(NamedTuple):
+    value: Any
+    watermark: int
+    size: int
+    closed: bool
+    expires_at: float
+
+
+class QueryCache:
+    """按入库水位失效、按内存预算 LRU 淘汰的查询结果缓存"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get_or_compute(
+            self,
+            db: Session,
+            scope: str,
+            params: Dict[str, Any],
+            compute: Callable[[], Any],
+            end_time: Optional[datetime] = None
+    ) -> Any:
+        """
+        读取缓存，未命中时计算并写入
+
+        Args:
+            db: 数据库会话(读取水位)
+            scope: 查询类别，如 "logs"、"stats.events"
+            params: 决定结果的全部参数(含分页参数)
+            compute: 计算结果，返回值为已编码的 JSON 字节或可 JSON 序列化的数据(datetime/枚举按字符串计大小)
+            end_time: 查询区间的截止时间，为空表示截止到现在
+        """
+        if not settings.QUERY_CACHE_ENABLED:
+            return compute()
+
+        key = normalize_filters(scope, params, exclude=())
+        watermark = ingest_watermark.current(db)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now and (entry.closed or entry.watermark == watermark):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                self.stale += 1
+                self._remove(key)
+            self.misses += 1
+
+        value = compute()
+        closed = end_time is not None and \
+            end_time <= datetime.now() - timedelta(seconds=settings.QUERY_CACHE_CLOSED_AFTER_SECONDS)
+        self._put(key, value, watermark, closed)
+        return value
+
+    def _put(self, key: str, value: Any, watermark: int, closed: bool) -> None:
+        if isinstance(value, bytes):
+            size = len(key) + len(value)
+        else:
+            size = len(key) + len(json.dumps(value, default=str, ensure_ascii=False).encode("utf-8"))
+        budget = settings.QUERY_CACHE_MAX_BYTES
+        if size > budget // 8:
+            # 过大的结果不缓存，避免挤掉大量小条目
+            return
+        ttl = settings.QUERY_CACHE_CLOSED_TTL_SECONDS if closed else settings.QUERY_CACHE_TTL_SECONDS
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, watermark, size, closed, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > budget and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        """调用方持锁"""
+        self._bytes -= self._entries.pop(key).size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> dict:
+        """缓存运行指标"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.QUERY_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": settings.QUERY_CACHE_MAX_BYTES,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "watermark": ingest_watermark.value,
+            }
+
+
+# 进程内单例
+ingest_watermark = IngestWatermark()
+query_cache = QueryCache()
+
+
+def _collect_ingested_ids(session: Session) -> List[int]:
+    """flush 后记下本会话通过 ORM 新增的日志ID，提交后再推进水位"""
+    return [obj.id for obj in session.new if isinstance(obj, Log) and obj.id is not None]
+
+
+def _advance(log_ids: List[int]) -> None:
+    ingest_watermark.advance(max(log_ids))
+
+
+# 对所有会话生效: 提交了新日志即推进水位，包含"现在"的缓存条目随之失效
+_ingest_hook = commit_hook("ingest_watermark", _collect_ingested_ids, _advance)
+
+
+def note_ingested(session: Session, max_log_id: int) -> None:
+    """批量 INSERT(不经过 ORM 对象)写入日志后调用：只记录最大ID，会话提交后才推进水位"""
+    _ingest_hook.stage(session, [max_log_id])
@@ -0,0 +1,148 @@
+"""
+列表总数估算 - Query Count
+
+分页接口的总数不再每次执行完整的 COUNT(*)：
+- 先做有上限的精确计数 COUNT(*) FROM (SELECT id ... LIMIT COUNT_EXACT_THRESHOLD + 1)，
+  代价不超过读取阈值行，结果不超过阈值时即为精确值
+- 超过阈值时，MySQL 用 EXPLAIN 中优化器基于索引统计的行数估算(rows × filtered%)，
+  不低于阈值；其他数据库或估算失败时回退到完整 COUNT(*)
+- 结果按规范化的筛选条件缓存 COUNT_CACHE_TTL_SECONDS 秒，翻页时不再重复计数
+
+返回值附带是否为精确值，由接口透出给前端(估算值可展示为"约 N 条")
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CountResult(NamedTuple):
+    total: int
+    exact: bool
+
+
+def normalize_filters(
+        scope: str,
+        filters: Dict[str, Any],
+        exclude: Tuple[str, ...] = ("page", "page_size", "cursor")
+) -> str:
+    """把筛选条件规范化为缓存键(忽略空值和 exclude 中的参数(默认为分页参数)，键排序)"""
+    values = {
+        key: value for key, value in filters.items()
+        if value not in (None, "", []) and key not in exclude
+    }
+    return scope + ":" + json.dumps(values, sort_keys=True, default=str, ensure_ascii=False)
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN <查询>
+
+    经过正常的语句执行流程，参数由各列类型的 bind processor 转换(如枚举转为名称)，
+    与直接执行该查询时一致
+    """
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+
+class QueryCounter:
+    """带阈值和短期缓存的总数计算"""
+
+    def __init__(self):
+        self._cache: "OrderedDict[str, Tuple[float, CountResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, query: Query, id_column, cache_key: Optional[str] = None) -> CountResult:
+        """
+        计算查询的总行数
+
+        Args:
+            query: 已应用筛选条件的查询
+            id_column: 主键列(有上限计数只选取该列，可走覆盖索引)
+            cache_key: 规范化的筛选条件(见 normalize_filters)，为空时不缓存
+        """
+        if cache_key is not None:
+            cached = self._get(cache_key)
+            if cached is not None:
+                return cached
+
+        result = self._count(query, id_column)
+        if cache_key is not None:
+            self._put(cache_key, result)
+        return result
+
+    def _count(self, query: Query, id_column) -> CountResult:
+        threshold = settings.COUNT_EXACT_THRESHOLD
+        id_query = query.with_entities(id_column).order_by(None)
+        session = query.session
+
+        bounded = session.execute(
+            select(func.count()).select_from(id_query.limit(threshold + 1).subquery())
+        ).scalar() or 0
+        if bounded <= threshold:
+            return CountResult(bounded, True)
+
+        estimate = self._estimate(query, id_query)
+        if estimate is not None:
+            return CountResult(max(estimate, threshold + 1), False)
+        return CountResult(id_query.count(), True)
+
+    @staticmethod
+    def _estimate(query: Query, id_query: Query) -> Optional[int]:
+        """MySQL 优化器的行数估算，不可用时返回 None"""
+        session = query.session
+        dialect = session.get_bind().dialect
+        if dialect.name != "mysql":
+            return None
+        try:
+            row = session.execute(Explain(id_query.statement)).mappings().first()
+        except Exception:  # noqa: BLE001
+            logger.warning("count estimate failed, falling back to exact count", exc_info=True)
+            return None
+        if row is None or row.get("rows") is None:
+            return None
+        return int(row["rows"] * float(row.get("filtered") or 100.0) / 100.0)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _get(self, key: str) -> Optional[CountResult]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[1]
+
+    def _put(self, key: str, result: CountResult) -> None:
+        with self._lock:
+            self._cache[key] = (time.monotonic() + settings.COUNT_CACHE_TTL_SECONDS, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > settings.COUNT_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+
+# 进程内单例
+query_counter = QueryCounter()
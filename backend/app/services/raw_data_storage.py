@@ -0,0 +1,125 @@
+"""
+原始日志存储服务 - Raw Data Storage Service
+
+统计 logs.raw_data 的存储占用，并把历史明文行迁移为压缩存储(raw_data_z)
+
+迁移命令(在 backend 目录下，可重复执行，已压缩的行会被跳过):
+    python -m app.services.raw_data_storage --batch-size 5000
+"""
+import argparse
+import json
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.log import Log
+from app.utils.raw_codec import compress_raw_data
+
+
+class RawDataStorageService:
+    """原始日志存储统计与迁移"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def size_report(self) -> dict:
+        """
+        raw_data 存储占用统计
+
+        Returns:
+            明文/压缩行数与字节数、压缩前字节数、节省的字节数和压缩比
+        """
+        total, plain_rows, plain_bytes, compressed_rows, compressed_bytes, original_bytes = self.db.execute(
+            select(
+                func.count(Log.id),
+                func.count(Log._raw_data),
+                func.coalesce(func.sum(func.length(Log._raw_data)), 0),
+                func.count(Log.raw_data_z),
+                func.coalesce(func.sum(func.length(Log.raw_data_z)), 0),
+                func.coalesce(func.sum(Log.raw_data_size), 0),
+            )
+        ).one()
+        return {
+            "total_rows": total,
+            "plain_rows": plain_rows,
+            "plain_bytes": int(plain_bytes),
+            "compressed_rows": compressed_rows,
+            "compressed_bytes": int(compressed_bytes),
+            "original_bytes": int(original_bytes),
+            "saved_bytes": int(original_bytes) - int(compressed_bytes),
+            "compression_ratio": round(int(original_bytes) / int(compressed_bytes), 2) if compressed_bytes else None,
+        }
+
+    def compress_existing(self, batch_size: Optional[int] = None, max_rows: Optional[int] = None) -> dict:
+        """
+        把明文存储的历史行压缩到 raw_data_z
+
+        按主键分批(keyset)扫描，每批一次批量 UPDATE 并提交，可随时中断后重新执行；
+        压缩后不更小的行保持明文
+
+        Args:
+            batch_size: 每批行数，默认 INGEST_BATCH_SIZE
+            max_rows: 最多扫描的行数，None 表示全部
+
+        Returns:
+            本次迁移的扫描/压缩行数与压缩前后字节数
+        """
+        batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        report = {"scanned": 0, "compressed": 0, "bytes_before": 0, "bytes_after": 0}
+        last_id = 0
+        while max_rows is None or report["scanned"] < max_rows:
+            limit = batch_size if max_rows is None else min(batch_size, max_rows - report["scanned"])
+            rows = self.db.execute(
+                select(Log.id, Log.source, Log._raw_data)
+                .where(Log.id > last_id, Log.raw_data_z.is_(None), Log._raw_data.is_not(None))
+                .order_by(Log.id)
+                .limit(limit)
+            ).all()
+            if not rows:
+                break
+
+            updates = []
+            for log_id, source, text in rows:
+                data = text.encode("utf-8")
+                blob = compress_raw_data(data, source)
+                if len(blob) < len(data):
+                    updates.append({"id": log_id, "_raw_data": None, "raw_data_z": blob, "raw_data_size": len(data)})
+                    report["bytes_before"] += len(data)
+                    report["bytes_after"] += len(blob)
+            if updates:
+                self.db.execute(update(Log), updates)
+            self.db.commit()
+
+            report["scanned"] += len(rows)
+            report["compressed"] += len(updates)
+            last_id = rows[-1].id
+        report["saved_bytes"] = report["bytes_before"] - report["bytes_after"]
+        return report
+
+
+def get_raw_data_size_report(db: Session) -> dict:
+    """raw_data 存储占用统计的便捷函数"""
+    return RawDataStorageService(db).size_report()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="把 logs.raw_data 历史明文行迁移为压缩存储")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批行数")
+    parser.add_argument("--max-rows", type=int, default=None, help="最多扫描的行数")
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        service = RawDataStorageService(db)
+        result = service.compress_existing(args.batch_size, args.max_rows)
+        print(json.dumps({"migration": result, "storage": service.size_report()}, ensure_ascii=False, indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
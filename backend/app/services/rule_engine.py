@@ -0,0 +1,479 @@
+"""
+自定义告警规则引擎 - Custom Alert Rule Engine
+
+alert_rules 表中的规则在进程内编译一次：字段条件编译为闭包谓词，
+计数/去重计数编译为按分组键的滑动窗口聚合器，每批入库日志直接在内存中求值，不查询 logs 表。
+规则增删改提交后立即重新编译并整体替换当前规则集(未改动规则的窗口状态保留)，
+其他进程按 CONFIG_CACHE_REFRESH_SECONDS 比较 data_versions 版本号感知变化
+
+窗口状态只在当前进程内，进程重启后从空窗口开始计数
+"""
+import ipaddress
+import json
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.change_hooks import data_version, version_hook
+from app.models.alert import AlertRule
+from app.models.log import LogEventTypeEnum, LogLevelEnum, LogSourceEnum
+from app.schemas.alert import AlertRuleCreate, AlertRuleUpdate
+
+logger = logging.getLogger(__name__)
+
+# 可用于条件/分组的日志字段
+RULE_FIELDS = ("source", "level", "event_type", "ip", "user_name", "message")
+_ENUM_FIELDS = {"source": LogSourceEnum, "level": LogLevelEnum, "event_type": LogEventTypeEnum}
+AGGREGATES = ("count", "distinct")
+
+# data_versions 中规则的版本名
+RULE_VERSION = "alert_rules"
+
+Predicate = Callable[[Any], bool]
+
+
+class RuleDefinitionError(ValueError):
+    """规则定义不合法"""
+
+
+class DuplicateRuleName(Exception):
+    """规则名称已被其他规则使用"""
+
+
+def _field_getter(field: str) -> Callable[[Any], Any]:
+    if field not in RULE_FIELDS:
+        raise RuleDefinitionError(f"不支持的字段: {field}")
+    return attrgetter(field)
+
+
+def _coerce(field: str, value: Any) -> Any:
+    """把条件中的取值转换为与日志字段相同的类型(来源/级别转换为枚举)"""
+    enum_type = _ENUM_FIELDS.get(field)
+    if enum_type is None:
+        if value is None or isinstance(value, (list, dict)):
+            raise RuleDefinitionError(f"字段 {field} 的取值不合法: {value!r}")
+        return str(value)
+    try:
+        return enum_type(value)
+    except ValueError:
+        raise RuleDefinitionError(f"字段 {field} 的取值不合法: {value!r}")
+
+
+def compile_condition(condition: dict) -> Predicate:
+    """
+    把单个字段条件编译为谓词
+
+    Raises:
+        RuleDefinitionError: 字段、比较方式或取值不合法
+    """
+    field = condition.get("field")
+    op = condition.get("op", "eq")
+    value = condition.get("value")
+    ignore_case = bool(condition.get("ignore_case")) and field not in _ENUM_FIELDS
+    get = _field_getter(field)
+
+    if op == "exists":
+        expected = value is None or bool(value)
+        return lambda e: (get(e) is not None) == expected
+
+    if op in ("in", "not_in"):
+        if not isinstance(value, list) or not value:
+            raise RuleDefinitionError(f"{op} 的取值必须是非空列表")
+        values = frozenset(_coerce(field, v) for v in value)
+        if ignore_case:
+            values = frozenset(v.lower() for v in values)
+            if op == "in":
+                return lambda e: (get(e) or "").lower() in values
+            return lambda e: (get(e) or "").lower() not in values
+        if op == "in":
+            return lambda e: get(e) in values
+        return lambda e: get(e) not in values
+
+    if op == "cidr":
+        if field != "ip":
+            raise RuleDefinitionError("cidr 只能用于 ip 字段")
+        try:
+            network = ipaddress.ip_network(str(value), strict=False)
+        except ValueError:
+            raise RuleDefinitionError(f"cidr 取值不合法: {value!r}")
+
+        def in_network(e) -> bool:
+            ip = get(e)
+            if not ip:
+                return False
+            try:
+                return ipaddress.ip_address(ip) in network
+            except ValueError:
+                return False
+        return in_network
+
+    if op == "regex":
+        if field in _ENUM_FIELDS:
+            raise RuleDefinitionError(f"regex 不能用于 {field} 字段")
+        try:
+            search = re.compile(str(value), re.IGNORECASE if ignore_case else 0).search
+        except re.error as e:
+            raise RuleDefinitionError(f"正则表达式不合法: {e}")
+        return lambda e: search(get(e) or "") is not None
+
+    expected = _coerce(field, value)
+    if op in ("eq", "ne"):
+        if ignore_case:
+            expected = expected.lower()
+            if op == "eq":
+                return lambda e: (get(e) or "").lower() == expected
+            return lambda e: (get(e) or "").lower() != expected
+        if op == "eq":
+            return lambda e: get(e) == expected
+        return lambda e: get(e) != expected
+
+    if op in ("contains", "startswith", "endswith"):
+        if field in _ENUM_FIELDS:
+            raise RuleDefinitionError(f"{op} 不能用于 {field} 字段")
+        if ignore_case:
+            expected = expected.lower()
+            normalize = str.lower
+        else:
+            normalize = str
+        if op == "contains":
+            return lambda e: expected in normalize(get(e) or "")
+        method = getattr(str, op)
+        return lambda e: method(normalize(get(e) or ""), expected)
+
+    raise RuleDefinitionError(f"不支持的比较方式: {op}")
+
+
+def compile_conditions(conditions: Sequence[dict]) -> Predicate:
+    """编译条件列表(全部满足)；空列表匹配所有日志"""
+    predicates = tuple(compile_condition(c) for c in conditions)
+    if not predicates:
+        return lambda e: True
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def match_all(e) -> bool:
+        for predicate in predicates:
+            if not predicate(e):
+                return False
+        return True
+    return match_all
+
+
+def _group_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+class WindowAggregator:
+    """
+    按分组键的滑动窗口计数器
+
+    每个分组保存窗口内 (日志时间, 日志ID, 去重字段值) 的有序列表，
+    去重计数另外维护取值 -> 次数，淘汰过期项时同步递减，判定与窗口内日志量无关
+    """
+
+    def __init__(self, threshold: int, window: timedelta, distinct: bool):
+        self.threshold = threshold
+        self.window = window
+        self.distinct = distinct
+        self._groups: Dict[Any, Tuple[List[Tuple[datetime, int, Any]], Dict[Any, int]]] = {}
+        self._last_sweep: Optional[datetime] = None
+
+    def add(
+            self,
+            group: Any,
+            timestamp: datetime,
+            log_id: int,
+            value: Any,
+            now: datetime
+    ) -> Optional[Tuple[int, List[int]]]:
+        """
+        记录一条匹配日志
+
+        Returns:
+            达到阈值时返回 (计数, 窗口内日志ID列表)，否则 None
+        """
+        cutoff = now - self.window
+        if timestamp < cutoff:
+            return None
+        state = self._groups.get(group)
+        if state is None:
+            state = self._groups[group] = ([], {})
+        entries, values = state
+
+        insort(entries, (timestamp, log_id, value))
+        if self.distinct and value is not None:
+            values[value] = values.get(value, 0) + 1
+        expired = bisect_left(entries, (cutoff,))
+        if expired:
+            if self.distinct:
+                for _, _, old in entries[:expired]:
+                    if old is not None:
+                        remaining = values[old] - 1
+                        if remaining:
+                            values[old] = remaining
+                        else:
+                            del values[old]
+            del entries[:expired]
+        self._maybe_sweep(now, cutoff)
+
+        count = len(values) if self.distinct else len(entries)
+        if count >= self.threshold:
+            return count, [entry[1] for entry in entries]
+        return None
+
+    def _maybe_sweep(self, now: datetime, cutoff: datetime) -> None:
+        """每过一个窗口清理一次不再出现的分组"""
+        if self._last_sweep is not None and now - self._last_sweep < self.window:
+            return
+        self._last_sweep = now
+        for group in [g for g, (entries, _) in self._groups.items() if entries[-1][0] < cutoff]:
+            del self._groups[group]
+
+
+class CompiledRule:
+    """编译后的规则: 谓词 + 分组键 + 聚合器"""
+
+    def __init__(self, rule: AlertRule):
+        conditions = json.loads(rule.conditions) if isinstance(rule.conditions, str) else rule.conditions
+        validate_rule_shape(rule.group_by, rule.aggregate, rule.distinct_field)
+        self.id = rule.id
+        self.name = rule.name
+        self.alert_level = rule.alert_level
+        self.group_by = rule.group_by
+        self.aggregate = rule.aggregate
+        self.distinct_field = rule.distinct_field
+        self.threshold = rule.threshold
+        self.window_minutes = rule.window_minutes
+        # 定义未变化时重新编译可沿用窗口状态
+        self.signature = (
+            rule.conditions if isinstance(rule.conditions, str) else json.dumps(rule.conditions),
+            rule.group_by, rule.aggregate, rule.distinct_field, rule.threshold, rule.window_minutes,
+        )
+        self.match = compile_conditions(conditions)
+        self.group_of = attrgetter(rule.group_by) if rule.group_by else None
+        self.value_of = attrgetter(rule.distinct_field) if rule.aggregate == "distinct" else None
+        self.aggregator = WindowAggregator(
+            rule.threshold, timedelta(minutes=rule.window_minutes), rule.aggregate == "distinct"
+        )
+
+
+def validate_rule_shape(group_by: Optional[str], aggregate: str, distinct_field: Optional[str]) -> None:
+    """检查分组/聚合字段"""
+    if group_by is not None:
+        _field_getter(group_by)
+    if aggregate not in AGGREGATES:
+        raise RuleDefinitionError(f"不支持的聚合方式: {aggregate}")
+    if aggregate == "distinct":
+        if distinct_field is None:
+            raise RuleDefinitionError("aggregate=distinct 时必须指定 distinct_field")
+        _field_getter(distinct_field)
+
+
+# (规则ID, 分组值) -> [本批触发次数, 最近一次计数, 窗口内日志ID, 最近一次触发的日志]
+RuleHits = Dict[Tuple[int, Any], List[Any]]
+
+
+class CompiledRuleSet:
+    """某一版本的全部启用规则(替换时整体换引用，求值时持锁更新窗口状态)"""
+
+    def __init__(self, rules: List[CompiledRule], version: int, fingerprint: Tuple):
+        self.rules = rules
+        self.by_id = {rule.id: rule for rule in rules}
+        self.version = version
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def evaluate(self, logs: Sequence[Any], now: datetime) -> RuleHits:
+        """
+        对一批日志求值
+
+        Args:
+            logs: Log 或 LogEvent
+            now: 窗口终点
+
+        Returns:
+            达到阈值的 (规则ID, 分组值) 及其触发信息
+        """
+        hits: RuleHits = {}
+        if not self.rules:
+            return hits
+        with self._lock:
+            for rule in self.rules:
+                try:
+                    self._evaluate_rule(rule, logs, now, hits)
+                except Exception:  # noqa: BLE001
+                    # 单条规则求值出错只跳过该规则，不影响其他规则
+                    logger.exception("alert rule %s (%s) failed to evaluate, skipped", rule.id, rule.name)
+        return hits
+
+    @staticmethod
+    def _evaluate_rule(rule: CompiledRule, logs: Sequence[Any], now: datetime, hits: RuleHits) -> None:
+        match, group_of, value_of, add = rule.match, rule.group_of, rule.value_of, rule.aggregator.add
+        for log in logs:
+            if not match(log):
+                continue
+            group = None
+            if group_of is not None:
+                group = _group_value(group_of(log))
+                if group is None:
+                    continue
+            value = _group_value(value_of(log)) if value_of is not None else None
+            hit = add(group, log.timestamp, log.id, value, now)
+            if hit is None:
+                continue
+            key = (rule.id, group)
+            fired = hits.get(key)
+            hits[key] = [fired[0] + 1 if fired else 1, hit[0], hit[1], log]
+
+
+class RuleRegistry:
+    """
+    当前生效的规则集
+
+    get() 在规则集版本落后或超过检查间隔时才访问数据库，其余情况只是一次属性读取
+    """
+
+    def __init__(self):
+        self._rule_set: Optional[CompiledRuleSet] = None
+        self._version = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> CompiledRuleSet:
+        rule_set = self._rule_set
+        if (
+                rule_set is not None
+                and rule_set.version == self._version
+                and time.monotonic() - self._checked_at < settings.CONFIG_CACHE_REFRESH_SECONDS
+        ):
+            return rule_set
+        return self._refresh(db)
+
+    def invalidate(self) -> None:
+        """规则已修改，下次求值前重新编译"""
+        with self._lock:
+            self._version += 1
+
+    def _refresh(self, db: Session) -> CompiledRuleSet:
+        with self._lock:
+            version = self._version
+            fingerprint = tuple(db.execute(select(
+                data_version(RULE_VERSION), func.count(AlertRule.id), func.max(AlertRule.updated_at)
+            )).one())
+            current = self._rule_set
+            if current is None or current.version != version or current.fingerprint != fingerprint:
+                self._rule_set = self._compile(db, version, fingerprint, current)
+            self._checked_at = time.monotonic()
+            return self._rule_set
+
+    @staticmethod
+    def _compile(
+            db: Session,
+            version: int,
+            fingerprint: Tuple,
+            previous: Optional[CompiledRuleSet]
+    ) -> CompiledRuleSet:
+        compiled = []
+        for rule in db.query(AlertRule).filter(AlertRule.enabled.is_(True)).order_by(AlertRule.id):
+            try:
+                item = CompiledRule(rule)
+            except (RuleDefinitionError, ValueError):
+                logger.warning("alert rule %s (%s) failed to compile, skipped", rule.id, rule.name, exc_info=True)
+                continue
+            old = previous.by_id.get(rule.id) if previous is not None else None
+            if old is not None and old.signature == item.signature:
+                item.aggregator = old.aggregator
+            compiled.append(item)
+        return CompiledRuleSet(compiled, version, fingerprint)
+
+
+# 进程内单例
+rule_registry = RuleRegistry()
+
+
+def get_rule_set(db: Session) -> CompiledRuleSet:
+    """获取当前规则集的便捷函数"""
+    return rule_registry.get(db)
+
+
+class AlertRuleService:
+    """自定义告警规则管理"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_rules(self) -> List[AlertRule]:
+        return self.db.query(AlertRule).order_by(AlertRule.id).all()
+
+    def get_rule(self, rule_id: int) -> Optional[AlertRule]:
+        return self.db.query(AlertRule).filter(AlertRule.id == rule_id).first()
+
+    def create_rule(self, rule_in: AlertRuleCreate, user_id: Optional[int] = None) -> AlertRule:
+        """
+        创建规则(先编译校验)
+
+        Raises:
+            RuleDefinitionError: 规则定义不合法
+            DuplicateRuleName: 名称已存在
+        """
+        data = rule_in.model_dump()
+        data["conditions"] = json.dumps(data["conditions"], ensure_ascii=False)
+        rule = AlertRule(**data, created_by=user_id)
+        CompiledRule(rule)
+        self.db.add(rule)
+        self._commit()
+        self.db.refresh(rule)
+        return rule
+
+    def update_rule(self, rule: AlertRule, rule_in: AlertRuleUpdate) -> AlertRule:
+        """
+        更新规则(先编译校验)
+
+        Raises:
+            RuleDefinitionError: 规则定义不合法
+            DuplicateRuleName: 名称已被其他规则使用
+        """
+        data = rule_in.model_dump(exclude_unset=True)
+        if "conditions" in data:
+            data["conditions"] = json.dumps(data["conditions"] or [], ensure_ascii=False)
+        # 校验时读取未加载的属性不触发提前 flush，名称冲突统一在提交时处理
+        with self.db.no_autoflush:
+            for key, value in data.items():
+                setattr(rule, key, value)
+            try:
+                CompiledRule(rule)
+            except RuleDefinitionError:
+                self.db.rollback()
+                raise
+        self._commit()
+        self.db.refresh(rule)
+        return rule
+
+    def delete_rule(self, rule: AlertRule) -> None:
+        self.db.delete(rule)
+        self.db.commit()
+
+    def _commit(self) -> None:
+        """提交规则修改，名称唯一约束冲突时回滚并抛出 DuplicateRuleName"""
+        try:
+            self.db.commit()
+        except IntegrityError as exc:
+            self.db.rollback()
+            raise DuplicateRuleName() from exc
+
+
+# 对所有会话生效: 任何写入 alert_rules 的提交都会递增版本号并触发重新编译
+version_hook(RULE_VERSION, [AlertRule], rule_registry.invalidate)
@@ -0,0 +1,335 @@
+"""
+可疑访问检测器 - Suspicious Access Detector
+
+在内存中按用户维护登录成功来源 IP 的滑动时间窗口，日志写入时增量更新，
+替代每次检测都对 logs 做一次 COUNT(DISTINCT ip) / GROUP_CONCAT 全窗口扫描；
+进程启动时从数据库重建窗口内的状态
+
+每个用户先用精确的 IP -> 最近出现时间 字典计数，IP 数超过 SUSPICIOUS_ACCESS_EXACT_MAX_IPS
+后改用按时间分桶的 HyperLogLog 估算(窗口精度为一个桶宽)；
+跟踪的用户数以 SUSPICIOUS_ACCESS_MAX_USERS 为上限，超出时淘汰最久未活动的用户
+"""
+import logging
+import math
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, select, true
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.log import Log, LogEventTypeEnum
+
+logger = logging.getLogger(__name__)
+
+# 估算模式下窗口划分的桶数
+SKETCH_BUCKETS = 6
+
+# (窗口内不同 IP 数, IP 列表(估算模式下为空), 是否为估算值)
+SuspiciousHit = Tuple[int, List[str], bool]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog 基数估算(2^precision 个 1 字节寄存器)
+
+    precision=10 时占 1KB，标准误差约 3.2%
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        h = int.from_bytes(blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    @staticmethod
+    def estimate(registers: bytearray) -> int:
+        m = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in registers)
+        zeros = registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # 小基数用线性计数修正
+            return round(m * math.log(m / zeros))
+        return round(raw)
+
+
+class _UserIps:
+    """单个用户窗口内的登录来源 IP"""
+
+    __slots__ = ("last_seen", "exact", "buckets")
+
+    def __init__(self):
+        self.last_seen: Optional[datetime] = None
+        # 精确模式: IP -> 最近一次登录成功时间
+        self.exact: Optional[Dict[str, datetime]] = {}
+        # 估算模式: [(桶起点, HyperLogLog)]，按时间递增
+        self.buckets: Optional[List[Tuple[datetime, HyperLogLog]]] = None
+
+
+class SuspiciousAccessDetector:
+    """
+    按用户的滑动窗口不同 IP 计数器
+
+    observe 只处理登录成功日志；一次观察使用户的不同 IP 数增加且超过阈值时返回触发信息，
+    同一用户同一批 IP 的重复登录不会重复触发。窗口以当前时间为终点，回放等场景可传入 now
+
+    状态只在当前进程内: 多进程部署时应由告警调度主节点统一检测(ALERT_CHECK_ON_INGEST 关闭)，
+    否则每个进程只看到自己那部分登录日志
+    """
+
+    def __init__(self, threshold: int = 3, window_minutes: int = 30):
+        self.threshold = threshold
+        self.window = timedelta(minutes=window_minutes)
+        self._users: "OrderedDict[str, _UserIps]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._config_source: Optional[object] = None
+
+    @property
+    def window_minutes(self) -> int:
+        return int(self.window.total_seconds() // 60)
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def config_outdated(self, source: object) -> bool:
+        """阈值/窗口是否不是由 source(配置快照)设置的"""
+        return source is not self._config_source
+
+    def configure(self, threshold: int, window_minutes: int, source: Optional[object] = None) -> Optional[timedelta]:
+        """
+        更新阈值和窗口
+
+        Returns:
+            窗口变大时返回原窗口，调用方应随后调用 backfill 补载已淘汰的记录；否则 None
+        """
+        previous = self.window
+        self.threshold = threshold
+        self.window = timedelta(minutes=window_minutes)
+        self._config_source = source
+        return previous if self.window > previous else None
+
+    def observe(
+            self,
+            user_name: Optional[str],
+            ip: Optional[str],
+            timestamp: datetime,
+            now: Optional[datetime] = None
+    ) -> Optional[SuspiciousHit]:
+        """
+        记录一次登录成功
+
+        Args:
+            user_name: 用户名，为空时忽略
+            ip: 来源 IP，为空时忽略
+            timestamp: 日志时间
+            now: 窗口终点，默认当前时间
+
+        Returns:
+            不同 IP 数因本次登录增加且超过阈值时返回 (IP 数, IP 列表, 是否估算)，否则 None
+        """
+        now = now or datetime.now()
+        cutoff = now - self.window
+        if not user_name or not ip or timestamp < cutoff:
+            return None
+
+        with self._lock:
+            state = self._users.get(user_name)
+            if state is None:
+                state = self._users[user_name] = _UserIps()
+            else:
+                self._users.move_to_end(user_name)
+            if state.last_seen is None or timestamp > state.last_seen:
+                state.last_seen = timestamp
+
+            before = self._count(state, cutoff)
+            self._add(state, ip, timestamp, cutoff)
+            after = self._count(state, cutoff)
+            self._evict(cutoff)
+
+            if after > before and after > self.threshold:
+                return self._hit(state, after, cutoff)
+        return None
+
+    def over_threshold(self, now: Optional[datetime] = None) -> Dict[str, SuspiciousHit]:
+        """当前窗口内不同 IP 数超过阈值的全部用户"""
+        now = now or datetime.now()
+        cutoff = now - self.window
+        hits = {}
+        with self._lock:
+            self._evict(cutoff)
+            for user_name, state in self._users.items():
+                count = self._count(state, cutoff)
+                if count > self.threshold:
+                    hits[user_name] = self._hit(state, count, cutoff)
+        return hits
+
+    def rebuild(self, db: Session, now: Optional[datetime] = None, condition=None) -> int:
+        """
+        从数据库重建窗口内的状态(进程启动或接替告警调度主节点时调用)
+
+        Args:
+            db: 数据库会话
+            now: 窗口终点，默认当前时间
+            condition: 附加的日志筛选条件(如只载入已检测过的日志)
+
+        Returns:
+            载入的 (用户, IP) 组合数
+        """
+        now = now or datetime.now()
+        cutoff = now - self.window
+        rows = db.execute(
+            select(Log.user_name, Log.ip, func.max(Log.timestamp).label("last_seen")).where(
+                and_(
+                    Log.event_type == LogEventTypeEnum.LOGIN_SUCCESS,
+                    Log.timestamp >= cutoff,
+                    Log.user_name.is_not(None),
+                    Log.ip.is_not(None),
+                    condition if condition is not None else true(),
+                )
+            ).group_by(Log.user_name, Log.ip).order_by(func.max(Log.timestamp))
+        ).all()
+
+        with self._lock:
+            self._users = OrderedDict()
+            for user_name, ip, last_seen in rows:
+                state = self._users.get(user_name)
+                if state is None:
+                    state = self._users[user_name] = _UserIps()
+                else:
+                    self._users.move_to_end(user_name)
+                state.last_seen = last_seen
+                self._add(state, ip, last_seen, cutoff)
+            self._evict(cutoff)
+        return len(rows)
+
+    def backfill(self, db: Session, previous_window: timedelta, now: Optional[datetime] = None) -> int:
+        """
+        窗口变大后从数据库补载 [now - window, now - previous_window) 内的登录成功，与现有状态合并
+
+        Returns:
+            补载的 (用户, IP) 组合数
+        """
+        now = now or datetime.now()
+        cutoff = now - self.window
+        rows = db.execute(
+            select(Log.user_name, Log.ip, func.max(Log.timestamp).label("last_seen")).where(
+                and_(
+                    Log.event_type == LogEventTypeEnum.LOGIN_SUCCESS,
+                    Log.timestamp >= cutoff,
+                    Log.timestamp < now - previous_window,
+                    Log.user_name.is_not(None),
+                    Log.ip.is_not(None),
+                )
+            ).group_by(Log.user_name, Log.ip)
+        ).all()
+
+        with self._lock:
+            for user_name, ip, last_seen in rows:
+                state = self._users.get(user_name)
+                if state is None:
+                    # 补载的用户最近活动较早，放在队首(最先淘汰)
+                    state = self._users[user_name] = _UserIps()
+                    self._users.move_to_end(user_name, last=False)
+                if state.last_seen is None or last_seen > state.last_seen:
+                    state.last_seen = last_seen
+                self._add(state, ip, last_seen, cutoff)
+        return len(rows)
+
+    def _add(self, state: _UserIps, ip: str, timestamp: datetime, cutoff: datetime) -> None:
+        if state.exact is not None:
+            seen = state.exact.get(ip)
+            if seen is None or timestamp > seen:
+                state.exact[ip] = timestamp
+            if len(state.exact) <= settings.SUSPICIOUS_ACCESS_EXACT_MAX_IPS:
+                return
+            # 先淘汰过期 IP，仍超过上限才转为估算模式
+            for old in [old for old, seen in state.exact.items() if seen < cutoff]:
+                del state.exact[old]
+            if len(state.exact) <= settings.SUSPICIOUS_ACCESS_EXACT_MAX_IPS:
+                return
+            exact, state.exact, state.buckets = state.exact, None, []
+            for old, seen in exact.items():
+                self._sketch_add(state, old, seen)
+            return
+        self._sketch_add(state, ip, timestamp)
+
+    def _sketch_add(self, state: _UserIps, ip: str, timestamp: datetime) -> None:
+        width = self.window / SKETCH_BUCKETS
+        start = datetime.min + ((timestamp - datetime.min) // width) * width
+        buckets = state.buckets
+        for bucket_start, sketch in reversed(buckets):
+            if bucket_start == start:
+                sketch.add(ip)
+                return
+            if bucket_start < start:
+                break
+        sketch = HyperLogLog(settings.SUSPICIOUS_ACCESS_SKETCH_PRECISION)
+        sketch.add(ip)
+        buckets.append((start, sketch))
+        buckets.sort(key=lambda bucket: bucket[0])
+
+    def _count(self, state: _UserIps, cutoff: datetime) -> int:
+        if state.exact is not None:
+            return sum(1 for seen in state.exact.values() if seen >= cutoff)
+        # 桶终点早于窗口起点的桶整体过期
+        width = self.window / SKETCH_BUCKETS
+        buckets = state.buckets
+        while buckets and buckets[0][0] + width <= cutoff:
+            buckets.pop(0)
+        if not buckets:
+            return 0
+        if len(buckets) == 1:
+            return HyperLogLog.estimate(buckets[0][1].registers)
+        merged = bytearray(map(max, *(sketch.registers for _, sketch in buckets)))
+        return HyperLogLog.estimate(merged)
+
+    @staticmethod
+    def _hit(state: _UserIps, count: int, cutoff: datetime) -> SuspiciousHit:
+        if state.exact is not None:
+            return count, sorted(ip for ip, seen in state.exact.items() if seen >= cutoff), False
+        return count, [], True
+
+    def _evict(self, cutoff: datetime) -> None:
+        """淘汰窗口内不再活动的用户，并把用户数限制在上限内(调用方持锁)"""
+        users = self._users
+        # 按最近活动顺序排列，队首即最久未活动的用户
+        while users:
+            user_name, state = next(iter(users.items()))
+            if state.last_seen is not None and state.last_seen >= cutoff:
+                break
+            del users[user_name]
+        overflow = len(users) - settings.SUSPICIOUS_ACCESS_MAX_USERS
+        for _ in range(max(overflow, 0)):
+            users.popitem(last=False)
+
+
+# 进程内单例，由 main.py 在启动时从数据库重建
+suspicious_access_detector = SuspiciousAccessDetector()
+
+
+def rebuild_suspicious_access_detector() -> None:
+    """启动时读取阈值配置并重建检测器状态，数据库不可用时只记录警告"""
+    from app.db.session import SessionLocal
+    from app.services.alert_engine import AlertEngine
+
+    db = SessionLocal()
+    try:
+        AlertEngine(db).sync_suspicious_access_config(force=True)
+        count = suspicious_access_detector.rebuild(db)
+        logger.info("suspicious access detector rebuilt with %d user/ip pairs", count)
+    except Exception:  # noqa: BLE001
+        logger.warning("suspicious access detector rebuild failed", exc_info=True)
+    finally:
+        db.close()
@@ -0,0 +1,116 @@
+"""
+压缩上传工具 - Compressed Upload Helpers
+
+按文件头魔数识别 gzip/bz2/xz 压缩格式，返回边读边解压的文件对象，
+解压后的数据量受 INGEST_MAX_DECOMPRESSED_BYTES 限制(防止压缩炸弹)
+"""
+import bz2
+import gzip
+import lzma
+import zlib
+from typing import BinaryIO, Optional, Tuple, Type
+
+from app.core.config import settings
+
+# (魔数, 压缩格式)
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+
+# 各格式解压器读取时表示数据损坏或被截断的异常(bz2 以 OSError 报告数据流错误)
+DECOMPRESSION_ERRORS = {
+    "gzip": (gzip.BadGzipFile, EOFError, zlib.error),
+    "bz2": (OSError, EOFError),
+    "xz": (lzma.LZMAError, EOFError),
+}
+
+
+class DecompressedSizeExceeded(Exception):
+    """解压后的数据量超过限制"""
+
+
+class CompressedDataError(Exception):
+    """压缩数据损坏或被截断"""
+
+
+def detect_compression(stream: BinaryIO) -> Optional[str]:
+    """
+    根据文件头识别压缩格式，读取后恢复到文件开头
+
+    Returns:
+        "gzip" / "bz2" / "xz"，未压缩返回 None
+    """
+    head = stream.read(6)
+    stream.seek(0)
+    for magic, kind in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+class SizeLimitedReader:
+    """
+    解压流的只读包装
+
+    累计读取量达到 limit 后先返回限额内的数据，下一次读取再抛出 DecompressedSizeExceeded；
+    解压器读取时抛出的 errors 中的异常转换为 CompressedDataError，
+    其他异常(如底层 I/O 错误)原样抛出
+    """
+
+    def __init__(self, stream: BinaryIO, limit: int, errors: Tuple[Type[BaseException], ...] = ()):
+        self._stream = stream
+        self._errors = errors
+        self._exceeded = False
+        self.limit = limit
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if self._exceeded:
+            raise DecompressedSizeExceeded()
+        remaining = self.limit - self.bytes_read
+        # 多读 1 字节判断是否超限
+        want = remaining + 1 if size is None or size < 0 else min(size, remaining + 1)
+        try:
+            data = self._stream.read(want)
+        except self._errors as exc:
+            raise CompressedDataError(str(exc) or type(exc).__name__) from exc
+        if len(data) > remaining:
+            self._exceeded = True
+            if remaining == 0:
+                raise DecompressedSizeExceeded()
+            data = data[:remaining]
+        self.bytes_read += len(data)
+        return data
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def __enter__(self) -> "SizeLimitedReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_decompressed(stream: BinaryIO, kind: str, limit: Optional[int] = None) -> SizeLimitedReader:
+    """
+    打开边读边解压的文件对象，内存占用只与每次 read 的块大小有关
+
+    Args:
+        stream: 压缩数据的文件对象
+        kind: detect_compression 返回的压缩格式
+        limit: 解压后最大字节数，默认 INGEST_MAX_DECOMPRESSED_BYTES
+    """
+    if kind == "gzip":
+        decompressed = gzip.GzipFile(fileobj=stream, mode="rb")
+    elif kind == "bz2":
+        decompressed = bz2.BZ2File(stream, mode="rb")
+    elif kind == "xz":
+        decompressed = lzma.LZMAFile(stream, mode="rb")
+    else:
+        raise ValueError(f"unsupported compression: {kind}")
+    return SizeLimitedReader(
+        decompressed, limit or settings.INGEST_MAX_DECOMPRESSED_BYTES, DECOMPRESSION_ERRORS[kind]
+    )
@@ -0,0 +1,60 @@
+"""
+日志事件分类 - Event Classifier
+
+入库时对 message 做一次多模式扫描，把登录失败/成功等事件写入 logs.event_type，
+告警与统计按该索引列过滤，不再对 message 做 LIKE '%login%failed%' 全窗口扫描
+
+所有关键字合并为一个忽略大小写的正则(交替分支由 re 编译为一个匹配自动机)，
+finditer 单遍产出关键字出现序列；每类事件是若干有序关键字对
+(如 login ... failed)，判定与原 LIKE '%a%b%' 条件等价: a 的某次出现结束后还出现了 b
+"""
+import re
+from typing import Dict, Optional, Tuple
+
+from app.models.log import LogEventTypeEnum
+
+# 事件 -> 有序关键字对列表(任一对满足即为该事件)；按顺序判定，先命中者优先
+EVENT_PATTERNS: Tuple[Tuple[LogEventTypeEnum, Tuple[Tuple[str, str], ...]], ...] = (
+    (LogEventTypeEnum.LOGIN_FAILED, (("login", "failed"), ("authentication", "failed"))),
+    (LogEventTypeEnum.LOGIN_SUCCESS, (("login", "success"),)),
+)
+
+_KEYWORDS = sorted({word for _, pairs in EVENT_PATTERNS for pair in pairs for word in pair}, key=len, reverse=True)
+_SCANNER = re.compile("|".join(re.escape(word) for word in _KEYWORDS), re.IGNORECASE)
+
+
+def classify_event(message: Optional[str]) -> LogEventTypeEnum:
+    """
+    判断日志消息的事件类型
+
+    Args:
+        message: 日志消息
+
+    Returns:
+        事件类型，未命中任何事件时为 OTHER
+    """
+    if not message:
+        return LogEventTypeEnum.OTHER
+
+    # 每个关键字的首次结束位置与最后一次开始位置，足以判定 "a 之后出现 b"
+    first_end: Dict[str, int] = {}
+    last_start: Dict[str, int] = {}
+    for match in _SCANNER.finditer(message):
+        word = match.group().lower()
+        first_end.setdefault(word, match.end())
+        last_start[word] = match.start()
+    if not first_end:
+        return LogEventTypeEnum.OTHER
+
+    for event, pairs in EVENT_PATTERNS:
+        for a, b in pairs:
+            end = first_end.get(a)
+            if end is not None and last_start.get(b, -1) >= end:
+                return event
+    return LogEventTypeEnum.OTHER
+
+
+def event_type_of(log) -> LogEventTypeEnum:
+    """日志(Log/LogEvent)的事件类型，尚未回填的历史行按 message 现场分类"""
+    event_type = log.event_type
+    return event_type if event_type is not None else classify_event(log.message)
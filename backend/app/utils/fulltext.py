@@ -0,0 +1,180 @@
+"""
+关键字全文检索 - Full-text Search
+
+把用户输入的关键字解析为检索条件：
+- 空格分隔的多个词: 全部命中(AND)
+- "双引号": 短语，按原文连续匹配
+- 词尾 *: 前缀匹配
+
+检索结果与子串匹配(LIKE '%词%')一致，按数据库方言走各自的全文索引，
+随 INSERT 增量维护，与时间/级别/来源等其他条件在同一查询中求交：
+- MySQL: MATCH ... AGAINST (... IN BOOLEAN MODE)，走 ngram 全文索引
+  (ft_logs_message / ft_operation_log_detail / ft_operation_log_username)；
+  ngram 按 FULLTEXT_NGRAM_SIZE 字切分，索引须在 innodb_ft_enable_stopword=OFF 下创建
+  (见 005 迁移)，否则含停用词的 ngram 不入索引，对应的词查不到
+- SQLite(本地开发与测试): 主键 IN (FTS5 trigram 外部内容表的 MATCH 结果)，
+  FTS5 表与同步触发器随建表创建(sqlite_fulltext)
+短于切分长度的词无法走索引，MySQL 下含标点/空格的词只能用其中的单词片段走索引，
+这些词都在全文条件命中的行上再用 LIKE 按原文过滤；
+其他数据库或关闭 FULLTEXT_SEARCH_ENABLED 时全部退化为逐词 LIKE 的 AND 组合
+"""
+import re
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import DDL, Table, and_, event, literal_column, select, table, true
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+
+# 短语或单词(可带前缀通配符)
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+# 词中连续的单词字符，MySQL 布尔模式下只把这些片段作为短语送入 MATCH，运算符与标点不进入检索串
+_WORD_RUN_RE = re.compile(r"\w+")
+
+
+# SQLite FTS5 trigram 分词按 3 字切分
+SQLITE_TRIGRAM_SIZE = 3
+
+
+class SearchTerm(NamedTuple):
+    text: str
+    phrase: bool = False
+    prefix: bool = False
+
+
+def parse_search(keyword: str) -> List[SearchTerm]:
+    """
+    解析关键字，如 'login "invalid user" adm*' 解析为词 login、短语 invalid user、前缀 adm
+
+    词与短语保留原文(含 - @ . 等字符)，只去掉前缀通配的词尾 *
+    """
+    terms = []
+    for phrase, word in _TOKEN_RE.findall(keyword or ""):
+        if phrase:
+            text = phrase.strip()
+            if text:
+                terms.append(SearchTerm(text, phrase=True))
+            continue
+        prefix = word.endswith("*")
+        text = word.rstrip("*") if prefix else word
+        if text:
+            terms.append(SearchTerm(text, prefix=prefix))
+    return terms
+
+
+def _word_runs(term: SearchTerm) -> List[str]:
+    """词中可走 ngram 索引的单词字符片段(不短于 FULLTEXT_NGRAM_SIZE)"""
+    return [run for run in _WORD_RUN_RE.findall(term.text) if len(run) >= settings.FULLTEXT_NGRAM_SIZE]
+
+
+def boolean_mode_query(terms: List[SearchTerm]) -> str:
+    """
+    生成 MySQL 布尔模式检索串
+
+    每个词的单词字符片段各作为必须命中的短语(+"片段")：ngram 下短语即子串，
+    原文含运算符或标点的词(如 john-doe)得到的是子串匹配的超集，由调用方再用 LIKE 复核
+    """
+    return " ".join(f'+"{run}"' for term in terms for run in _word_runs(term))
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fts5_query(terms: List[SearchTerm]) -> str:
+    """生成 SQLite FTS5 检索串: 每个词按字符串(trigram 下即子串)匹配，AND 组合"""
+    return " AND ".join('"' + term.text.replace('"', '""') + '"' for term in terms)
+
+
+def fts_table_name(table_name: str, column_name: str) -> str:
+    """SQLite 下列对应的 FTS5 外部内容表名"""
+    return f"{table_name}_{column_name}_fts"
+
+
+def sqlite_fulltext(target: Table, column_name: str) -> None:
+    """
+    为 SQLite 注册列的 FTS5 trigram 外部内容表，随 target 建表/删表创建与删除
+
+    插入/删除/更新由触发器同步到 FTS5 表，主键须为整型 id
+    """
+    name = fts_table_name(target.name, column_name)
+    source, column = target.name, column_name
+    statements = (
+        f"CREATE VIRTUAL TABLE {name} USING fts5("
+        f"{column}, content='{source}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {name}(rowid, {column}) VALUES (new.id, new.{column}); END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END",
+        f"CREATE TRIGGER {name}_au AFTER UPDATE OF {column} ON {source} BEGIN "
+        f"INSERT INTO {name}({name}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+        f"INSERT INTO {name}(rowid, {column}) VALUES (new.id, new.{column}); END",
+    )
+    for statement in statements:
+        event.listen(target, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(target, "before_drop", DDL(f"DROP TABLE IF EXISTS {name}").execute_if(dialect="sqlite"))
+
+
+def _index_condition(
+        column, terms: List[SearchTerm], dialect_name: str
+) -> Tuple[Optional[ColumnElement], List[SearchTerm]]:
+    """
+    全文索引条件
+
+    Returns:
+        (索引条件，无可用索引时为 None; 索引条件已与子串匹配完全一致的词，其余的词由调用方 LIKE 过滤)
+    """
+    if not settings.FULLTEXT_SEARCH_ENABLED:
+        return None, []
+    if dialect_name == "mysql":
+        indexed = [term for term in terms if _word_runs(term)]
+        if not indexed:
+            return None, []
+        exact = [term for term in indexed if _word_runs(term) == [term.text]]
+        return column.match(boolean_mode_query(indexed)), exact
+    if dialect_name == "sqlite":
+        indexed = [term for term in terms if len(term.text) >= SQLITE_TRIGRAM_SIZE]
+        if not indexed:
+            return None, []
+        source = column.expression.table
+        fts = fts_table_name(source.name, column.expression.name)
+        matched = select(literal_column("rowid")).select_from(table(fts)).where(
+            literal_column(fts).op("MATCH")(fts5_query(indexed))
+        )
+        return source.c.id.in_(matched), indexed
+    return None, []
+
+
+def _terms_condition(column, terms: List[SearchTerm], dialect_name: str) -> ColumnElement:
+    if not terms:
+        return true()
+    matched, exact = _index_condition(column, terms, dialect_name)
+    conditions = [matched] if matched is not None else []
+    conditions.extend(
+        column.like(f"%{_escape_like(term.text)}%", escape="\\") for term in terms if term not in exact
+    )
+    return and_(*conditions)
+
+
+def keyword_condition(column, keyword: str, dialect_name: str) -> ColumnElement:
+    """
+    关键字检索条件(多词 AND / "短语" / 前缀*)
+
+    Args:
+        column: 被检索的 ORM 列(MySQL 下需有同列的 FULLTEXT 索引，SQLite 下需经 sqlite_fulltext 注册)
+        keyword: 用户输入的关键字
+        dialect_name: 当前数据库方言名
+    """
+    return _terms_condition(column, parse_search(keyword), dialect_name)
+
+
+def substring_condition(column, text: str, dialect_name: str) -> ColumnElement:
+    """
+    整段原文的子串匹配条件(不拆词，与 LIKE '%原文%' 一致)，可用全文索引时走索引
+
+    Args:
+        column: 同 keyword_condition
+        text: 原文，空格与标点都按字面匹配
+        dialect_name: 当前数据库方言名
+    """
+    return _terms_condition(column, [SearchTerm(text)] if text else [], dialect_name)
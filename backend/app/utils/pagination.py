@@ -0,0 +1,136 @@
+"""
+键集分页 - Keyset Pagination
+
+列表按 (时间列, id) 倒序(最新在前)分页，游标记录当前页边界行的 (时间, id)：
+下一页取边界之后(更旧)的行，上一页取边界之前(更新)的行并反转，
+每页只沿 (时间列) 索引(InnoDB 二级索引隐含主键，即 (时间列, id))读取 page_size + 1 行，
+与页码深度无关；OFFSET 分页只保留给浅页(见 offset_allowed)
+
+游标对客户端不透明: base64url 编码的 {"t": 时间, "i": id, "d": 方向}
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from app.core.config import settings
+
+NEXT = "next"
+PREV = "prev"
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析"""
+
+
+class KeysetPage(NamedTuple):
+    """一页结果及前后翻页的游标(没有对应方向的页时为 None)"""
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+def encode_cursor(timestamp: datetime, row_id: int, direction: str) -> str:
+    payload = json.dumps({"t": timestamp.isoformat(), "i": row_id, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    """
+    解析游标
+
+    Returns:
+        (边界时间, 边界 id, 方向)
+
+    Raises:
+        InvalidCursor: 游标格式错误
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        direction = payload["d"]
+        if direction not in (NEXT, PREV):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["t"]), int(payload["i"]), direction
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("无效的分页游标") from e
+
+
+def offset_allowed(page: int, page_size: int) -> bool:
+    """OFFSET 分页是否在浅页范围内(跳过的行数不超过 PAGINATION_MAX_OFFSET)"""
+    return (page - 1) * page_size <= settings.PAGINATION_MAX_OFFSET
+
+
+def keyset_page(query: Query, time_column, id_column, page_size: int, cursor: Optional[str] = None) -> KeysetPage:
+    """
+    按 (time_column, id_column) 倒序对已带筛选条件的查询分页
+
+    Args:
+        query: 已应用筛选条件、未排序的查询
+        time_column: 排序时间列(需有索引)
+        id_column: 主键列，时间相同时决定顺序
+        page_size: 每页条数
+        cursor: 上一次返回的 next_cursor / prev_cursor，首页为 None
+
+    Raises:
+        InvalidCursor: 游标格式错误
+    """
+    if cursor is None:
+        rows = query.order_by(time_column.desc(), id_column.desc()).limit(page_size + 1).all()
+        items = rows[:page_size]
+        has_more = len(rows) > page_size
+        return KeysetPage(items, _cursor(items[-1], time_column, id_column, NEXT) if has_more else None, None)
+
+    timestamp, row_id, direction = decode_cursor(cursor)
+    if direction == NEXT:
+        # time <= t 给出索引范围，OR 条件只在边界时间上细分
+        query = query.filter(
+            time_column <= timestamp, or_(time_column < timestamp, and_(time_column == timestamp, id_column < row_id))
+        ).order_by(time_column.desc(), id_column.desc())
+    else:
+        query = query.filter(
+            time_column >= timestamp, or_(time_column > timestamp, and_(time_column == timestamp, id_column > row_id))
+        ).order_by(time_column.asc(), id_column.asc())
+
+    rows = query.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    items = rows[:page_size]
+    if direction == PREV:
+        items.reverse()
+    if not items:
+        return KeysetPage(items, None, None)
+
+    has_next = has_more if direction == NEXT else True
+    has_prev = has_more if direction == PREV else True
+    return KeysetPage(
+        items,
+        _cursor(items[-1], time_column, id_column, NEXT) if has_next else None,
+        _cursor(items[0], time_column, id_column, PREV) if has_prev else None,
+    )
+
+
+def offset_page(query: Query, time_column, id_column, page: int, page_size: int) -> KeysetPage:
+    """
+    按页码(OFFSET)取浅页，同样返回前后游标，客户端可从该页起改用游标翻页
+
+    调用方应先用 offset_allowed 检查页码深度
+    """
+    rows = query.order_by(time_column.desc(), id_column.desc()).offset(
+        (page - 1) * page_size
+    ).limit(page_size + 1).all()
+    items = rows[:page_size]
+    if not items:
+        return KeysetPage(items, None, None)
+    return KeysetPage(
+        items,
+        _cursor(items[-1], time_column, id_column, NEXT) if len(rows) > page_size else None,
+        _cursor(items[0], time_column, id_column, PREV) if page > 1 else None,
+    )
+
+
+def _cursor(row, time_column, id_column, direction: str) -> str:
+    return encode_cursor(getattr(row, time_column.key), getattr(row, id_column.key), direction)
@@ -0,0 +1,380 @@
+"""
+日志行解析工具 - Log Line Parser
+
+每种日志来源(LogSourceEnum)对应一个解析器，正则在导入时预编译；
+上传时根据文件前 N 行自动识别格式，选定后整份文件复用同一个解析器
+
+正则直接在字节数据(bytes/mmap/memoryview)上匹配，时间戳和级别在字节上完成转换，
+只有最终写入 ip/user_name/message 的捕获组才会解码为 str
+"""
+import re
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Type, Union
+
+from app.core.config import settings
+from app.models.log import LogLevelEnum, LogSourceEnum
+from app.utils.timestamp import TimestampDecoder
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class ParsedLog(NamedTuple):
+    """单行日志的解析结果(紧凑结构，便于批量入库)"""
+    timestamp: datetime
+    level: LogLevelEnum
+    ip: Optional[str]
+    user_name: Optional[str]
+    message: str
+
+
+# 常见级别写法归一化
+LEVEL_ALIASES = {
+    "DEBUG": LogLevelEnum.DEBUG,
+    "INFO": LogLevelEnum.INFO,
+    "NOTE": LogLevelEnum.INFO,
+    "NOTICE": LogLevelEnum.INFO,
+    "SYSTEM": LogLevelEnum.INFO,
+    "WARN": LogLevelEnum.WARN,
+    "WARNING": LogLevelEnum.WARN,
+    "ERROR": LogLevelEnum.ERROR,
+    "ERR": LogLevelEnum.ERROR,
+    "FATAL": LogLevelEnum.FATAL,
+    "CRITICAL": LogLevelEnum.FATAL,
+}
+_LEVEL_ALIASES_B = {key.encode(): value for key, value in LEVEL_ALIASES.items()}
+
+# syslog severity(0-7) -> 日志级别
+SYSLOG_SEVERITY_LEVELS = (
+    LogLevelEnum.FATAL,  # 0 emergency
+    LogLevelEnum.FATAL,  # 1 alert
+    LogLevelEnum.FATAL,  # 2 critical
+    LogLevelEnum.ERROR,  # 3 error
+    LogLevelEnum.WARN,  # 4 warning
+    LogLevelEnum.INFO,  # 5 notice
+    LogLevelEnum.INFO,  # 6 informational
+    LogLevelEnum.DEBUG,  # 7 debug
+)
+
+_IPV4_PATTERN = re.compile(rb"\b(\d{1,3}(?:\.\d{1,3}){3})\b")
+_BLANK_PATTERN = re.compile(rb"\s*\Z")
+
+
+def decode_field(value: Optional[bytes]) -> Optional[str]:
+    """解码字段，非法 UTF-8 字节用替换字符代替"""
+    return value.decode("utf-8", errors="replace") if value is not None else None
+
+
+def is_blank(line: Buffer) -> bool:
+    """判断一行是否只包含空白字符(与 iter_line_spans 的空行规则一致)"""
+    return _BLANK_PATTERN.match(line) is not None
+
+
+def iter_line_spans(
+        buf: Buffer,
+        start: int,
+        end: int,
+        max_line: int
+) -> Iterator[Optional[Tuple[int, int]]]:
+    """
+    在缓冲区 [start, end) 内按换行切分，产出每个非空行的 (起点, 终点) 偏移
+
+    不复制任何数据；行尾的 \\r 不计入终点，空白行跳过，
+    超过 max_line 字节的行产出 None 作为失败标记
+    """
+    find = buf.find
+    blank = _BLANK_PATTERN.match
+    pos = start
+    while pos < end:
+        nl = find(b"\n", pos, end)
+        line_end = end if nl < 0 else nl
+        if line_end - pos > max_line:
+            yield None
+        else:
+            stop = line_end
+            while stop > pos and buf[stop - 1] == 13:  # \r
+                stop -= 1
+            if blank(buf, pos, stop) is None:
+                yield pos, stop
+        pos = line_end + 1
+
+
+class LogParser:
+    """
+    解析器基类
+
+    子类提供预编译的字节正则 pattern，并实现 _convert(groups)；
+    parse_batch/parse_spans 为批量快速路径，避免逐行的方法查找和分派开销
+    """
+    source: LogSourceEnum = LogSourceEnum.OTHER
+    pattern: re.Pattern
+
+    def __init__(self):
+        # 时间戳布局在首行识别后固定；syslog 类格式不带年份，按解析器实例(即单个文件)固定
+        self.timestamps = TimestampDecoder()
+
+    def parse(self, line: Union[str, Buffer]) -> Optional[ParsedLog]:
+        """解析单行，格式不匹配时返回 None"""
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        match = self.pattern.match(line)
+        if match is None:
+            return None
+        return self._convert(match.groups())
+
+    def parse_batch(self, lines: Sequence[Buffer]) -> List[Optional[ParsedLog]]:
+        """批量解析，返回与 lines 一一对应的结果列表"""
+        match = self.pattern.match
+        convert = self._convert
+        return [convert(m.groups()) if (m := match(line)) is not None else None for line in lines]
+
+    def parse_spans(self, buf: Buffer, spans: Sequence[Tuple[int, int]]) -> List[Optional[ParsedLog]]:
+        """在同一缓冲区(如 mmap)上按偏移批量解析，正则直接匹配原始内存，不切片复制整行"""
+        match = self.pattern.match
+        convert = self._convert
+        return [
+            convert(m.groups()) if (m := match(buf, start, stop)) is not None else None
+            for start, stop in spans
+        ]
+
+    def _convert(self, groups: tuple) -> Optional[ParsedLog]:
+        raise NotImplementedError
+
+
+# 解析器注册表: 日志来源 -> 解析器类
+PARSER_REGISTRY: Dict[LogSourceEnum, Type[LogParser]] = {}
+
+
+def register_parser(cls: Type[LogParser]) -> Type[LogParser]:
+    """注册解析器的类装饰器"""
+    PARSER_REGISTRY[cls.source] = cls
+    return cls
+
+
+@register_parser
+class GenericParser(LogParser):
+    """通用格式: 2025-11-28 10:20:30 ERROR ip=1.2.3.4 user=alice user login failed"""
+    source = LogSourceEnum.OTHER
+    pattern = re.compile(
+        rb"(?P<ts>\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2})(?:[.,]\d+)?Z?\s+"
+        rb"\[?(?P<level>[A-Za-z]+)\]?\s+"
+        rb"(?:ip=(?P<ip>\S+)\s+)?"
+        rb"(?:user=(?P<user>\S+)\s+)?"
+        rb"(?P<msg>.*)"
+    )
+
+    def _convert(self, groups: tuple) -> Optional[ParsedLog]:
+        ts, level, ip, user, msg = groups
+        level = _LEVEL_ALIASES_B.get(level.upper())
+        timestamp = self.timestamps(ts)
+        if level is None or timestamp is None:
+            return None
+        return ParsedLog(timestamp, level, decode_field(ip), decode_field(user), decode_field(msg))
+
+
+@register_parser
+class WebAppParser(LogParser):
+    """
+    Nginx/Apache combined 访问日志:
+    1.2.3.4 - alice [28/Nov/2025:10:20:30 +0800] "POST /login HTTP/1.1" 401 153 "-" "curl/8.0"
+    """
+    source = LogSourceEnum.WEB_APP
+    pattern = re.compile(
+        rb"(?P<ip>\S+) \S+ (?P<user>\S+) \[(?P<ts>[^\]]+)\] "
+        rb"\"(?P<request>[^\"]*\" (?P<status>\d{3}))\s"
+    )
+
+    def _convert(self, groups: tuple) -> Optional[ParsedLog]:
+        ip, user, ts, request, status = groups
+        # 28/Nov/2025:10:20:30 +0800，保留日志中的本地时间
+        timestamp = self.timestamps(ts)
+        if timestamp is None:
+            return None
+
+        code = int(status)
+        if code >= 500:
+            level = LogLevelEnum.ERROR
+        elif code >= 400:
+            level = LogLevelEnum.WARN
+        else:
+            level = LogLevelEnum.INFO
+
+        # request 组为 `GET /path HTTP/1.1" 200`，去掉中间的引号作为 message
+        return ParsedLog(
+            timestamp,
+            level,
+            decode_field(ip),
+            None if user == b"-" else decode_field(user),
+            decode_field(request).replace('"', "", 1),
+        )
+
+
+@register_parser
+class NetworkParser(LogParser):
+    """
+    RFC 5424 syslog(交换机/网络设备):
+    <134>1 2025-11-28T10:20:30.003Z sw01 sshd 2345 - - login failed for bob from 1.2.3.4
+    """
+    source = LogSourceEnum.NETWORK
+    pattern = re.compile(
+        rb"<(?P<pri>\d{1,3})>1 (?P<ts>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})\S* "
+        rb"\S+ (?P<app>\S+) \S+ \S+ (?:-|\[.*?\]) ?(?P<msg>.*)"
+    )
+    _user_pattern = re.compile(rb"\b(?:user|for)[= ](?:invalid user )?([\w.@-]+)")
+
+    def _convert(self, groups: tuple) -> Optional[ParsedLog]:
+        pri, ts, app, msg = groups
+        timestamp = self.timestamps(ts)
+        if timestamp is None:
+            return None
+        level = SYSLOG_SEVERITY_LEVELS[int(pri) & 7]
+        ip_match = _IPV4_PATTERN.search(msg)
+        user_match = self._user_pattern.search(msg)
+        return ParsedLog(
+            timestamp,
+            level,
+            decode_field(ip_match.group(1)) if ip_match else None,
+            decode_field(user_match.group(1)) if user_match else None,
+            decode_field(app + b": " + msg),
+        )
+
+
+@register_parser
+class RouterParser(LogParser):
+    """
+    Cisco IOS 风格 syslog:
+    <189>Nov 28 10:20:30 r1 %SEC_LOGIN-4-LOGIN_FAILED: Login failed [user: bob] [Source: 1.2.3.4]
+    """
+    source = LogSourceEnum.ROUTER
+    pattern = re.compile(
+        rb"(?:<\d{1,3}>)?(?:\d+: )?(?P<ts>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2})(?:\.\d+)? "
+        rb"(?:\S+ )?(?:\d+: )?(?P<text>%[A-Z0-9_]+-(?P<sev>[0-7])-[A-Z0-9_]+: "
+        rb"(?P<msg>.*))"
+    )
+    _user_pattern = re.compile(rb"\[user: ([^\]]+)\]")
+
+    def _convert(self, groups: tuple) -> Optional[ParsedLog]:
+        ts, text, sev, msg = groups
+        timestamp = self.timestamps(ts)
+        if timestamp is None:
+            return None
+        ip_match = _IPV4_PATTERN.search(msg)
+        user_match = self._user_pattern.search(msg)
+        return ParsedLog(
+            timestamp,
+            SYSLOG_SEVERITY_LEVELS[int(sev)],
+            decode_field(ip_match.group(1)) if ip_match else None,
+            decode_field(user_match.group(1)) if user_match else None,
+            decode_field(text),
+        )
+
+
+@register_parser
+class FirewallParser(LogParser):
+    """
+    iptables/UFW 内核日志:
+    Nov 28 10:20:30 fw01 kernel: [UFW BLOCK] IN=eth0 OUT= SRC=1.2.3.4 DST=10.0.0.2 PROTO=TCP DPT=22
+    """
+    source = LogSourceEnum.FIREWALL
+    pattern = re.compile(
+        rb"(?P<ts>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) \S+ kernel: (?:\[\s*[\d.]+\] )?"
+        rb"(?P<msg>.*?\bSRC=(?P<ip>[0-9A-Fa-f:.]+).*)"
+    )
+    _deny_pattern = re.compile(rb"BLOCK|DROP|DENY|REJECT")
+
+    def _convert(self, groups: tuple) -> Optional[ParsedLog]:
+        ts, msg, ip = groups
+        timestamp = self.timestamps(ts)
+        if timestamp is None:
+            return None
+        level = LogLevelEnum.WARN if self._deny_pattern.search(msg) else LogLevelEnum.INFO
+        return ParsedLog(timestamp, level, decode_field(ip), None, decode_field(msg))
+
+
+@register_parser
+class DatabaseParser(LogParser):
+    """
+    MySQL 8 错误日志:
+    2025-11-28T10:20:30.123456Z 12 [Warning] [MY-010055] [Server] Access denied for user 'bob'@'1.2.3.4'
+    """
+    source = LogSourceEnum.DATABASE
+    pattern = re.compile(
+        rb"(?P<ts>\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})? "
+        rb"\d+ \[(?P<level>[A-Za-z]+)\] (?:\[[^\]]*\] )*(?P<msg>.*)"
+    )
+    _account_pattern = re.compile(rb"user '([^']*)'@'([^']*)'")
+
+    def _convert(self, groups: tuple) -> Optional[ParsedLog]:
+        ts, level, msg = groups
+        level = _LEVEL_ALIASES_B.get(level.upper())
+        timestamp = self.timestamps(ts)
+        if level is None or timestamp is None:
+            return None
+        account = self._account_pattern.search(msg)
+        if account:
+            user, host = account.groups()
+            # 拒绝登录属于认证失败，统一为 ERROR 便于告警规则识别
+            if msg.startswith(b"Access denied"):
+                level = LogLevelEnum.ERROR
+            return ParsedLog(timestamp, level, decode_field(host) or None, decode_field(user) or None, decode_field(msg))
+        return ParsedLog(timestamp, level, None, None, decode_field(msg))
+
+
+def get_parser(source: LogSourceEnum) -> LogParser:
+    """获取指定来源的解析器实例，未注册的来源使用通用解析器"""
+    return PARSER_REGISTRY.get(source, GenericParser)()
+
+
+def detect_parser(
+        lines: Iterable[Optional[Buffer]],
+        preferred: Optional[LogSourceEnum] = None,
+        sample_size: Optional[int] = None
+) -> LogParser:
+    """
+    根据样本行识别日志格式
+
+    对前 sample_size 个非空行逐一尝试所有已注册解析器，选择命中行数最多的；
+    命中数相同时优先使用 preferred(即上传时指定的来源)，全部不命中时回退到 preferred
+
+    Args:
+        lines: 样本行(bytes)，None 表示超长行，会被忽略
+        preferred: 优先考虑的日志来源
+        sample_size: 样本行数，默认取 PARSER_DETECT_SAMPLE_LINES
+
+    Returns:
+        解析器实例
+    """
+    sample_size = sample_size or settings.PARSER_DETECT_SAMPLE_LINES
+    sample = []
+    for line in lines:
+        if line is not None and not is_blank(line):
+            sample.append(line)
+            if len(sample) >= sample_size:
+                break
+
+    fallback = get_parser(preferred) if preferred is not None else GenericParser()
+    if not sample:
+        return fallback
+
+    best, best_hits = fallback, sum(1 for r in fallback.parse_batch(sample) if r is not None)
+    for source, parser_cls in PARSER_REGISTRY.items():
+        if source == fallback.source:
+            continue
+        parser = parser_cls()
+        hits = sum(1 for r in parser.parse_batch(sample) if r is not None)
+        if hits > best_hits:
+            best, best_hits = parser, hits
+    return best
+
+
+def parse_line(line: Union[str, Buffer], parser: Optional[LogParser] = None) -> Optional[ParsedLog]:
+    """
+    解析单行日志(便捷函数)
+
+    Args:
+        line: 去掉换行符后的日志文本
+        parser: 解析器，默认使用通用解析器
+
+    Returns:
+        解析结果，格式无法识别时返回 None
+    """
+    return (parser or GenericParser()).parse(line)
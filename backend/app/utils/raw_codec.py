@@ -0,0 +1,105 @@
+"""
+原始日志压缩编码 - Raw Data Codec
+
+开启 LOG_RAW_DATA_COMPRESSION 后，logs.raw_data 以 zlib 压缩写入 raw_data_z(二进制列)，
+可选使用按来源预置的共享字典：单行日志很短，普通 zlib 几乎压不动，
+字典提供了该来源常见的固定片段，压缩率明显提升
+
+压缩数据格式: 1 字节字典编号 + zlib 流；编号 0 表示不使用字典
+"""
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# 字典内容一经使用不可修改(旧数据解压依赖原字典)，如需调整请新增编号
+_DICTIONARY_SAMPLES: Dict[int, Tuple[str, bytes]] = {
+    1: ("OTHER", (
+        b" DEBUG  INFO  WARN  WARNING  ERROR  FATAL  ip=192.168.0. ip=10.0.0. user=admin user=root user="
+        b" user login failed user login success password incorrect session timeout connection refused"
+        b" 2025-01-01 00:00:00 2025-11-28T10:20:30Z 2025-"
+    )),
+    2: ("WEB_APP", (
+        b'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 '
+        b'Safari/537.36" "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) curl/8.0 python-requests/2.31 '
+        b'"-" "-" 200 404 401 403 500 302 304 HTTP/1.0" HTTP/1.1" HTTP/2.0" "GET / "POST /api/v1/ "GET /static/ '
+        b'"POST /login /favicon.ico +0800] +0000] /Jan/2025: /Feb/2025: /Nov/2025: /Dec/2025: 192.168.0. 10.0.0. - - ['
+    )),
+    3: ("NETWORK", (
+        b"<134>1 <133>1 <132>1 <131>1 <86>1 <38>1 .000Z sw01 sw02 core01 sshd dhcpd snmpd kernel - - "
+        b"login failed for invalid user from port ssh2 Accepted password for Failed password for "
+        b"interface GigabitEthernet0/1 changed state to up changed state to down 192.168.0. 10.0.0. 2025-"
+    )),
+    4: ("ROUTER", (
+        b"<189>Jan <189>Nov <189>Dec <187>Oct %SEC_LOGIN-4-LOGIN_FAILED: Login failed [user: ] [Source: ] "
+        b"[localport: 22] [Reason: Login Authentication Failed] at %SEC_LOGIN-5-LOGIN_SUCCESS: Login Success "
+        b"%LINK-3-UPDOWN: Interface GigabitEthernet0/1, changed state to down %LINEPROTO-5-UPDOWN: Line protocol "
+        b"on Interface %SYS-5-CONFIG_I: Configured from console by 192.168.0. 10.0.0. "
+    )),
+    5: ("FIREWALL", (
+        b" kernel: [UFW BLOCK] [UFW ALLOW] [UFW AUDIT] IN=eth0 OUT= MAC= SRC=192.168.0. DST=10.0.0. LEN=60 "
+        b"TOS=0x00 PREC=0x00 TTL=64 ID=0 DF PROTO=TCP SPT= DPT=22 DPT=80 DPT=443 DPT=3389 WINDOW=64240 RES=0x00 "
+        b"SYN URGP=0 PROTO=UDP PROTO=ICMP TYPE=8 CODE=0 fw01 Jan Nov Dec "
+    )),
+    6: ("DATABASE", (
+        b"Z 0 [System] [MY-010931] [Server] /usr/sbin/mysqld: ready for connections. Z 12 [Warning] "
+        b"[MY-010055] [Server] Access denied for user 'root'@'localhost' (using password: YES) "
+        b"(using password: NO) [ERROR] [MY-010584] [Repl] Slave SQL for channel '': Aborted connection "
+        b"to db: 'unconnected' user: host: (Got timeout reading communication packets) 2025-"
+    )),
+}
+
+DICTIONARIES: Dict[int, bytes] = {dict_id: data for dict_id, (_, data) in _DICTIONARY_SAMPLES.items()}
+# 日志来源(LogSourceEnum.value) -> 字典编号；按字符串索引，避免与 models 循环导入
+_SOURCE_DICTIONARY: Dict[str, int] = {
+    source: dict_id for dict_id, (source, _) in _DICTIONARY_SAMPLES.items()
+}
+
+NO_DICTIONARY = 0
+
+
+def compress_raw_data(data: bytes, source: Any = None) -> bytes:
+    """
+    压缩原始日志(UTF-8 字节)，来源有预置字典且开启 LOG_RAW_DATA_DICTIONARY 时使用字典
+
+    Args:
+        data: 原始日志字节
+        source: 日志来源(LogSourceEnum 或其取值)
+    """
+    dict_id = NO_DICTIONARY
+    if settings.LOG_RAW_DATA_DICTIONARY and source is not None:
+        dict_id = _SOURCE_DICTIONARY.get(getattr(source, "value", source), NO_DICTIONARY)
+    level = settings.LOG_RAW_DATA_COMPRESS_LEVEL
+    if dict_id == NO_DICTIONARY:
+        return bytes((NO_DICTIONARY,)) + zlib.compress(data, level)
+    compressor = zlib.compressobj(level, zdict=DICTIONARIES[dict_id])
+    return bytes((dict_id,)) + compressor.compress(data) + compressor.flush()
+
+
+def decompress_raw_data(blob: bytes) -> str:
+    """解压 compress_raw_data 的结果"""
+    dict_id = blob[0]
+    if dict_id == NO_DICTIONARY:
+        data = zlib.decompress(blob[1:])
+    else:
+        decompressor = zlib.decompressobj(zdict=DICTIONARIES[dict_id])
+        data = decompressor.decompress(blob[1:]) + decompressor.flush()
+    return data.decode("utf-8", errors="replace")
+
+
+def encode_raw_data(text: Optional[str], source: Any = None) -> dict:
+    """
+    把 raw_data 文本转换为 logs 表的存储字段
+
+    未开启压缩、文本为空或压缩后不更小时按原文存储
+
+    Returns:
+        {"_raw_data": ..., "raw_data_z": ..., "raw_data_size": ...}
+    """
+    if text is None or not settings.LOG_RAW_DATA_COMPRESSION:
+        return {"_raw_data": text, "raw_data_z": None, "raw_data_size": None}
+    data = text.encode("utf-8")
+    blob = compress_raw_data(data, source)
+    if len(blob) >= len(data):
+        return {"_raw_data": text, "raw_data_z": None, "raw_data_size": None}
+    return {"_raw_data": None, "raw_data_z": blob, "raw_data_size": len(data)}
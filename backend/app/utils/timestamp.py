@@ -0,0 +1,177 @@
+"""
+时间戳解码 - Timestamp Decoder
+
+每个解析器实例(即单个文件)持有一个 TimestampDecoder：
+首个时间戳确定布局(ISO / syslog / CLF)后固定使用按偏移切片的专用解码函数；
+相邻行同一秒直接复用上次结果，同一分钟只解析秒数，
+专用函数无法处理的非常规写法回退到 fromisoformat / strptime 通用路径
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+MONTHS = {
+    b"Jan": 1, b"Feb": 2, b"Mar": 3, b"Apr": 4, b"May": 5, b"Jun": 6,
+    b"Jul": 7, b"Aug": 8, b"Sep": 9, b"Oct": 10, b"Nov": 11, b"Dec": 12,
+}
+
+# 时间戳布局
+LAYOUT_ISO = "iso"  # 2025-11-28 10:20:30 / 2025-11-28T10:20:30.123Z
+LAYOUT_SYSLOG = "syslog"  # Nov 28 10:20:30(不带年份)
+LAYOUT_CLF = "clf"  # 28/Nov/2025:10:20:30 +0800(Nginx/Apache 访问日志)
+
+# 通用路径依次尝试的格式(fromisoformat 之后)
+FALLBACK_FORMATS = (
+    "%Y/%m/%d %H:%M:%S",
+    "%d/%b/%Y:%H:%M:%S %z",
+    "%d/%b/%Y:%H:%M:%S",
+    "%b %d %H:%M:%S",
+    "%b %d %Y %H:%M:%S",
+    "%d-%b-%Y %H:%M:%S",
+    "%Y%m%d %H:%M:%S",
+)
+
+_COLON = ord(":")
+_SLASH = ord("/")
+_SPACE = ord(" ")
+
+
+def detect_layout(value: bytes) -> Optional[str]:
+    """按分隔符位置判断时间戳布局，无法识别返回 None"""
+    if len(value) >= 19 and value[4] in b"-/" and value[7] in b"-/" and value[10] in b"T " \
+            and value[13] == _COLON and value[16] == _COLON:
+        return LAYOUT_ISO
+    if len(value) >= 15 and value[0:3] in MONTHS and value[3] == _SPACE and value[6] == _SPACE \
+            and value[9] == _COLON and value[12] == _COLON:
+        return LAYOUT_SYSLOG
+    if len(value) >= 20 and value[2] == _SLASH and value[6] == _SLASH and value[11] == _COLON \
+            and value[3:6] in MONTHS:
+        return LAYOUT_CLF
+    return None
+
+
+class TimestampDecoder:
+    """
+    带布局识别和前缀缓存的时间戳解码器(非线程安全，按文件使用)
+
+    调用 decoder(value) 返回 naive datetime(忽略小数秒和时区，保留日志中的本地时间)，
+    无法解析时返回 None；syslog 布局不带年份，使用 year，晚于 not_after 时视为去年(跨年轮转)
+    """
+
+    def __init__(self, year: Optional[int] = None, not_after: Optional[datetime] = None):
+        now = datetime.now()
+        self.year = year or now.year
+        self.not_after = not_after or now + timedelta(days=1)
+        self.layout: Optional[str] = None
+        self._decode: Callable[[bytes], Optional[datetime]] = self._detect
+        # 同一秒: 原样复用上次结果
+        self._last_value: Optional[bytes] = None
+        self._last_result: Optional[datetime] = None
+        # 同一分钟: 复用整分钟的 datetime，只替换秒
+        self._prefix: Optional[bytes] = None
+        self._base: Optional[datetime] = None
+
+    def __call__(self, value: bytes) -> Optional[datetime]:
+        return self._decode(value)
+
+    def _detect(self, value: bytes) -> Optional[datetime]:
+        layout = detect_layout(value)
+        if layout is None:
+            # 尚未识别出布局，逐条走通用路径，直到遇到可识别的时间戳
+            return parse_timestamp_general(value, self.year, self.not_after)
+        self.layout = layout
+        self._decode = {
+            LAYOUT_ISO: self._decode_iso,
+            LAYOUT_SYSLOG: self._decode_syslog,
+            LAYOUT_CLF: self._decode_clf,
+        }[layout]
+        return self._decode(value)
+
+    def _decode_iso(self, value: bytes) -> Optional[datetime]:
+        if value == self._last_value:
+            return self._last_result
+        prefix = value[:16]
+        try:
+            if prefix != self._prefix:
+                self._base = datetime(
+                    int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                    int(value[11:13]), int(value[14:16]),
+                )
+                self._prefix = prefix
+            result = self._base.replace(second=int(value[17:19]))
+        except ValueError:
+            return parse_timestamp_general(value, self.year, self.not_after)
+        self._last_value, self._last_result = value, result
+        return result
+
+    def _decode_syslog(self, value: bytes) -> Optional[datetime]:
+        if value == self._last_value:
+            return self._last_result
+        prefix = value[:12]
+        try:
+            if prefix != self._prefix:
+                month = MONTHS.get(value[0:3])
+                if month is None:
+                    return parse_timestamp_general(value, self.year, self.not_after)
+                base = datetime(self.year, month, int(value[4:6]), int(value[7:9]), int(value[10:12]))
+                if base > self.not_after:
+                    base = base.replace(year=self.year - 1)
+                self._base, self._prefix = base, prefix
+            result = self._base.replace(second=int(value[13:15]))
+        except ValueError:
+            return parse_timestamp_general(value, self.year, self.not_after)
+        self._last_value, self._last_result = value, result
+        return result
+
+    def _decode_clf(self, value: bytes) -> Optional[datetime]:
+        if value == self._last_value:
+            return self._last_result
+        prefix = value[:17]
+        try:
+            if prefix != self._prefix:
+                month = MONTHS.get(value[3:6])
+                if month is None:
+                    return parse_timestamp_general(value, self.year, self.not_after)
+                self._base = datetime(
+                    int(value[7:11]), month, int(value[0:2]),
+                    int(value[12:14]), int(value[15:17]),
+                )
+                self._prefix = prefix
+            result = self._base.replace(second=int(value[18:20]))
+        except ValueError:
+            return parse_timestamp_general(value, self.year, self.not_after)
+        self._last_value, self._last_result = value, result
+        return result
+
+
+def parse_timestamp_general(
+        value: bytes,
+        year: Optional[int] = None,
+        not_after: Optional[datetime] = None
+) -> Optional[datetime]:
+    """
+    通用(慢速)路径: fromisoformat 后依次尝试 FALLBACK_FORMATS
+
+    结果统一为 naive datetime；格式不带年份时使用 year，并按 not_after 处理跨年
+    """
+    text = value.decode("ascii", errors="replace").strip()
+    try:
+        return datetime.fromisoformat(text).replace(tzinfo=None)
+    except ValueError:
+        pass
+
+    for fmt in FALLBACK_FORMATS:
+        try:
+            result = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            now = datetime.now()
+            try:
+                result = result.replace(year=year or now.year)
+                if result > (not_after or now + timedelta(days=1)):
+                    result = result.replace(year=result.year - 1)
+            except ValueError:
+                # 2 月 29 日落在非闰年
+                return None
+        return result.replace(tzinfo=None)
+    return None
@@ -0,0 +1,113 @@
+"""
+列表序列化基准 - List Serialization Benchmark
+
+对比列表接口的两种读取路径在 100 / 1000 行一页时的每行耗时(内存 SQLite，排除网络与磁盘)：
+- orm: SELECT 整个 ORM 实体 -> 逐行 model_validate -> jsonable_encoder -> json.dumps(原实现)
+- lean: 只 SELECT 响应模型的列(行元组) -> 按响应模型缓存的序列化器直接编码为 JSON 字节
+
+两条路径输出的 JSON 内容会先做一致性校验
+
+用法(在 backend 目录下):
+    python -m benchmarks.bench_list_serialization --pages 100 1000 --repeat 20
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.models.alert import Alert, AlertLevel, AlertStatus, AlertType
+from app.models.log import Log, LogEventTypeEnum, LogLevelEnum, LogSourceEnum
+from app.models.operation_log import OperationLog
+from app.schemas.alert import AlertRead
+from app.schemas.log import LogListItem
+from app.schemas.operation_log import OperationLogListItem
+from app.utils.row_json import page_json, row_serializer
+
+# (名称, ORM 模型, 响应模型)
+CASES = (
+    ("operation_logs", OperationLog, OperationLogListItem),
+    ("logs", Log, LogListItem),
+    ("alerts", Alert, AlertRead),
+)
+
+
+def seed(engine, rows: int) -> None:
+    Base.metadata.create_all(engine, tables=[Log.__table__, OperationLog.__table__, Alert.__table__])
+    start = datetime(2025, 11, 28, 10, 0, 0)
+    with Session(engine) as db:
+        for i in range(rows):
+            at = start + timedelta(seconds=i)
+            db.add(OperationLog(
+                user_id=i % 50, username=f"user{i % 50}", action="UPLOAD_LOG", resource_type="log",
+                resource_id=str(i), detail=f"上传日志文件 access-{i}.log " + "x" * 200, result="SUCCESS",
+                ip_address=f"10.0.{i % 256}.{i % 200}", user_agent="Mozilla/5.0 " + "y" * 300,
+                request_url="/api/v1/logs/upload", request_method="POST", created_at=at,
+                extra_data=json.dumps({"lines": i, "payload": "z" * 2000}),
+            ))
+            log = Log(
+                source=LogSourceEnum.NETWORK, level=LogLevelEnum.WARN, timestamp=at, ip=f"10.1.{i % 256}.{i % 200}",
+                user_name=f"user{i % 50}", message=f"Failed password for user{i % 50} from 10.1.0.{i % 200} port 22",
+                event_type=LogEventTypeEnum.LOGIN_FAILED, created_at=at,
+            )
+            log.raw_data = "Nov 28 10:00:00 gw-01 sshd[123]: " + "r" * 500
+            db.add(log)
+            db.add(Alert(
+                alert_type=AlertType.BRUTE_FORCE, alert_level=AlertLevel.HIGH, title=f"暴力破解 10.1.0.{i % 200}",
+                description="5 分钟内登录失败 20 次 " + "d" * 300, related_ip=f"10.1.0.{i % 200}",
+                related_user=f"user{i % 50}", trigger_count=i % 7 + 1, status=AlertStatus.UNHANDLED,
+                created_at=at, updated_at=at, extra_data=json.dumps({"window": 5}),
+            ))
+        db.commit()
+
+
+def orm_page(engine, model, schema, rows: int) -> bytes:
+    with Session(engine) as db:
+        objects = db.query(model).order_by(model.id.desc()).limit(rows).all()
+        content = jsonable_encoder({"items": [schema.model_validate(obj) for obj in objects]})
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def lean_page(engine, model, schema, rows: int) -> bytes:
+    serializer = row_serializer(schema)
+    with Session(engine) as db:
+        result = db.query(*serializer.columns(model)).order_by(model.id.desc()).limit(rows).all()
+        return page_json({}, "items", serializer.dumps(result))
+
+
+def best_of(func: Callable[[], bytes], repeat: int) -> float:
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000], help="每页行数")
+    parser.add_argument("--repeat", type=int, default=20, help="每项重复次数(取最快一次)")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    seed(engine, max(args.pages))
+
+    print(f"{'list':<16}{'rows':>6}{'orm(us/row)':>14}{'lean(us/row)':>14}{'speedup':>10}")
+    for name, model, schema in CASES:
+        for rows in args.pages:
+            expected = json.loads(orm_page(engine, model, schema, rows))
+            if json.loads(lean_page(engine, model, schema, rows)) != expected:
+                raise SystemExit(f"{name}: lean 路径输出与 model_validate 不一致")
+            orm = best_of(lambda: orm_page(engine, model, schema, rows), args.repeat)
+            lean = best_of(lambda: lean_page(engine, model, schema, rows), args.repeat)
+            print(f"{name:<16}{rows:>6}{orm / rows * 1e6:>14.1f}{lean / rows * 1e6:>14.1f}{orm / lean:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
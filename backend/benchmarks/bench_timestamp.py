@@ -0,0 +1,53 @@
+"""
+时间戳解析基准 - Timestamp Parsing Benchmark
+
+对比 datetime.strptime 与 TimestampDecoder(布局识别 + 前缀缓存)在 1M 行样本上的耗时，
+样本按每秒若干行递增，模拟真实日志中相邻行时间相近的分布
+
+用法(在 backend 目录下):
+    python -m benchmarks.bench_timestamp --lines 1000000 --per-second 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from app.utils.timestamp import TimestampDecoder
+
+# (名称, 生成时间戳字节串, strptime 格式)
+LAYOUTS = (
+    ("iso", lambda t: t.strftime("%Y-%m-%d %H:%M:%S").encode(), "%Y-%m-%d %H:%M:%S"),
+    ("syslog", lambda t: t.strftime("%b %d %H:%M:%S").encode(), "%b %d %H:%M:%S"),
+    ("clf", lambda t: t.strftime("%d/%b/%Y:%H:%M:%S +0800").encode(), "%d/%b/%Y:%H:%M:%S %z"),
+)
+
+
+def build_sample(render: Callable[[datetime], bytes], lines: int, per_second: int) -> List[bytes]:
+    start = datetime(2025, 11, 28, 10, 0, 0)
+    return [render(start + timedelta(seconds=i // per_second)) for i in range(lines)]
+
+
+def bench(func: Callable[[bytes], object], sample: List[bytes]) -> float:
+    started = time.perf_counter()
+    for value in sample:
+        func(value)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000, help="样本行数")
+    parser.add_argument("--per-second", type=int, default=20, help="每秒日志行数(1 表示每行时间都不同)")
+    args = parser.parse_args()
+
+    print(f"{'layout':<8}{'strptime(s)':>14}{'decoder(s)':>14}{'speedup':>10}{'ns/line':>10}")
+    for name, render, fmt in LAYOUTS:
+        sample = build_sample(render, args.lines, args.per_second)
+        baseline = bench(lambda v: datetime.strptime(v.decode(), fmt), sample)
+        decoder = TimestampDecoder(year=2025, not_after=datetime(2026, 1, 1))
+        fast = bench(decoder, sample)
+        print(f"{name:<8}{baseline:>14.3f}{fast:>14.3f}{baseline / fast:>9.1f}x{fast / args.lines * 1e9:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
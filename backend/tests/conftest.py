@@ -0,0 +1,48 @@
+"""
+测试公共夹具
+
+使用内存 SQLite，不依赖 MySQL；进程内单例(索引/检测器/缓存)在每个用例前重置
+"""
+import os
+from datetime import datetime
+
+# 须在导入 app 之前设置，app.db.session 导入时即创建引擎
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models import alert, config, log, operation_log  # noqa: F401  注册全部表
+from app.models.log import Log, LogLevelEnum, LogSourceEnum
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def add_log(db):
+    """写入一条日志并提交，返回日志对象"""
+    def add(log_id=None, level=LogLevelEnum.INFO, timestamp=None, ip=None, user_name=None,
+            message="test", event_type=None, source=LogSourceEnum.OTHER) -> Log:
+        row = Log(
+            id=log_id, source=source, level=level, timestamp=timestamp or datetime.now(), ip=ip,
+            user_name=user_name, message=message, event_type=event_type,
+        )
+        db.add(row)
+        db.commit()
+        return row
+    return add
@@ -0,0 +1,61 @@
+"""批量入库的 JSON 读取: NDJSON 与 JSON 数组在任意分块下结果一致，截断与非法记录按行报告"""
+import json
+
+import pytest
+
+from app.services.batch_ingest import JsonStreamReader
+
+RECORDS = [{"message": "login failed", "level": "ERROR"}, {"message": "中文消息"}, 42]
+
+
+def _read(data: bytes, chunk_size: int, max_record_bytes: int = 256):
+    reader = JsonStreamReader(max_record_bytes=max_record_bytes)
+    records = []
+    for i in range(0, len(data), chunk_size):
+        records.extend(reader.feed(data[i:i + chunk_size]))
+    records.extend(reader.close())
+    return records
+
+
+def _ndjson(records) -> bytes:
+    return "\n".join(json.dumps(record, ensure_ascii=False) for record in records).encode()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_ndjson_and_array_yield_same_records(chunk_size):
+    expected = [(i, record, None) for i, record in enumerate(RECORDS, start=1)]
+    array = b"  \n" + json.dumps(RECORDS, ensure_ascii=False).encode()
+
+    assert _read(_ndjson(RECORDS), chunk_size) == expected
+    assert _read(array, chunk_size) == expected
+
+
+def test_ndjson_reports_invalid_and_oversized_lines_by_line_number():
+    data = b'{"a": 1}\n{"a":\n\n{"a": "' + b"x" * 300 + b'"}\n{"b": 2}\n'
+
+    assert _read(data, 7) == [
+        (1, {"a": 1}, None),
+        (2, None, "invalid JSON"),
+        (4, None, "record too large"),
+        (5, {"b": 2}, None),
+    ]
+
+
+@pytest.mark.parametrize("data, last", [
+    # 最后一个元素被截断
+    (b'[{"a": 1}, {"a":', (2, None, "invalid JSON")),
+    # 元素完整但缺少结尾的 ']'
+    (b'[{"a": 1}, {"a": 2}', (3, None, "invalid JSON array")),
+])
+def test_truncated_array_keeps_complete_elements(data, last):
+    records = _read(data, 5)
+
+    assert records[0] == (1, {"a": 1}, None)
+    assert records[-1] == last
+
+
+def test_array_missing_comma_stops_reading():
+    assert _read(b'[{"a": 1} {"a": 2}, {"a": 3}]', 4) == [
+        (1, {"a": 1}, None),
+        (2, None, "invalid JSON array"),
+    ]
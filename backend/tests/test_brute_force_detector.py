@@ -0,0 +1,58 @@
+"""暴力破解检测器: 阈值边界与窗口"""
+from datetime import datetime, timedelta
+
+from app.models.log import LogEventTypeEnum, LogLevelEnum
+from app.services.brute_force_detector import BruteForceDetector
+
+IP = "10.0.0.1"
+
+
+def test_fires_exactly_at_threshold():
+    detector = BruteForceDetector(threshold=5, window_minutes=5)
+    now = datetime(2025, 11, 28, 10, 0, 0)
+
+    results = [detector.observe(IP, now - timedelta(seconds=10 - i), i, now) for i in range(1, 6)]
+
+    assert results[:4] == [None] * 4
+    assert results[4] == (5, [1, 2, 3, 4, 5])
+
+
+def test_failures_outside_window_do_not_count():
+    detector = BruteForceDetector(threshold=3, window_minutes=5)
+    now = datetime(2025, 11, 28, 10, 0, 0)
+    detector.observe(IP, now - timedelta(minutes=6), 1, now - timedelta(minutes=6))
+    detector.observe(IP, now - timedelta(minutes=1), 2, now)
+
+    assert detector.observe(IP, now, 3, now) is None
+    assert detector.observe(IP, now, 4, now) == (3, [2, 3, 4])
+
+
+def test_ips_are_counted_separately():
+    detector = BruteForceDetector(threshold=2, window_minutes=5)
+    now = datetime(2025, 11, 28, 10, 0, 0)
+
+    assert detector.observe(IP, now, 1, now) is None
+    assert detector.observe("10.0.0.2", now, 2, now) is None
+    assert detector.observe(IP, now, 3, now) == (2, [1, 3])
+
+
+def test_widening_window_backfills_older_failures(db, add_log):
+    now = datetime.now()
+    detector = BruteForceDetector(threshold=3, window_minutes=5)
+    old = add_log(level=LogLevelEnum.ERROR, event_type=LogEventTypeEnum.LOGIN_FAILED, ip=IP,
+                  timestamp=now - timedelta(minutes=8))
+    recent = add_log(level=LogLevelEnum.ERROR, event_type=LogEventTypeEnum.LOGIN_FAILED, ip=IP,
+                     timestamp=now - timedelta(minutes=1))
+    detector.rebuild(db, now)
+
+    previous = detector.configure(3, 10)
+    assert previous == timedelta(minutes=5)
+    assert detector.backfill(db, previous, now) == 1
+
+    assert detector.observe(IP, now, recent.id + 1, now) == (3, [old.id, recent.id, recent.id + 1])
+
+
+def test_narrowing_window_needs_no_backfill():
+    detector = BruteForceDetector(threshold=3, window_minutes=10)
+
+    assert detector.configure(3, 5) is None
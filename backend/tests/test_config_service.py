@@ -0,0 +1,60 @@
+"""系统配置: 批量更新按 value_type 存储"""
+import json
+
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.db.change_hooks import data_version
+from app.models.config import DataVersion, SystemConfig
+from app.schemas.config import ConfigBatch
+from app.services.config_service import CONFIG_VERSION, ConfigService, get_config_snapshot
+
+
+def _config(db, key, value, value_type):
+    db.add(SystemConfig(config_key=key, config_value=value, category="system", value_type=value_type))
+    db.commit()
+
+
+def test_json_values_are_stored_as_json(db):
+    _config(db, "ip_whitelist", "[]", "json")
+    _config(db, "notify", "{}", "json")
+    _config(db, "retention_days", "30", "int")
+
+    ConfigService(db).update_batch(ConfigBatch(configs={
+        "ip_whitelist": ["10.0.0.1", "10.0.0.2"],
+        "notify": '{"email": true}',
+        "retention_days": 90,
+    }))
+
+    stored = {config.config_key: config.config_value for config in db.query(SystemConfig)}
+    assert json.loads(stored["ip_whitelist"]) == ["10.0.0.1", "10.0.0.2"]
+    assert stored["notify"] == '{"email": true}'
+    assert stored["retention_days"] == "90"
+    assert get_config_snapshot(db).values["ip_whitelist"] == ["10.0.0.1", "10.0.0.2"]
+
+
+def _version(db):
+    return db.execute(select(data_version(CONFIG_VERSION))).scalar()
+
+
+def test_commit_bumps_version_and_rollback_does_not(db):
+    _config(db, "retention_days", "30", "int")
+    assert _version(db) == 1
+
+    db.query(SystemConfig).one().config_value = "60"
+    db.flush()
+    db.rollback()
+    assert _version(db) == 1
+
+
+def test_change_from_other_process_in_same_second_is_seen(db, engine, monkeypatch):
+    _config(db, "retention_days", "30", "int")
+    monkeypatch.setattr(settings, "CONFIG_CACHE_REFRESH_SECONDS", 0)
+    assert get_config_snapshot(db).values["retention_days"] == 30
+
+    # 其他进程的提交: 不触发本进程的钩子，updated_at 不变，只递增版本号
+    with engine.begin() as connection:
+        connection.execute(update(SystemConfig).values(config_value="90", updated_at=SystemConfig.updated_at))
+        connection.execute(update(DataVersion).values(version=DataVersion.version + 1))
+
+    assert get_config_snapshot(db).values["retention_days"] == 90
@@ -0,0 +1,98 @@
+"""关键字全文检索: SQLite FTS5 trigram 表与子串匹配一致"""
+from app.models.log import Log
+from app.models.operation_log import OperationLog
+from app.utils.fulltext import boolean_mode_query, keyword_condition, parse_search, substring_condition
+
+MESSAGES = [
+    "Failed password for invalid user admin from 10.0.0.1",
+    "Accepted password for root from 10.0.0.2",
+    "session is at risk: 用户登录失败",
+    "Failed password for admin from 10.0.0.3",
+    "user john-doe login failed, mail alice@corp.com",
+    "user johndoe login failed",
+]
+
+
+def _search(db, keyword):
+    condition = keyword_condition(Log.message, keyword, db.get_bind().dialect.name)
+    return sorted(log.message for log in db.query(Log).filter(condition))
+
+
+def _seed(add_log):
+    return [add_log(message=message) for message in MESSAGES]
+
+
+def test_keyword_uses_fts_table(db):
+    condition = keyword_condition(Log.message, "password", "sqlite")
+    assert "logs_message_fts MATCH" in str(condition.compile(compile_kwargs={"literal_binds": True}))
+
+
+def test_terms_phrase_and_prefix(db, add_log):
+    _seed(add_log)
+
+    assert _search(db, "failed admin") == sorted([MESSAGES[0], MESSAGES[3]])
+    assert _search(db, '"invalid user"') == [MESSAGES[0]]
+    assert _search(db, "acc*") == [MESSAGES[1]]
+    assert _search(db, "登录失败") == [MESSAGES[2]]
+
+
+def test_stopword_like_and_short_terms_match(db, add_log):
+    _seed(add_log)
+
+    # 常见停用词与短于 trigram 的词都要能查到
+    assert _search(db, "is at") == [MESSAGES[2]]
+    assert _search(db, "risk is") == [MESSAGES[2]]
+
+
+def test_index_follows_update_and_delete(db, add_log):
+    logs = _seed(add_log)
+
+    logs[1].message = "Accepted publickey for deploy"
+    db.delete(logs[0])
+    db.commit()
+
+    assert _search(db, "password") == [MESSAGES[3]]
+    assert _search(db, "publickey") == ["Accepted publickey for deploy"]
+
+
+def test_operation_log_username_search(db):
+    for name in ("zhangsan", "lisi", "zhangwei"):
+        db.add(OperationLog(user_id=1, username=name, action="LOGIN", detail=f"用户 {name} 登录系统"))
+    db.commit()
+
+    condition = substring_condition(OperationLog.username, "zhang", "sqlite")
+    assert sorted(row.username for row in db.query(OperationLog).filter(condition)) == ["zhangsan", "zhangwei"]
+
+
+def test_username_search_is_literal_substring(db):
+    for name in ("li.si@corp", "li si", "lisi"):
+        db.add(OperationLog(user_id=1, username=name, action="LOGIN", detail="登录"))
+    db.commit()
+
+    for text, expected in (("li.si@", ["li.si@corp"]), ("li si", ["li si"]), ("i.s", ["li.si@corp"]), ("si", None)):
+        condition = substring_condition(OperationLog.username, text, "sqlite")
+        found = sorted(row.username for row in db.query(OperationLog).filter(condition))
+        assert found == (expected or ["li si", "li.si@corp", "lisi"])
+
+
+def test_terms_with_punctuation_match_like_substring(db, add_log):
+    _seed(add_log)
+
+    assert _search(db, "john-doe") == [MESSAGES[4]]
+    assert _search(db, "alice@corp.com") == [MESSAGES[4]]
+    assert _search(db, "@corp") == [MESSAGES[4]]
+    assert _search(db, "johndoe") == [MESSAGES[5]]
+
+
+def test_parse_keeps_raw_terms():
+    assert [term.text for term in parse_search('john-doe alice@corp.com adm* "a-b c"')] == [
+        "john-doe", "alice@corp.com", "adm", "a-b c",
+    ]
+
+
+def test_mysql_query_only_quotes_word_runs():
+    assert boolean_mode_query(parse_search("john-doe alice@corp.com x")) == '+"john" +"doe" +"alice" +"corp" +"com"'
+    condition = keyword_condition(Log.message, "john-doe login", "mysql")
+    sql = str(condition.compile(compile_kwargs={"literal_binds": True}))
+    # john-doe 由 LIKE 按原文复核，login 完全由全文索引判定
+    assert "MATCH" in sql and "john-doe" in sql and "%login%" not in sql
@@ -0,0 +1,87 @@
+"""异步写入缓冲: 写库失败的重试、拆分与丢弃"""
+import pytest
+
+from app.services import ingest_buffer as ingest_buffer_module
+from app.services.ingest_buffer import IngestBuffer
+
+POISON = {"message": "poison"}
+
+
+class FakeBuffer(IngestBuffer):
+    """以内存列表代替数据库，包含 POISON 的批次或 down 时写入失败"""
+
+    def __init__(self, **kwargs):
+        super().__init__(max_records=100, flush_size=10, flush_interval_ms=10, **kwargs)
+        self.written = []
+        self.attempts = 0
+        self.down = False
+
+    def _write(self, batch):
+        self.attempts += 1
+        if self.down or POISON in batch:
+            self.stats.flush_errors += 1
+            return False
+        self.written.extend(batch)
+        self.stats.flushed += len(batch)
+        return True
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(ingest_buffer_module.time, "sleep", lambda seconds: None)
+
+
+def _rows(count):
+    return [{"message": str(i)} for i in range(count)]
+
+
+def test_poison_row_is_dropped_and_rest_written():
+    buffer = FakeBuffer(max_retries=2)
+    rows = _rows(8)
+    batch = rows[:5] + [POISON] + rows[5:]
+
+    assert buffer._flush(batch)
+
+    assert buffer.written == rows
+    assert buffer.stats.dropped == 1
+    assert buffer.stats.dead_lettered == 1
+
+
+def test_transient_failure_is_retried_without_splitting():
+    buffer = FakeBuffer(max_retries=3)
+    calls = []
+
+    def flaky(batch):
+        calls.append(len(batch))
+        return FakeBuffer._write(buffer, batch) if len(calls) > 2 else False
+
+    buffer._write = flaky
+    assert buffer._flush(_rows(6))
+
+    assert calls == [6, 6, 6]
+    assert len(buffer.written) == 6
+    assert buffer.stats.dropped == 0
+
+
+def test_failed_flush_while_stopping_counts_queued_rows_as_dropped():
+    buffer = FakeBuffer(max_retries=5)
+    buffer.offer(_rows(25))
+    buffer.down = True
+    buffer._stopping = True
+
+    buffer._run()
+
+    assert buffer.attempts == 1
+    assert buffer.written == []
+    assert buffer.stats.dropped == 25
+    assert buffer.snapshot()["queue_depth"] == 0
+
+
+def test_stop_drains_queue():
+    buffer = FakeBuffer()
+    buffer.start()
+    buffer.offer(_rows(25))
+    buffer.stop(timeout=5)
+
+    assert len(buffer.written) == 25
+    assert buffer.stats.dropped == 0
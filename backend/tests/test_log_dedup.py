@@ -0,0 +1,70 @@
+"""上传去重: 指纹先于日志写入，并发写入的指纹不会重复入库"""
+import io
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.models.log import Log, LogFingerprint, LogSourceEnum
+from app.services.log_dedup import LogDeduplicator
+from app.services.log_ingest import LogIngestService
+
+LINES = [b"2025-11-28 10:00:%02d ERROR 10.0.0.1 admin login failed" % i for i in range(5)]
+
+
+def _ingest(db, dedup, lines=LINES):
+    service = LogIngestService(db, LogSourceEnum.OTHER, dedup=dedup)
+    return service.ingest_stream(io.BytesIO(b"\n".join(lines) + b"\n"))
+
+
+def _loaded(db):
+    dedup = LogDeduplicator(capacity=1000, error_rate=0.01)
+    dedup.load(db)
+    return dedup
+
+
+def test_second_upload_is_all_duplicates(db):
+    dedup = _loaded(db)
+    first = _ingest(db, dedup)
+    second = _ingest(db, dedup)
+
+    assert first.inserted == len(LINES)
+    assert second.inserted == 0 and second.duplicates == len(LINES)
+    assert db.query(Log).count() == len(LINES)
+
+
+def test_fingerprint_written_by_other_process_is_not_inserted_twice(db):
+    # 本进程的过滤器在另一个进程写入指纹之前已加载，布隆过滤器未见过该指纹
+    dedup = _loaded(db)
+    _ingest(db, _loaded(db), LINES[:1])
+    assert db.query(LogFingerprint).count() == 1
+
+    result = _ingest(db, dedup)
+
+    assert result.duplicates == 1
+    assert result.inserted == len(LINES) - 1
+    assert db.query(Log).count() == len(LINES)
+
+
+def test_unloaded_filter_verifies_against_table(db):
+    db.add(LogFingerprint(fingerprint=42))
+    db.commit()
+
+    dedup = LogDeduplicator(capacity=1000, error_rate=0.01)
+    assert not dedup.loaded
+    assert dedup.filter(db, [42, 43, 43]) == [False, True, False]
+
+
+def test_prune_drops_fingerprints_outside_window(db, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_DEDUP_WINDOW_DAYS", 30)
+    now = datetime(2025, 12, 1)
+    db.add_all([
+        LogFingerprint(fingerprint=1, created_at=now - timedelta(days=31)),
+        LogFingerprint(fingerprint=2, created_at=now - timedelta(days=29)),
+    ])
+    db.commit()
+
+    assert LogDeduplicator.prune(db, now) == 1
+    assert [fp.fingerprint for fp in db.query(LogFingerprint)] == [2]
+
+    monkeypatch.setattr(settings, "INGEST_DEDUP_WINDOW_DAYS", 0)
+    assert LogDeduplicator.prune(db, now + timedelta(days=365)) == 0
+    assert db.query(LogFingerprint).count() == 1
@@ -0,0 +1,67 @@
+"""压缩上传: 读取中途出错时保留已入库批次并返回部分统计"""
+import gzip
+import io
+
+import pytest
+
+from app.core.config import settings
+from app.models.log import Log, LogSourceEnum
+from app.services.log_ingest import INGEST_ERROR_CORRUPT, INGEST_ERROR_TOO_LARGE, LogIngestService
+from app.utils.compression import open_decompressed
+
+LINE = b"2025-11-28 10:00:%02d ERROR 10.0.0.1 admin login failed\n"
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_READ_CHUNK_SIZE", 4096)
+
+
+def _gzip(lines: int) -> bytes:
+    return gzip.compress(b"".join(LINE % (i % 60) for i in range(lines)))
+
+
+def _ingest(db, data: bytes, limit=None):
+    service = LogIngestService(db, LogSourceEnum.OTHER, batch_size=10)
+    with open_decompressed(io.BytesIO(data), "gzip", limit) as stream:
+        return service.ingest_stream(stream)
+
+
+def test_complete_gzip_is_not_truncated(db):
+    result = _ingest(db, _gzip(50))
+
+    assert result.inserted + result.failed == 50
+    assert not result.truncated and result.error is None
+
+
+def test_truncated_gzip_returns_committed_rows(db):
+    data = _gzip(2000)
+    result = _ingest(db, data[: len(data) // 2])
+
+    assert result.truncated
+    assert result.error == INGEST_ERROR_CORRUPT
+    assert 0 < result.inserted + result.failed < 2000
+    assert db.query(Log).count() == result.inserted
+
+
+def test_size_limit_returns_committed_rows(db):
+    result = _ingest(db, _gzip(2000), limit=len(LINE % 0) * 100)
+
+    assert result.truncated
+    assert result.error == INGEST_ERROR_TOO_LARGE
+    assert 0 < result.inserted + result.failed <= 100
+    assert db.query(Log).count() == result.inserted
+
+
+def test_mmap_ingest_failure_keeps_original_error(db, tmp_path, monkeypatch):
+    path = tmp_path / "app.log"
+    path.write_bytes(b"".join(LINE % i for i in range(5)))
+    service = LogIngestService(db, LogSourceEnum.OTHER, batch_size=10)
+
+    def fail(lines, parsed):
+        raise ValueError("write failed")
+
+    monkeypatch.setattr(service, "write_batch", fail)
+    # 行切片随异常一起释放，关闭映射不会抛出 BufferError
+    with pytest.raises(ValueError, match="write failed"):
+        service.ingest_file(str(path))
@@ -0,0 +1,69 @@
+"""未处理告警索引: 去重与时间窗口"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.alert import Alert, AlertLevel, AlertStatus, AlertType
+from app.services.alert_engine import AlertEngine
+from app.services.open_alert_index import open_alert_index
+
+IP = "10.0.0.9"
+
+
+@pytest.fixture(autouse=True)
+def reset_index():
+    open_alert_index.invalidate()
+    yield
+    open_alert_index.invalidate()
+
+
+def _open_alert(db, created_at: datetime) -> Alert:
+    alert = Alert(
+        alert_type=AlertType.BRUTE_FORCE, alert_level=AlertLevel.MEDIUM, title="t", description="d",
+        related_ip=IP, status=AlertStatus.UNHANDLED, created_at=created_at,
+    )
+    db.add(alert)
+    db.commit()
+    return alert
+
+
+def _fire(db, now: datetime, log_id: int) -> None:
+    engine = AlertEngine(db)
+    engine._apply_brute_force_hits({IP: [1, 5, [log_id]]}, now, {log_id})
+    engine._commit()
+
+
+def _brute_force_alerts(db):
+    return db.query(Alert).filter(Alert.alert_type == AlertType.BRUTE_FORCE).order_by(Alert.id).all()
+
+
+def test_hits_fold_into_alert_created_after_old_one_left_window(db):
+    now = datetime.now()
+    _open_alert(db, now - timedelta(minutes=30))
+
+    for i in range(3):
+        _fire(db, now + timedelta(seconds=i), log_id=i + 1)
+
+    alerts = _brute_force_alerts(db)
+    assert len(alerts) == 2
+    assert alerts[1].trigger_count == 3
+
+
+def test_reload_keeps_newest_open_alert(db):
+    now = datetime.now()
+    _open_alert(db, now - timedelta(minutes=30))
+    newest = _open_alert(db, now - timedelta(minutes=1))
+
+    open_alert_index.invalidate()
+    assert open_alert_index.lookup(db, (AlertType.BRUTE_FORCE, IP), now - timedelta(minutes=5)) == newest.id
+
+
+def test_closing_newest_alert_falls_back_to_older_open_alert(db):
+    now = datetime.now()
+    older = _open_alert(db, now - timedelta(minutes=2))
+    newest = _open_alert(db, now - timedelta(minutes=1))
+
+    newest.status = AlertStatus.RESOLVED
+    db.commit()
+
+    assert open_alert_index.lookup(db, (AlertType.BRUTE_FORCE, IP), now - timedelta(minutes=5)) == older.id
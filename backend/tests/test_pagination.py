@@ -0,0 +1,53 @@
+"""键集分页: 游标前后翻页往返一致"""
+from datetime import datetime, timedelta
+
+from app.models.log import Log
+from app.utils.pagination import keyset_page, offset_page
+
+PAGE_SIZE = 4
+
+
+def _seed(add_log, count=11):
+    start = datetime(2025, 11, 28, 10, 0, 0)
+    # 每两条共用同一时间戳，检验边界时间上按 id 细分
+    for i in range(count):
+        add_log(timestamp=start + timedelta(seconds=i // 2))
+
+
+def _page(db, cursor=None):
+    return keyset_page(db.query(Log), Log.timestamp, Log.id, PAGE_SIZE, cursor)
+
+
+def _ids(page):
+    return [log.id for log in page.items]
+
+
+def test_forward_then_back_round_trip(db, add_log):
+    _seed(add_log)
+    expected = [log.id for log in db.query(Log).order_by(Log.timestamp.desc(), Log.id.desc())]
+
+    forward = [_page(db)]
+    while forward[-1].next_cursor:
+        forward.append(_page(db, forward[-1].next_cursor))
+
+    assert [log_id for page in forward for log_id in _ids(page)] == expected
+    assert [len(page.items) for page in forward] == [4, 4, 3]
+    assert forward[0].prev_cursor is None
+
+    # 从最后一页沿 prev_cursor 返回，每页与前进时一致
+    page = forward[-1]
+    for previous in reversed(forward[:-1]):
+        page = _page(db, page.prev_cursor)
+        assert _ids(page) == _ids(previous)
+    assert page.prev_cursor is None
+
+
+def test_offset_page_cursors_continue_with_keyset(db, add_log):
+    _seed(add_log)
+
+    second = offset_page(db.query(Log), Log.timestamp, Log.id, 2, PAGE_SIZE)
+    first = _page(db)
+    third = _page(db, _page(db, first.next_cursor).next_cursor)
+
+    assert _ids(_page(db, second.prev_cursor)) == _ids(first)
+    assert _ids(_page(db, second.next_cursor)) == _ids(third)
@@ -0,0 +1,72 @@
+"""日志格式自动识别: 六种内置格式各自被选中，命中数相同时使用上传时指定的来源"""
+import pytest
+
+from app.models.log import LogLevelEnum, LogSourceEnum
+from app.utils.parser import detect_parser, iter_line_spans
+
+SAMPLES = {
+    LogSourceEnum.OTHER: [
+        b"2025-11-28 10:20:30 ERROR ip=1.2.3.4 user=alice user login failed",
+        b"2025-11-28 10:20:31 INFO user logout",
+    ],
+    LogSourceEnum.WEB_APP: [
+        b'1.2.3.4 - alice [28/Nov/2025:10:20:30 +0800] "POST /login HTTP/1.1" 401 153 "-" "curl/8.0"',
+        b'1.2.3.5 - - [28/Nov/2025:10:20:31 +0800] "GET / HTTP/1.1" 200 512 "-" "curl/8.0"',
+    ],
+    LogSourceEnum.NETWORK: [
+        b"<134>1 2025-11-28T10:20:30.003Z sw01 sshd 2345 - - login failed for bob from 1.2.3.4",
+        b"<131>1 2025-11-28T10:20:31Z sw01 snmpd 17 - - link down",
+    ],
+    LogSourceEnum.ROUTER: [
+        b"<189>Nov 28 10:20:30 r1 %SEC_LOGIN-4-LOGIN_FAILED: Login failed [user: bob] [Source: 1.2.3.4]",
+        b"Nov 28 10:20:31 r1 %SYS-5-CONFIG_I: Configured from console",
+    ],
+    LogSourceEnum.FIREWALL: [
+        b"Nov 28 10:20:30 fw01 kernel: [UFW BLOCK] IN=eth0 OUT= SRC=1.2.3.4 DST=10.0.0.2 PROTO=TCP DPT=22",
+        b"Nov 28 10:20:31 fw01 kernel: [ 12.345] [UFW ALLOW] IN=eth0 OUT= SRC=1.2.3.5 DST=10.0.0.2 PROTO=TCP",
+    ],
+    LogSourceEnum.DATABASE: [
+        b"2025-11-28T10:20:30.123456Z 12 [Warning] [MY-010055] [Server] Access denied for user 'bob'@'1.2.3.4'",
+        b"2025-11-28T10:20:31.000000Z 0 [System] [MY-010931] [Server] ready for connections",
+    ],
+}
+
+
+@pytest.mark.parametrize("source", list(SAMPLES))
+def test_detects_each_builtin_format(source):
+    # 上传时指定的来源与实际格式不同，仍按命中行数选出实际格式
+    preferred = LogSourceEnum.OTHER if source != LogSourceEnum.OTHER else LogSourceEnum.WEB_APP
+    parser = detect_parser(SAMPLES[source], preferred=preferred)
+
+    assert parser.source == source
+    assert all(result is not None for result in parser.parse_batch(SAMPLES[source]))
+
+
+def test_majority_format_wins_over_preferred():
+    lines = SAMPLES[LogSourceEnum.FIREWALL] + SAMPLES[LogSourceEnum.DATABASE][:1]
+
+    assert detect_parser(lines, preferred=LogSourceEnum.DATABASE).source == LogSourceEnum.FIREWALL
+
+
+def test_unrecognized_lines_fall_back_to_preferred():
+    lines = [b"not a log line", b"", None]
+
+    assert detect_parser(lines, preferred=LogSourceEnum.ROUTER).source == LogSourceEnum.ROUTER
+    assert detect_parser(lines).source == LogSourceEnum.OTHER
+
+
+def test_sample_skips_blank_and_overlong_lines():
+    lines = [None, b"   ", *SAMPLES[LogSourceEnum.NETWORK]]
+
+    assert detect_parser(lines, sample_size=2).source == LogSourceEnum.NETWORK
+
+
+def test_parse_spans_matches_parse_batch():
+    buf = b"\n".join(SAMPLES[LogSourceEnum.DATABASE]) + b"\n"
+    spans = list(iter_line_spans(buf, 0, len(buf), 4096))
+    parser = detect_parser(SAMPLES[LogSourceEnum.DATABASE])
+
+    assert parser.parse_spans(buf, spans) == parser.parse_batch(SAMPLES[LogSourceEnum.DATABASE])
+    # 拒绝登录统一为 ERROR，账号与来源地址取自消息
+    denied = parser.parse_batch(SAMPLES[LogSourceEnum.DATABASE])[0]
+    assert (denied.level, denied.user_name, denied.ip) == (LogLevelEnum.ERROR, "bob", "1.2.3.4")
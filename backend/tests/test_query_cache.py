@@ -0,0 +1,68 @@
+"""查询结果缓存: 入库水位前进后包含当前时间的条目失效"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.models.log import Log, LogLevelEnum, LogSourceEnum
+from app.services import query_cache as query_cache_module
+from app.services.query_cache import IngestWatermark, query_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", True)
+    # 水位只由本进程提交推进，不按间隔重新读取
+    monkeypatch.setattr(settings, "QUERY_CACHE_WATERMARK_SECONDS", 3600)
+    # 每个用例是新的内存库，日志ID从 1 开始，水位也从 0 开始
+    monkeypatch.setattr(query_cache_module, "ingest_watermark", IngestWatermark())
+    query_cache.clear()
+    yield
+    query_cache.clear()
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+def test_open_range_is_recomputed_after_watermark_advances(db, add_log):
+    compute = Counter()
+    params = {"keyword": "login"}
+
+    assert query_cache.get_or_compute(db, "logs", params, compute) == {"calls": 1}
+    assert query_cache.get_or_compute(db, "logs", params, compute) == {"calls": 1}
+
+    log = add_log()
+    assert query_cache_module.ingest_watermark.value == log.id
+
+    assert query_cache.get_or_compute(db, "logs", params, compute) == {"calls": 2}
+    assert query_cache.get_or_compute(db, "logs", params, compute) == {"calls": 2}
+
+
+def test_closed_range_survives_watermark_advance(db, add_log):
+    compute = Counter()
+    end_time = datetime.now() - timedelta(days=1)
+    params = {"end_time": end_time}
+
+    query_cache.get_or_compute(db, "logs", params, compute, end_time=end_time)
+    add_log()
+
+    assert query_cache.get_or_compute(db, "logs", params, compute, end_time=end_time) == {"calls": 1}
+
+
+def test_rolled_back_insert_does_not_advance_watermark(db):
+    compute = Counter()
+    query_cache.get_or_compute(db, "logs", {}, compute)
+    before = query_cache_module.ingest_watermark.value
+
+    db.add(Log(source=LogSourceEnum.OTHER, level=LogLevelEnum.INFO, timestamp=datetime.now(), message="x"))
+    db.flush()
+    db.rollback()
+
+    assert query_cache_module.ingest_watermark.value == before
+    assert query_cache.get_or_compute(db, "logs", {}, compute) == {"calls": 1}
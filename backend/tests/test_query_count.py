@@ -0,0 +1,99 @@
+"""列表总数: 阈值内精确计数，超过阈值时 MySQL 用 EXPLAIN 估算，不可用时回退到完整计数"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.core.config import settings
+from app.models.log import Log, LogLevelEnum
+from app.services.query_count import CountResult, QueryCounter
+
+THRESHOLD = 3
+
+
+@pytest.fixture(autouse=True)
+def small_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "COUNT_EXACT_THRESHOLD", THRESHOLD)
+
+
+def _errors(db):
+    return db.query(Log).filter(Log.level == LogLevelEnum.ERROR)
+
+
+def _seed(add_log, errors):
+    for _ in range(errors):
+        add_log(level=LogLevelEnum.ERROR)
+    add_log(level=LogLevelEnum.INFO)
+
+
+class _MySQLSession:
+    """
+    _estimate 只看到 MySQL 方言；EXPLAIN 实际在 SQLite 上执行，
+    参数未经列类型转换(如枚举对象)时驱动会报错
+    """
+
+    def __init__(self, db, row=None, error=None):
+        self.db, self.row, self.error, self.executed = db, row, error, []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=mysql.dialect())
+
+    def execute(self, statement):
+        if self.error is not None:
+            raise self.error
+        self.db.execute(statement).all()
+        self.executed.append(str(statement.compile(dialect=mysql.dialect())))
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(first=lambda: self.row))
+
+
+def test_bounded_count_is_exact_within_threshold(db, add_log):
+    _seed(add_log, THRESHOLD)
+
+    assert QueryCounter().count(_errors(db), Log.id) == CountResult(THRESHOLD, True)
+
+
+def test_non_mysql_falls_back_to_full_count(db, add_log):
+    _seed(add_log, THRESHOLD + 5)
+
+    assert QueryCounter().count(_errors(db), Log.id) == CountResult(THRESHOLD + 5, True)
+
+
+def test_estimate_above_threshold_is_not_exact(db, add_log, monkeypatch):
+    _seed(add_log, THRESHOLD + 5)
+    monkeypatch.setattr(QueryCounter, "_estimate", staticmethod(lambda query, id_query: 1000))
+    assert QueryCounter().count(_errors(db), Log.id) == CountResult(1000, False)
+
+    # 估算值偏低时不低于已确认的阈值 + 1
+    monkeypatch.setattr(QueryCounter, "_estimate", staticmethod(lambda query, id_query: 1))
+    assert QueryCounter().count(_errors(db), Log.id) == CountResult(THRESHOLD + 1, False)
+
+
+def test_mysql_estimate_uses_explain_rows_and_filtered(db):
+    session = _MySQLSession(db, row={"rows": 1000, "filtered": 10.0})
+    id_query = _errors(db).filter(Log.level.in_([LogLevelEnum.ERROR, LogLevelEnum.WARN])).with_entities(Log.id)
+
+    assert QueryCounter._estimate(SimpleNamespace(session=session), id_query) == 100
+    assert session.executed[0].startswith("EXPLAIN SELECT logs.id")
+
+
+@pytest.mark.parametrize("row, error", [
+    (None, RuntimeError("explain failed")),
+    (None, None),
+    ({"rows": None, "filtered": None}, None),
+])
+def test_mysql_estimate_unavailable_returns_none(db, row, error):
+    session = _MySQLSession(db, row=row, error=error)
+    id_query = _errors(db).with_entities(Log.id)
+
+    assert QueryCounter._estimate(SimpleNamespace(session=session), id_query) is None
+
+
+def test_counts_are_cached_per_key_until_invalidated(db, add_log):
+    _seed(add_log, 2)
+    counter = QueryCounter()
+    assert counter.count(_errors(db), Log.id, cache_key="k") == CountResult(2, True)
+
+    add_log(level=LogLevelEnum.ERROR)
+    assert counter.count(_errors(db), Log.id, cache_key="k") == CountResult(2, True)
+    counter.invalidate()
+    assert counter.count(_errors(db), Log.id, cache_key="k") == CountResult(3, True)
@@ -0,0 +1,94 @@
+"""原始日志压缩: 各来源字典往返无损，历史明文行迁移可重复执行"""
+import json
+import sys
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+import app.db.session as session_module
+from app.core.config import settings
+from app.models.log import Log, LogLevelEnum, LogSourceEnum
+from app.services import raw_data_storage
+from app.services.raw_data_storage import RawDataStorageService
+from app.utils.raw_codec import NO_DICTIONARY, compress_raw_data, decompress_raw_data, encode_raw_data
+
+LINES = {
+    LogSourceEnum.OTHER: "2025-11-28 10:20:30 ERROR ip=192.168.0.7 user=admin user login failed",
+    LogSourceEnum.WEB_APP: '192.168.0.7 - - [28/Nov/2025:10:20:30 +0800] "POST /login HTTP/1.1" 401 153 "-" '
+                           '"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"',
+    LogSourceEnum.NETWORK: "<134>1 2025-11-28T10:20:30.000Z sw01 sshd 2345 - - Failed password for root from 10.0.0.9",
+    LogSourceEnum.ROUTER: "<189>Nov 28 10:20:30 r1 %SEC_LOGIN-4-LOGIN_FAILED: Login failed [user: bob] "
+                          "[Source: 10.0.0.9] [localport: 22] [Reason: Login Authentication Failed]",
+    LogSourceEnum.FIREWALL: "Nov 28 10:20:30 fw01 kernel: [UFW BLOCK] IN=eth0 OUT= MAC= SRC=192.168.0.7 "
+                            "DST=10.0.0.2 LEN=60 TOS=0x00 PREC=0x00 TTL=64 ID=0 DF PROTO=TCP SPT=51234 DPT=22",
+    LogSourceEnum.DATABASE: "2025-11-28T10:20:30.123456Z 12 [Warning] [MY-010055] [Server] "
+                            "Access denied for user 'root'@'localhost' (using password: YES)",
+}
+
+
+@pytest.mark.parametrize("source", list(LINES))
+def test_dictionary_round_trip_per_source(source):
+    data = LINES[source].encode("utf-8")
+
+    blob = compress_raw_data(data, source)
+
+    assert blob[0] != NO_DICTIONARY
+    assert decompress_raw_data(blob) == LINES[source]
+    # 字典中的固定片段让单行日志明显更小
+    assert len(blob) < len(compress_raw_data(data))
+
+
+def test_blob_without_dictionary_still_decodes(monkeypatch):
+    monkeypatch.setattr(settings, "LOG_RAW_DATA_DICTIONARY", False)
+    blob = compress_raw_data("中文 message".encode("utf-8"), LogSourceEnum.WEB_APP)
+
+    assert blob[0] == NO_DICTIONARY
+    assert decompress_raw_data(blob) == "中文 message"
+
+
+def test_encode_keeps_plain_text_when_disabled_or_not_smaller(monkeypatch):
+    line = LINES[LogSourceEnum.FIREWALL]
+    assert encode_raw_data(line, LogSourceEnum.FIREWALL)["_raw_data"] == line
+
+    monkeypatch.setattr(settings, "LOG_RAW_DATA_COMPRESSION", True)
+    stored = encode_raw_data(line, LogSourceEnum.FIREWALL)
+    assert stored["_raw_data"] is None and stored["raw_data_size"] == len(line)
+    assert encode_raw_data("x", LogSourceEnum.FIREWALL) == {"_raw_data": "x", "raw_data_z": None, "raw_data_size": None}
+
+
+def _add_plain_logs(db):
+    for source, line in LINES.items():
+        log = Log(source=source, level=LogLevelEnum.INFO, timestamp=datetime(2025, 11, 28), message="m")
+        log.raw_data = line
+        db.add(log)
+    db.commit()
+
+
+def test_migration_compresses_history_and_is_repeatable(db):
+    _add_plain_logs(db)
+    service = RawDataStorageService(db)
+
+    first = service.compress_existing(batch_size=4)
+    second = service.compress_existing(batch_size=4)
+
+    assert (first["scanned"], first["compressed"]) == (len(LINES), len(LINES))
+    assert second["scanned"] == 0
+    report = service.size_report()
+    assert (report["plain_rows"], report["compressed_rows"]) == (0, len(LINES))
+    db.expire_all()
+    assert {log.source: log.raw_data for log in db.scalars(select(Log))} == LINES
+
+
+def test_migration_cli(db, engine, monkeypatch, capsys):
+    _add_plain_logs(db)
+    monkeypatch.setattr(session_module, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(sys, "argv", ["raw_data_storage", "--batch-size", "2", "--max-rows", "3"])
+
+    raw_data_storage.main()
+
+    output = json.loads(capsys.readouterr().out)
+    assert output["migration"]["scanned"] == 3
+    assert output["storage"]["compressed_rows"] == 3
+    assert output["storage"]["plain_rows"] == len(LINES) - 3
@@ -0,0 +1,65 @@
+"""列表行序列化: 投影行直接编码的 JSON 与原先 model_validate + jsonable_encoder 的输出一致"""
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.models.log import Log, LogEventTypeEnum, LogLevelEnum, LogSourceEnum
+from app.schemas.log import LogFilter, LogListItem, LogRead, LogSearchResults
+from app.services.log_query import search_logs
+from app.services.query_count import query_counter
+from app.utils.row_json import page_json, row_serializer
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_CACHE_ENABLED", False)
+    query_counter.invalidate()
+    yield
+    query_counter.invalidate()
+
+
+def _seed(db):
+    log = Log(
+        source=LogSourceEnum.NETWORK, level=LogLevelEnum.WARN, timestamp=datetime(2025, 11, 28, 10, 0, 0, 123456),
+        ip="10.0.0.1", user_name="张三", message='Failed password for "root"', event_type=LogEventTypeEnum.LOGIN_FAILED,
+    )
+    log.raw_data = "Nov 28 10:00:00 gw-01 sshd[123]: Failed password"
+    db.add(log)
+    # 可空字段全部为空
+    db.add(Log(source=LogSourceEnum.OTHER, level=LogLevelEnum.INFO, timestamp=datetime(2025, 11, 28), message="m"))
+    db.commit()
+
+
+def test_list_item_matches_previous_log_read_shape(db):
+    _seed(db)
+    serializer = row_serializer(LogListItem)
+
+    rows = db.query(*serializer.columns(Log)).order_by(Log.id).all()
+    lean = json.loads(serializer.dumps(rows))
+
+    # 原实现: ORM 实体 -> LogRead -> jsonable_encoder；列表项只去掉了 raw_data
+    previous = [jsonable_encoder(LogRead.model_validate(log)) for log in db.query(Log).order_by(Log.id)]
+    for item in previous:
+        del item["raw_data"]
+    assert lean == previous
+    assert lean == [LogListItem.model_validate(log).model_dump(mode="json") for log in db.query(Log).order_by(Log.id)]
+    assert list(lean[0]) == list(LogListItem.model_fields)
+
+
+def test_search_response_validates_as_log_search_results(db):
+    _seed(db)
+
+    body = search_logs(db, LogFilter(page_size=1))
+
+    parsed = json.loads(body)
+    assert LogSearchResults.model_validate_json(body).model_dump(mode="json") == parsed
+    assert (parsed["total"], parsed["total_exact"], parsed["page"]) == (2, True, 1)
+    assert parsed["next_cursor"] is not None and parsed["prev_cursor"] is None
+    assert [item["message"] for item in parsed["results"]] == ['Failed password for "root"']
+
+
+def test_page_json_without_meta():
+    assert json.loads(page_json({}, "items", b"[]")) == {"items": []}
@@ -0,0 +1,64 @@
+"""自定义告警规则: 名称冲突与求值失败的隔离"""
+from datetime import datetime
+
+import pytest
+
+from app.models.alert import Alert, AlertType
+from app.models.log import LogLevelEnum
+from app.schemas.alert import AlertRuleCreate, AlertRuleUpdate
+from app.services import alert_engine as alert_engine_module
+from app.services.alert_engine import AlertEngine
+from app.services.rule_engine import AlertRuleService, DuplicateRuleName, get_rule_set, rule_registry
+
+
+@pytest.fixture(autouse=True)
+def reset_registry():
+    rule_registry.invalidate()
+    yield
+    rule_registry.invalidate()
+
+
+def _rule(name, value="10.0.0.1"):
+    return AlertRuleCreate(name=name, conditions=[{"field": "ip", "op": "eq", "value": value}])
+
+
+def test_duplicate_name_on_create_and_update(db):
+    service = AlertRuleService(db)
+    service.create_rule(_rule("ssh-scan"))
+    other = service.create_rule(_rule("web-scan"))
+
+    with pytest.raises(DuplicateRuleName):
+        service.create_rule(_rule("ssh-scan"))
+    with pytest.raises(DuplicateRuleName):
+        service.update_rule(other, AlertRuleUpdate(name="ssh-scan"))
+
+    assert sorted(rule.name for rule in service.list_rules()) == ["ssh-scan", "web-scan"]
+
+
+def test_failing_rule_does_not_block_other_rules(db, add_log):
+    service = AlertRuleService(db)
+    broken = service.create_rule(_rule("broken"))
+    healthy = service.create_rule(_rule("healthy"))
+    log = add_log(ip="10.0.0.1")
+
+    rule_set = get_rule_set(db)
+
+    def explode(_log):
+        raise TypeError("bad rule")
+
+    rule_set.by_id[broken.id].match = explode
+    hits = rule_set.evaluate([log], datetime.now())
+
+    assert [rule_id for rule_id, _ in hits] == [healthy.id]
+
+
+def test_custom_rule_failure_keeps_builtin_alerts(db, add_log, monkeypatch):
+    def missing_table(_db):
+        raise RuntimeError("alert_rules does not exist")
+
+    monkeypatch.setattr(alert_engine_module, "get_rule_set", missing_table)
+    log = add_log(level=LogLevelEnum.ERROR)
+
+    AlertEngine(db).check_batch([log])
+
+    assert db.query(Alert).filter(Alert.alert_type == AlertType.ERROR_LOG).count() == 1
@@ -0,0 +1,32 @@
+"""可疑访问检测器: 不同 IP 数阈值与窗口"""
+from datetime import datetime, timedelta
+
+from app.models.log import LogEventTypeEnum
+from app.services.suspicious_access_detector import SuspiciousAccessDetector
+
+USER = "alice"
+
+
+def test_fires_when_distinct_ips_exceed_threshold():
+    detector = SuspiciousAccessDetector(threshold=2, window_minutes=30)
+    now = datetime(2025, 11, 28, 10, 0, 0)
+
+    assert detector.observe(USER, "10.0.0.1", now, now) is None
+    assert detector.observe(USER, "10.0.0.2", now, now) is None
+    assert detector.observe(USER, "10.0.0.2", now, now) is None
+    assert detector.observe(USER, "10.0.0.3", now, now) == (3, ["10.0.0.1", "10.0.0.2", "10.0.0.3"], False)
+
+
+def test_widening_window_backfills_older_logins(db, add_log):
+    now = datetime.now()
+    detector = SuspiciousAccessDetector(threshold=2, window_minutes=5)
+    add_log(event_type=LogEventTypeEnum.LOGIN_SUCCESS, user_name=USER, ip="10.0.0.1",
+            timestamp=now - timedelta(minutes=8))
+    add_log(event_type=LogEventTypeEnum.LOGIN_SUCCESS, user_name=USER, ip="10.0.0.2",
+            timestamp=now - timedelta(minutes=1))
+    detector.rebuild(db, now)
+
+    previous = detector.configure(2, 10)
+    assert detector.backfill(db, previous, now) == 1
+
+    assert detector.observe(USER, "10.0.0.3", now, now) == (3, ["10.0.0.1", "10.0.0.2", "10.0.0.3"], False)
@@ -1,5 +1,8 @@
 ﻿USE log_audit;
 
+-- 全文索引须在关闭停用词时创建，否则 ngram 解析器丢弃包含停用词的切分（见 migrations/005）
+SET SESSION innodb_ft_enable_stopword = OFF;
+
 CREATE TABLE `users` (
   `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
   `username` VARCHAR(64) NOT NULL,
@@ -23,7 +26,10 @@ CREATE TABLE `logs` (
   `ip` VARCHAR(45) NULL COMMENT '相关 IP（源/目的按约定）',
   `user_name` VARCHAR(64) NULL COMMENT '日志中出现的用户名（字符串）',
   `message` VARCHAR(1024) NOT NULL COMMENT '简要信息，便于列表展示',
+  `event_type` ENUM('LOGIN_FAILED','LOGIN_SUCCESS','OTHER') NULL COMMENT '入库时由 message 分类的事件类型，NULL 表示历史行未回填',
   `raw_data` TEXT NULL COMMENT '原始日志内容',
+  `raw_data_z` BLOB NULL COMMENT '压缩后的原始日志（1 字节字典编号 + zlib 流）',
+  `raw_data_size` INT UNSIGNED NULL COMMENT '压缩前原始日志字节数',
   `ingest_type` ENUM('file','api','manual') NOT NULL DEFAULT 'file' COMMENT '日志接入方式',
   `parse_status` ENUM('ok','failed') NOT NULL DEFAULT 'ok' COMMENT '解析是否成功',
   `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
@@ -33,9 +39,18 @@ CREATE TABLE `logs` (
   KEY `idx_logs_source` (`source`),
   KEY `idx_logs_ip` (`ip`),
   KEY `idx_logs_user_name` (`user_name`),
-  KEY `idx_logs_time_source_level` (`timestamp`, `source`, `level`)
+  KEY `idx_logs_time_source_level` (`timestamp`, `source`, `level`),
+  KEY `idx_logs_event_type_timestamp` (`event_type`, `timestamp`),
+  FULLTEXT KEY `ft_logs_message` (`message`) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='统一日志表';
 
+CREATE TABLE `log_fingerprints` (
+  `fingerprint` BIGINT NOT NULL COMMENT '(source, timestamp, raw_data) 的 64 位哈希',
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '写入时间',
+  PRIMARY KEY (`fingerprint`),
+  KEY `idx_log_fingerprints_created_at` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='日志指纹(上传去重)';
+
 CREATE TABLE `alerts` (
   `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
   `rule_code` VARCHAR(64) NOT NULL COMMENT '规则编码，程序内部使用',
@@ -47,15 +62,59 @@ CREATE TABLE `alerts` (
   `related_user` VARCHAR(64) NULL COMMENT '关联用户名字符',
   `log_count` INT UNSIGNED NOT NULL DEFAULT 0 COMMENT '关联日志数量',
   `description` VARCHAR(512) NULL COMMENT '告警描述/备注',
+  `rule_id` INT NULL COMMENT '触发的自定义规则 alert_rules.id（仅 CUSTOM 告警）',
   `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   PRIMARY KEY (`id`),
   KEY `idx_alerts_triggered_at` (`triggered_at`),
+  KEY `idx_alerts_rule_id` (`rule_id`),
   KEY `idx_alerts_rule_code` (`rule_code`),
   KEY `idx_alerts_status` (`status`),
   KEY `idx_alerts_sev_status_time` (`severity`, `status`, `triggered_at`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='告警记录';
 
+CREATE TABLE `alert_logs` (
+  `alert_id` BIGINT UNSIGNED NOT NULL COMMENT 'alerts.id',
+  `log_id` BIGINT UNSIGNED NOT NULL COMMENT 'logs.id',
+  PRIMARY KEY (`alert_id`, `log_id`),
+  KEY `idx_alert_logs_log_id` (`log_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='告警关联日志';
+
+CREATE TABLE `alert_rules` (
+  `id` INT NOT NULL AUTO_INCREMENT,
+  `name` VARCHAR(100) NOT NULL COMMENT '规则名称',
+  `description` TEXT NULL COMMENT '规则说明',
+  `enabled` TINYINT(1) NOT NULL DEFAULT 1 COMMENT '是否启用',
+  `alert_level` ENUM('LOW','MEDIUM','HIGH','CRITICAL') NOT NULL DEFAULT 'MEDIUM' COMMENT '产生告警的级别',
+  `conditions` TEXT NOT NULL COMMENT '字段条件列表（JSON）',
+  `group_by` VARCHAR(20) NULL COMMENT '分组字段',
+  `aggregate` VARCHAR(20) NOT NULL DEFAULT 'count' COMMENT 'count / distinct',
+  `distinct_field` VARCHAR(20) NULL COMMENT 'distinct 统计的字段',
+  `threshold` INT NOT NULL DEFAULT 1 COMMENT '触发阈值',
+  `window_minutes` INT NOT NULL DEFAULT 5 COMMENT '时间窗口（分钟）',
+  `created_by` INT NULL COMMENT '创建人 users.id',
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` DATETIME NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_alert_rules_name` (`name`),
+  KEY `idx_alert_rules_enabled` (`enabled`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='自定义告警规则';
+
+CREATE TABLE `alert_scheduler_state` (
+  `name` VARCHAR(100) NOT NULL COMMENT '状态名',
+  `value` TEXT NOT NULL COMMENT '状态值（JSON）',
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='告警调度状态';
+
+CREATE TABLE `data_versions` (
+  `name` VARCHAR(64) NOT NULL COMMENT '数据名（表名）',
+  `version` BIGINT NOT NULL DEFAULT 0 COMMENT '版本号，每次写入事务递增',
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='数据版本（进程内缓存的变化检测）';
+
+INSERT INTO `data_versions` (`name`, `version`) VALUES ('system_configs', 0), ('alert_rules', 0);
+
 CREATE TABLE `operation_log` (
   `id` BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
   `user_id` BIGINT UNSIGNED NOT NULL COMMENT '操作用户 ID',
@@ -66,6 +125,7 @@ CREATE TABLE `operation_log` (
   PRIMARY KEY (`id`),
   KEY `idx_oplog_user_time` (`user_id`, `created_at`),
   KEY `idx_oplog_action_time` (`action`, `created_at`),
+  FULLTEXT KEY `ft_operation_log_detail` (`detail`) WITH PARSER ngram,
   CONSTRAINT `fk_oplog_user` FOREIGN KEY (`user_id`) REFERENCES `users`(`id`) ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='操作审计日志';
 
@@ -0,0 +1,8 @@
+-- logs.raw_data 压缩存储
+-- 开启 LOG_RAW_DATA_COMPRESSION 后新写入的行存入 raw_data_z，raw_data 为空；
+-- 历史明文行可在应用目录执行 `python -m app.services.raw_data_storage` 分批迁移。
+USE log_audit;
+
+ALTER TABLE `logs`
+  ADD COLUMN `raw_data_z` BLOB NULL COMMENT '压缩后的原始日志（1 字节字典编号 + zlib 流）' AFTER `raw_data`,
+  ADD COLUMN `raw_data_size` INT UNSIGNED NULL COMMENT '压缩前原始日志字节数' AFTER `raw_data_z`;
@@ -0,0 +1,28 @@
+-- 自定义告警规则
+-- 规则由 /admin/alert-rules 维护，应用进程内编译后对每批入库日志求值；
+-- 产生的 CUSTOM 告警在 alerts.rule_id 记录规则 ID。
+USE log_audit;
+
+CREATE TABLE `alert_rules` (
+  `id` INT NOT NULL AUTO_INCREMENT,
+  `name` VARCHAR(100) NOT NULL COMMENT '规则名称',
+  `description` TEXT NULL COMMENT '规则说明',
+  `enabled` TINYINT(1) NOT NULL DEFAULT 1 COMMENT '是否启用',
+  `alert_level` ENUM('LOW','MEDIUM','HIGH','CRITICAL') NOT NULL DEFAULT 'MEDIUM' COMMENT '产生告警的级别',
+  `conditions` TEXT NOT NULL COMMENT '字段条件列表（JSON）',
+  `group_by` VARCHAR(20) NULL COMMENT '分组字段',
+  `aggregate` VARCHAR(20) NOT NULL DEFAULT 'count' COMMENT 'count / distinct',
+  `distinct_field` VARCHAR(20) NULL COMMENT 'distinct 统计的字段',
+  `threshold` INT NOT NULL DEFAULT 1 COMMENT '触发阈值',
+  `window_minutes` INT NOT NULL DEFAULT 5 COMMENT '时间窗口（分钟）',
+  `created_by` INT NULL COMMENT '创建人 users.id',
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `updated_at` DATETIME NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_alert_rules_name` (`name`),
+  KEY `idx_alert_rules_enabled` (`enabled`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='自定义告警规则';
+
+ALTER TABLE `alerts`
+  ADD COLUMN `rule_id` INT NULL COMMENT '触发的自定义规则 alert_rules.id（仅 CUSTOM 告警）' AFTER `description`,
+  ADD KEY `idx_alerts_rule_id` (`rule_id`);
@@ -0,0 +1,8 @@
+-- logs.event_type 入库时事件分类
+-- 登录失败/成功检测与统计按该列过滤，不再对 message 做 LIKE 扫描；
+-- 历史行可在应用目录执行 `python -m app.services.event_classification` 分批回填。
+USE log_audit;
+
+ALTER TABLE `logs`
+  ADD COLUMN `event_type` ENUM('LOGIN_FAILED','LOGIN_SUCCESS','OTHER') NULL COMMENT '入库时由 message 分类的事件类型，NULL 表示历史行未回填' AFTER `message`,
+  ADD KEY `idx_logs_event_type_timestamp` (`event_type`, `timestamp`);
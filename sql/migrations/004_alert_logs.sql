@@ -0,0 +1,24 @@
+-- 告警-日志关联表
+-- 替代逗号分隔的 alerts.related_log_ids（可能被 group_concat_max_len 截断，且每次触发整体重写）：
+-- 每条关联一行，告警重复触发时用 INSERT IGNORE 只追加新日志，/alerts/{id}/logs 按主键范围分页读取。
+-- 历史告警可在应用目录执行 `python -m app.services.alert_log_links` 分批迁移。
+-- alert_id / log_id 的类型取自当前库的 alerts.id / logs.id（init_schema.sql 建库为 BIGINT UNSIGNED，
+-- 按应用模型建表为 INT），保证关联列与被关联的主键类型一致。
+USE log_audit;
+
+SET @alert_id_type = (SELECT COLUMN_TYPE FROM information_schema.COLUMNS
+  WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'alerts' AND COLUMN_NAME = 'id');
+SET @log_id_type = (SELECT COLUMN_TYPE FROM information_schema.COLUMNS
+  WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'logs' AND COLUMN_NAME = 'id');
+
+SET @ddl = CONCAT(
+  'CREATE TABLE `alert_logs` (',
+  '`alert_id` ', @alert_id_type, ' NOT NULL COMMENT ''alerts.id'', ',
+  '`log_id` ', @log_id_type, ' NOT NULL COMMENT ''logs.id'', ',
+  'PRIMARY KEY (`alert_id`, `log_id`), ',
+  'KEY `idx_alert_logs_log_id` (`log_id`)',
+  ') ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT=''告警关联日志'''
+);
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,27 @@
+-- 日志 message / 操作审计 detail、username 的 ngram 全文索引
+-- 关键字检索由 LIKE '%…%' 全表扫描改为 MATCH ... AGAINST (... IN BOOLEAN MODE)，
+-- 支持多词 AND、"短语"、前缀*；索引随 INSERT 由 InnoDB 增量维护。
+-- ngram 切分长度取服务器参数 ngram_token_size（默认 2），应与应用配置 FULLTEXT_NGRAM_SIZE 一致。
+-- 停用词在建索引时生效：ngram 解析器会丢弃包含停用词的切分（如 "is"、"at"），对应关键字查不到，
+-- 因此建索引前关闭停用词；之后重建这些索引（DROP/ADD、OPTIMIZE TABLE 全量重建）同样需先执行该 SET。
+-- 大表建索引耗时较长，执行完成前应用配置 FULLTEXT_SEARCH_ENABLED=false（退化为 LIKE）。
+USE log_audit;
+
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+ALTER TABLE `logs`
+  ADD FULLTEXT KEY `ft_logs_message` (`message`) WITH PARSER ngram;
+
+ALTER TABLE `operation_log`
+  ADD FULLTEXT KEY `ft_operation_log_detail` (`detail`) WITH PARSER ngram;
+
+-- 操作日志按用户名模糊搜索；仅在表中有 username 列（应用模型建表）时创建
+SET @ddl = IF(
+  (SELECT COUNT(*) FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'operation_log' AND COLUMN_NAME = 'username') > 0,
+  'ALTER TABLE `operation_log` ADD FULLTEXT KEY `ft_operation_log_username` (`username`) WITH PARSER ngram',
+  'DO 0'
+);
+PREPARE stmt FROM @ddl;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,11 @@
+-- 告警调度状态
+-- 告警调度主节点的检测水位（JSON：low 及其上已检测的日志 ID 区间），与告警在同一事务中写入；
+-- 主节点切换后新主节点从该水位继续检测，不遗漏切换期间入库的日志，也不重复检测。
+USE log_audit;
+
+CREATE TABLE `alert_scheduler_state` (
+  `name` VARCHAR(100) NOT NULL COMMENT '状态名',
+  `value` TEXT NOT NULL COMMENT '状态值（JSON）',
+  `updated_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='告警调度状态';
@@ -0,0 +1,12 @@
+-- 日志指纹(上传去重)
+-- 开启 INGEST_DEDUP_ENABLED 时，上传日志的 (source, timestamp, raw_data) 64 位指纹先于日志写入本表；
+-- 按 created_at 分批清理超出去重窗口 INGEST_DEDUP_WINDOW_DAYS 的指纹。
+-- 本表为空时不影响已有日志：只有迁移后上传的日志参与去重。
+USE log_audit;
+
+CREATE TABLE IF NOT EXISTS `log_fingerprints` (
+  `fingerprint` BIGINT NOT NULL COMMENT '(source, timestamp, raw_data) 的 64 位哈希',
+  `created_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '写入时间',
+  PRIMARY KEY (`fingerprint`),
+  KEY `idx_log_fingerprints_created_at` (`created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='日志指纹(上传去重)';
@@ -0,0 +1,12 @@
+-- 数据版本
+-- 写入 system_configs / alert_rules 的事务同时递增对应行的 version，
+-- 各进程按 CONFIG_CACHE_REFRESH_SECONDS 比较版本号发现其他进程的改动（不受 updated_at 秒级精度限制）。
+USE log_audit;
+
+CREATE TABLE IF NOT EXISTS `data_versions` (
+  `name` VARCHAR(64) NOT NULL COMMENT '数据名（表名）',
+  `version` BIGINT NOT NULL DEFAULT 0 COMMENT '版本号，每次写入事务递增',
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='数据版本（进程内缓存的变化检测）';
+
+INSERT IGNORE INTO `data_versions` (`name`, `version`) VALUES ('system_configs', 0), ('alert_rules', 0);